@@ -0,0 +1,291 @@
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, timedelta
+from itertools import product
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.ai_engine.price_index import CompetitorPriceIndex, EventCalendar
+from backend.ai_engine.price_optimizer import (
+    BASE_PRICES,
+    COMPETITOR_UNDERCUT_PCT,
+    EVENT_IMPACT_PCT,
+    room_class_rows,
+)
+from backend.ai_engine.vectorized_optimizer import build_market_arrays, compute_price_matrix
+from backend.db.market_data import fetch_market_data
+from backend.history.price_history import PriceHistoryStore, to_day
+
+# Backtesting de configuraciones de reglas de precios. El mercado histórico
+# (competencia y eventos de un rango de fechas) se resume una sola vez en
+# arreglos por clase de habitación y día, igual que en el motor vectorizado, y
+# qué niveles de impacto hubo cada día. Cada configuración (descuento contra la
+# competencia, impacto por nivel de evento y precios base) solo recalcula la
+# matriz de precios sobre esos arreglos, así que miles de configuraciones se
+# reparten en chunks entre procesos sin volver a consultar ni a indexar.
+#
+# Una configuración es un diccionario plano: 'undercut_pct', 'impact.<nivel>' y
+# 'base.<room_type_id>'; lo que no trae toma el valor de price_optimizer.
+
+BACKTEST_WORKERS = int(os.getenv('BACKTEST_WORKERS', str(os.cpu_count() or 2)))
+BACKTEST_CHUNK_SIZE = int(os.getenv('BACKTEST_CHUNK_SIZE', '250'))
+BACKTEST_MAX_CONFIGS = int(os.getenv('BACKTEST_MAX_CONFIGS', '100000'))
+EXECUTORS = ('process', 'thread')
+# Los procesos no se crean con fork: bifurcar el servidor Flask mientras otros hilos
+# tienen tomados locks (métricas, cachés, scheduler) puede dejar hijos bloqueados
+BACKTEST_START_METHOD = os.getenv(
+    'BACKTEST_START_METHOD', 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+SEARCHES = ('grid', 'random')
+
+UNDERCUT_PARAM = 'undercut_pct'
+IMPACT_PREFIX = 'impact.'
+BASE_PREFIX = 'base.'
+
+# Métricas por configuración; las de referencia solo existen si el mercado trae precios reales
+METRICS = ('mean_price', 'mean_strength', 'premium_vs_competition', 'event_uplift', 'mae', 'mape', 'bias')
+
+
+def default_config() -> Dict[str, float]:
+    """Configuración vigente en price_optimizer."""
+    config = {UNDERCUT_PARAM: COMPETITOR_UNDERCUT_PCT}
+    config.update({f'{IMPACT_PREFIX}{level}': pct for level, pct in EVENT_IMPACT_PCT.items()})
+    config.update({f'{BASE_PREFIX}{room_type_id}': price for room_type_id, price in BASE_PRICES.items()})
+    return config
+
+
+def validate_param(name: str) -> None:
+    if name != UNDERCUT_PARAM and not name.startswith((IMPACT_PREFIX, BASE_PREFIX)):
+        raise ValueError(f"Parámetro de backtest desconocido: {name}")
+
+
+def config_rules(config: Dict[str, float]) -> Tuple[float, Dict[str, float], Dict[str, float]]:
+    """(undercut_pct, impacto por nivel, precios base) de una configuración plana."""
+    impact_pct = dict(EVENT_IMPACT_PCT)
+    base_prices = dict(BASE_PRICES)
+    for name, value in config.items():
+        if name.startswith(IMPACT_PREFIX):
+            impact_pct[name[len(IMPACT_PREFIX):]] = float(value)
+        elif name.startswith(BASE_PREFIX):
+            base_prices[name[len(BASE_PREFIX):]] = float(value)
+    return float(config.get(UNDERCUT_PARAM, COMPETITOR_UNDERCUT_PCT)), impact_pct, base_prices
+
+
+def check_config_count(count: int) -> None:
+    if count > BACKTEST_MAX_CONFIGS:
+        raise ValueError(f"{count} configuraciones superan el máximo de {BACKTEST_MAX_CONFIGS}")
+
+
+def parse_space(space: Dict[str, Sequence[float]]) -> Dict[str, List[float]]:
+    """Valida nombres y convierte los valores de cada parámetro a float (ValueError si no se puede)."""
+    if not isinstance(space, dict):
+        raise ValueError("space debe ser un objeto {parámetro: valores}")
+    parsed = {}
+    for name, values in space.items():
+        validate_param(name)
+        if not isinstance(values, (list, tuple)) or not values:
+            raise ValueError(f"Los valores de {name} deben ser una lista no vacía")
+        try:
+            parsed[name] = [float(value) for value in values]
+        except (TypeError, ValueError):
+            raise ValueError(f"Los valores de {name} deben ser numéricos")
+    return parsed
+
+
+def grid_configs(space: Dict[str, Sequence[float]]) -> List[Dict[str, float]]:
+    """Producto cartesiano de los valores de cada parámetro."""
+    space = parse_space(space)
+    check_config_count(int(np.prod([len(values) for values in space.values()])))
+    names = list(space)
+    return [{**default_config(), **dict(zip(names, values))} for values in product(*(space[name] for name in names))]
+
+
+def random_configs(space: Dict[str, Sequence[float]], samples: int, seed: int = 0) -> List[Dict[str, float]]:
+    """samples configuraciones con cada parámetro uniforme en su rango [mínimo, máximo]."""
+    space = parse_space(space)
+    for name, bounds in space.items():
+        if len(bounds) != 2:
+            raise ValueError(f"El rango de {name} debe ser [mínimo, máximo]")
+    check_config_count(samples)
+    rng = random.Random(seed)
+    return [{**default_config(), **{name: rng.uniform(low, high) for name, (low, high) in space.items()}}
+            for _ in range(samples)]
+
+
+def build_backtest_market(
+    price_index: CompetitorPriceIndex,
+    events: List[Dict],
+    days: List[str],
+    own_room_types: Dict[str, str],
+    reference: Optional[np.ndarray] = None
+) -> Dict:
+    """
+    Agregados por día que comparten todas las configuraciones: los arreglos de
+    build_market_arrays y level_active[nivel, día] (qué niveles de impacto hubo).
+    reference es el precio real por día (NaN sin dato) para medir el error.
+    """
+    room_classes, room_rows = room_class_rows(own_room_types)
+    calendar = EventCalendar(events, days)
+    # El impacto depende de la configuración: aquí solo se guardan los niveles activos
+    market = build_market_arrays(price_index, calendar, days, impact_pct={}, room_classes=room_classes)
+    levels = sorted({level for day in days for level in calendar.labels_on(day)})
+    level_active = np.zeros((len(levels), len(days)), dtype=bool)
+    for i, day in enumerate(days):
+        for level in calendar.labels_on(day):
+            level_active[levels.index(level), i] = True
+    market.update(days=days, room_type_ids=list(own_room_types.values()), room_rows=room_rows,
+                  impact_levels=levels, level_active=level_active,
+                  reference=np.full(len(days), np.nan) if reference is None else np.asarray(reference, dtype=float))
+    return market
+
+
+def market_summary(market: Dict) -> Dict:
+    has_comp = ~np.isnan(market['comp_mean'][market['room_rows']])
+    return {
+        'days': len(market['days']),
+        'start_date': market['days'][0] if market['days'] else None,
+        'end_date': market['days'][-1] if market['days'] else None,
+        'room_types': len(market['room_type_ids']),
+        'competitor_coverage': round(float(has_comp.mean()), 4) if has_comp.size else 0.0,
+        'event_days': int(market['level_active'].any(axis=0).sum()),
+        'reference_days': int((~np.isnan(market['reference'])).sum()),
+    }
+
+
+def config_max_impact(market: Dict, impact_pct: Dict[str, float]) -> np.ndarray:
+    """Mayor impacto de los niveles activos cada día (0 si no hubo eventos), como max_impact_on."""
+    level_active = market['level_active']
+    if not len(level_active):
+        return np.zeros(len(market['days']))
+    pct = np.array([impact_pct.get(level, 0) for level in market['impact_levels']], dtype=float)
+    impact = np.where(level_active, pct[:, None], -np.inf).max(axis=0)
+    # Un impacto negativo no se aplica en las reglas (solo max_impact > 0)
+    return np.maximum(impact, 0)
+
+
+def config_prices(market: Dict, config: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(precios, fuerza, impacto por día) que habrían dado las reglas con la configuración."""
+    undercut_pct, impact_pct, base_prices = config_rules(config)
+    max_impact = config_max_impact(market, impact_pct)
+    prices, strength = compute_price_matrix(market['room_type_ids'], {**market, 'max_impact': max_impact},
+                                            undercut_pct, base_prices, market['room_rows'])
+    return prices, strength, max_impact
+
+
+def evaluate_config(market: Dict, config: Dict[str, float]) -> Dict[str, Optional[float]]:
+    """Métricas de METRICS para una configuración sobre el mercado histórico."""
+    prices, strength, max_impact = config_prices(market, config)
+    comp_mean = market['comp_mean'][market['room_rows']]
+    has_comp = ~np.isnan(comp_mean)
+    impacted = max_impact > 0
+    # Lo que agregan los eventos: precio final menos el precio antes del incremento
+    uplift = (prices * (max_impact / (1 + max_impact))[None, :])[:, impacted]
+    reference = market['reference']
+    has_reference = ~np.isnan(reference)
+    metrics = {
+        'mean_price': float(prices.mean()) if prices.size else None,
+        'mean_strength': float(strength.mean()) if strength.size else None,
+        'premium_vs_competition': float((prices[has_comp] / comp_mean[has_comp]).mean() - 1) if has_comp.any() else None,
+        'event_uplift': float(uplift.mean()) if uplift.size else None,
+        'mae': None, 'mape': None, 'bias': None,
+    }
+    if has_reference.any() and prices.size:
+        # El precio real es por hotel y día: se compara contra el promedio de las habitaciones
+        error = prices.mean(axis=0)[has_reference] - reference[has_reference]
+        metrics.update(mae=float(np.abs(error).mean()), bias=float(error.mean()),
+                       mape=float((np.abs(error) / reference[has_reference]).mean()))
+    return {name: None if value is None else round(value, 4) for name, value in metrics.items()}
+
+
+# Mercado compartido dentro de cada proceso del pool (se envía una vez por proceso, no por chunk)
+_worker_market: Dict = {}
+
+
+def _init_worker(market: Dict) -> None:
+    _worker_market.update(market)
+
+
+def _evaluate_chunk(configs: List[Dict[str, float]], market: Optional[Dict] = None) -> List[Dict]:
+    market = market if market is not None else _worker_market
+    return [evaluate_config(market, config) for config in configs]
+
+
+def run_backtest(
+    market: Dict,
+    configs: List[Dict[str, float]],
+    executor: str = 'process',
+    max_workers: int = BACKTEST_WORKERS,
+    chunk_size: int = BACKTEST_CHUNK_SIZE
+) -> List[Dict]:
+    """
+    Evalúa todas las configuraciones en paralelo: [{index, config, metrics}] en el
+    mismo orden que configs.
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f"Ejecutor desconocido: {executor}")
+    chunk_size = max(1, chunk_size)
+    chunks = [configs[i:i + chunk_size] for i in range(0, len(configs), chunk_size)]
+    workers = max(1, min(max_workers, len(chunks)))
+    if workers == 1:
+        metrics = [item for chunk in chunks for item in _evaluate_chunk(chunk, market)]
+    elif executor == 'process':
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(BACKTEST_START_METHOD),
+                                 initializer=_init_worker, initargs=(market,)) as pool:
+            metrics = [item for result in pool.map(_evaluate_chunk, chunks) for item in result]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backtest') as pool:
+            metrics = [item for result in pool.map(_evaluate_chunk, chunks, [market] * len(chunks)) for item in result]
+    return [{'index': index, 'config': config, 'metrics': item}
+            for index, (config, item) in enumerate(zip(configs, metrics))]
+
+
+def rank_results(results: List[Dict], objective: str, top: Optional[int] = None) -> List[Dict]:
+    """
+    Ordena por la métrica objective (ascendente; con prefijo '-' descendente).
+    Las configuraciones sin valor para la métrica van al final.
+    """
+    metric = objective.lstrip('-')
+    if metric not in METRICS:
+        raise ValueError(f"Métrica desconocida: {metric}")
+    sign = -1 if objective.startswith('-') else 1
+    ranked = sorted(results, key=lambda result: (result['metrics'][metric] is None,
+                                                 sign * (result['metrics'][metric] or 0)))
+    return ranked[:top] if top is not None else ranked
+
+
+def backtest_days(start_date: date, end_date: date) -> List[str]:
+    return [(start_date + timedelta(days=offset)).isoformat() for offset in range((end_date - start_date).days + 1)]
+
+
+def reference_prices(history: PriceHistoryStore, hotel: str, days: List[str]) -> np.ndarray:
+    """Precio promedio scrapeado del hotel por día de check-in (NaN sin dato), desde el historial."""
+    reference = np.full(len(days), np.nan)
+    if not days:
+        return reference
+    trend = history.price_trend(hotel, days[0], days[-1])
+    first = to_day(days[0])
+    for day, mean in zip(trend['day'].tolist(), trend['mean'].tolist()):
+        if 0 <= day - first < len(days):
+            reference[day - first] = mean
+    return reference
+
+
+def load_backtest_market(
+    supabase,
+    hotel_coords: Tuple[float, float],
+    own_room_types: Dict[str, str],
+    start_date: date,
+    end_date: date,
+    radius_km: float = 20,
+    history: Optional[PriceHistoryStore] = None,
+    reference_hotel: Optional[str] = None
+) -> Dict:
+    """Consulta la competencia y los eventos guardados del rango y los resume para el backtest."""
+    if end_date < start_date:
+        raise ValueError("end_date debe ser igual o posterior a start_date")
+    days = backtest_days(start_date, end_date)
+    price_index, events = fetch_market_data(supabase, hotel_coords, start_date, end_date, radius_km=radius_km)
+    reference = reference_prices(history, reference_hotel, days) if history is not None and reference_hotel else None
+    return build_backtest_market(price_index, events, days, own_room_types, reference)
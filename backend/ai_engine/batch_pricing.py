@@ -0,0 +1,177 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import date
+from typing import Dict, Iterable, Iterator, Optional
+
+from backend.ai_engine.price_index import CompetitorPriceIndex, EventCalendar
+from backend.ai_engine.price_optimizer import empty_recommendation_set, pricing_window, recommend_from_market_compact
+from backend.ai_engine.recommendation_set import RecommendationSet
+from backend.ai_engine.vectorized_optimizer import recommend_from_market_vectorized_compact
+from backend.db.market_data import load_market
+from backend.db.supabase_client import bulk_write_recommendations
+from backend.geo.distance import bounding_box
+from backend.geo.spatial_index import build_event_index
+
+# Precios para varios hoteles en una sola corrida: competencia y eventos se
+# consultan una vez para la unión de las ventanas de fechas y de las zonas de
+# todos los hoteles, los índices se construyen una vez y el cálculo por hotel se
+# reparte en un pool de hilos o de procesos. Los resultados se entregan por
+# hotel conforme terminan. Cada hotel se calcula como RecommendationSet (más
+# barato de enviar desde un proceso) y se convierte a diccionarios al entregarlo.
+
+BATCH_PRICING_WORKERS = int(os.getenv('BATCH_PRICING_WORKERS', str(min(8, os.cpu_count() or 2))))
+# Sin fork: el servidor Flask tiene otros hilos que pueden tener locks tomados
+BATCH_PRICING_START_METHOD = os.getenv(
+    'BATCH_PRICING_START_METHOD', 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+EVENT_RADIUS_KM = 20
+
+MARKET_ENGINES = {
+    'rules': recommend_from_market_compact,
+    'vectorized': recommend_from_market_vectorized_compact,
+}
+EXECUTORS = ('thread', 'process')
+
+
+def normalize_hotel(spec: Dict) -> Dict:
+    """Valida un hotel con el mismo formato que /api/ai/generate-recommendations."""
+    missing = [key for key in ('hotel_id', 'hotel_latitude', 'hotel_longitude', 'own_room_types') if spec.get(key) is None]
+    if missing:
+        raise ValueError(f"Faltan campos del hotel {spec.get('hotel_id')}: {', '.join(missing)}")
+    return {
+        'hotel_id': spec['hotel_id'],
+        'coords': (float(spec['hotel_latitude']), float(spec['hotel_longitude'])),
+        'own_room_types': spec['own_room_types'],
+        'days_in_advance': int(spec.get('days_in_advance', 60)),
+        'target_dates': spec.get('target_dates'),
+    }
+
+
+def prepare_batch(supabase, hotels: Iterable[Dict], radius_km: float = EVENT_RADIUS_KM,
+                  today: Optional[date] = None) -> Dict:
+    """
+    Consulta una sola vez los datos compartidos por todos los hoteles.
+    Los eventos se piden para la caja que cubre a todos; cada hotel se queda
+    después con los de su radio usando el índice por celdas.
+    """
+    today = today or date.today()
+    jobs = []
+    for spec in hotels:
+        hotel = normalize_hotel(spec)
+        hotel['days'], hotel['start_date'], hotel['end_date'] = pricing_window(
+            today, hotel['days_in_advance'], hotel['target_dates'])
+        jobs.append(hotel)
+    priced = [hotel for hotel in jobs if hotel['days']]
+    batch = {'hotels': jobs, 'radius_km': radius_km, 'start_date': None, 'end_date': None,
+             'price_index': CompetitorPriceIndex(), 'event_index': build_event_index([]),
+             'competitor_rows': 0, 'events': 0}
+    if not priced:
+        return batch
+
+    start_date = min(hotel['start_date'] for hotel in priced)
+    end_date = max(hotel['end_date'] for hotel in priced)
+    boxes = [bounding_box(*hotel['coords'], radius_km) for hotel in priced]
+    union_box = (min(box[0] for box in boxes), max(box[1] for box in boxes),
+                 min(box[2] for box in boxes), max(box[3] for box in boxes))
+
+    market = load_market(supabase, start_date, end_date, union_box)
+    batch.update(start_date=start_date, end_date=end_date,
+                 price_index=market['price_index'],
+                 event_index=build_event_index(market['events']),
+                 competitor_rows=market['competitor_rows'], events=len(market['events']))
+    return batch
+
+
+def price_hotel(hotel: Dict, engine: str, price_index: CompetitorPriceIndex, event_index,
+                radius_km: float) -> RecommendationSet:
+    """Recomendaciones de un hotel con los índices compartidos del lote."""
+    if not hotel['days']:
+        return empty_recommendation_set(hotel['hotel_id'], hotel['own_room_types'])
+    nearby = [event_index.payload(key) for key, _distance in event_index.within_radius(*hotel['coords'], radius_km)]
+    event_calendar = EventCalendar(nearby, hotel['days'])
+    return MARKET_ENGINES[engine](hotel['hotel_id'], hotel['own_room_types'], hotel['days'], price_index, event_calendar)
+
+
+# Índices compartidos dentro de cada proceso del pool (se envían una vez por proceso, no por hotel)
+_worker_batch: Dict = {}
+
+
+def _init_worker(price_index: CompetitorPriceIndex, event_index, radius_km: float) -> None:
+    _worker_batch.update(price_index=price_index, event_index=event_index, radius_km=radius_km)
+
+
+def _price_hotel_in_worker(hotel: Dict, engine: str) -> RecommendationSet:
+    return price_hotel(hotel, engine, _worker_batch['price_index'], _worker_batch['event_index'],
+                       _worker_batch['radius_km'])
+
+
+def _timed(function, *args) -> Dict:
+    started = time.monotonic()
+    recommendations = function(*args)
+    return {'recommendations': recommendations, 'duration_s': round(time.monotonic() - started, 3)}
+
+
+def iter_batch_recommendations(
+    batch: Dict,
+    engine: str = 'rules',
+    executor: str = 'thread',
+    max_workers: int = BATCH_PRICING_WORKERS
+) -> Iterator[Dict]:
+    """
+    Calcula los hoteles del lote en paralelo y entrega un resultado por hotel
+    conforme terminan: {index, hotel_id, status, count, recommendations, duration_s, error}.
+    Un hotel que falla no detiene a los demás.
+    """
+    if engine not in MARKET_ENGINES:
+        raise ValueError(f"Motor de precios desconocido: {engine}")
+    if executor not in EXECUTORS:
+        raise ValueError(f"Ejecutor desconocido: {executor}")
+    hotels = batch['hotels']
+    if not hotels:
+        return
+
+    workers = max(1, min(max_workers, len(hotels)))
+    if executor == 'process':
+        context = multiprocessing.get_context(BATCH_PRICING_START_METHOD)
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                   initargs=(batch['price_index'], batch['event_index'], batch['radius_km']))
+        submit = lambda hotel: pool.submit(_timed, _price_hotel_in_worker, hotel, engine)
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch-pricing')
+        submit = lambda hotel: pool.submit(_timed, price_hotel, hotel, engine, batch['price_index'],
+                                           batch['event_index'], batch['radius_km'])
+
+    with pool:
+        futures = {submit(hotel): index for index, hotel in enumerate(hotels)}
+        for future in as_completed(futures):
+            index = futures[future]
+            result = {'index': index, 'hotel_id': hotels[index]['hotel_id'], 'status': 'success',
+                      'count': 0, 'recommendations': [], 'duration_s': None, 'error': None}
+            try:
+                outcome = future.result()
+                result.update(outcome, recommendations=outcome['recommendations'].to_dicts())
+                result['count'] = len(result['recommendations'])
+            except Exception as e:
+                print(f"❌ Error calculando precios del hotel {result['hotel_id']}: {e}")
+                result.update(status='failed', error=str(e))
+            yield result
+
+
+def generate_batch_recommendations(
+    supabase,
+    hotels: Iterable[Dict],
+    engine: str = 'rules',
+    executor: str = 'thread',
+    max_workers: int = BATCH_PRICING_WORKERS,
+    write: bool = False
+) -> Iterator[Dict]:
+    """
+    Consulta los datos compartidos, calcula todos los hoteles y, si write=True,
+    guarda las recomendaciones de cada hotel en cuanto está lista (agrega write_report).
+    """
+    batch = prepare_batch(supabase, hotels)
+    for result in iter_batch_recommendations(batch, engine, executor, max_workers):
+        if write and result['status'] == 'success':
+            result['write_report'] = bulk_write_recommendations(supabase, result['recommendations'])
+        yield result
@@ -0,0 +1,230 @@
+import json
+import os
+import tempfile
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta, datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from backend.ai_engine.price_optimizer import get_price_recommendations
+from backend.db.supabase_client import bulk_write_recommendations
+from backend.metrics.registry import timed
+
+# Recalculo incremental de recomendaciones: solo se recalculan (y se hace upsert de)
+# las fechas cuyos competitor_prices o detected_events cambiaron desde la última
+# corrida, usando una marca de agua sobre la columna de última modificación.
+#
+# La consulta de cambios se traslapa INCREMENTAL_OVERLAP_SECONDS con la corrida
+# anterior, para no perder filas confirmadas después con un timestamp anterior a
+# la marca de agua. De los eventos de la ventana se guarda el intervalo por id: si
+# un evento cambia de fechas o desaparece se recalculan también sus fechas
+# anteriores. Las filas borradas de competitor_prices no dejan rastro, así que la
+# ventana completa se recalcula al menos cada INCREMENTAL_FULL_HOURS horas.
+
+WATERMARKS_FILE = os.path.join('resultados', 'pricing_watermarks.json')
+INCREMENTAL_OVERLAP_SECONDS = float(os.getenv('INCREMENTAL_OVERLAP_SECONDS', '300'))
+INCREMENTAL_FULL_HOURS = float(os.getenv('INCREMENTAL_FULL_HOURS', '24'))
+
+# Columna de última modificación por tabla (usar "created_at" si la tabla no tiene updated_at)
+CHANGE_COLUMNS = {
+    "competitor_prices": "updated_at",
+    "detected_events": "updated_at",
+}
+
+_watermarks_lock = threading.Lock()
+
+
+def load_watermarks(path: str = WATERMARKS_FILE) -> Dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_watermark(hotel_id: str, watermark: Dict, path: str = WATERMARKS_FILE) -> None:
+    """Actualiza la marca de agua del hotel escribiendo a un temporal y renombrando."""
+    with _watermarks_lock:
+        watermarks = load_watermarks(path)
+        watermarks[hotel_id] = watermark
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(watermarks, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+
+@timed('db_fetch')
+def _execute(query, table: str) -> List[Dict]:
+    response = query.execute()
+    if hasattr(response, 'error') and response.error:
+        raise Exception(f"Error fetching changes from {table}: {response.error}")
+    return response.data if hasattr(response, 'data') else response
+
+
+def with_overlap(watermark: Optional[str], seconds: float = INCREMENTAL_OVERLAP_SECONDS) -> Optional[str]:
+    """La marca de agua menos el traslape (se deja igual si no es un timestamp ISO)."""
+    if not watermark:
+        return None
+    try:
+        return (datetime.fromisoformat(watermark) - timedelta(seconds=seconds)).isoformat()
+    except ValueError:
+        return watermark
+
+
+def _is_after(timestamp: Optional[str], watermark: str) -> bool:
+    if not timestamp:
+        return False
+    try:
+        return datetime.fromisoformat(timestamp) > datetime.fromisoformat(watermark)
+    except (TypeError, ValueError):
+        return timestamp > watermark
+
+
+def _dates_between(days: List[str], start: str, end: str) -> List[str]:
+    return days[bisect_left(days, start):bisect_right(days, end)]
+
+
+def fetch_changed_dates(
+    supabase,
+    since: Dict[str, Optional[str]],
+    days: List[str],
+    event_intervals: Optional[Dict[str, List[str]]] = None,
+    seen: Optional[Dict[str, Dict[str, str]]] = None
+) -> Tuple[Set[str], Dict[str, Optional[str]], Dict[str, List[str]], Dict[str, Dict[str, str]]]:
+    """
+    Fechas de la ventana afectadas por filas modificadas después de la marca de agua
+    (menos el traslape), la nueva marca de agua (el mayor timestamp visto por tabla),
+    los intervalos [start_date, end_date] por id de los eventos de la ventana y las
+    filas del traslape ya procesadas ({tabla: {id: timestamp}}, para no volver a
+    contarlas en la siguiente corrida).
+    Un evento modificado afecta todas las fechas de su intervalo; uno que cambió de
+    fechas o ya no está (borrado o fuera de la ventana), también las de su intervalo
+    anterior según event_intervals.
+    """
+    start, end = days[0], days[-1]
+    window = set(days)
+    changed: Set[str] = set()
+    latest = dict(since)
+    seen = seen or {}
+    timestamps: Dict[str, Dict[str, str]] = {"competitor_prices": {}, "detected_events": {}}
+
+    def is_new(table: str, row: Dict) -> bool:
+        """Modificada después del inicio del traslape y no contada ya por la corrida anterior."""
+        timestamp = row.get(CHANGE_COLUMNS[table])
+        if timestamp:
+            timestamps[table][str(row["id"])] = timestamp
+            if (latest.get(table) or "") < timestamp:
+                latest[table] = timestamp
+        cutoff = with_overlap(since.get(table))
+        if not cutoff:
+            return True
+        return _is_after(timestamp, cutoff) and seen.get(table, {}).get(str(row["id"])) != timestamp
+
+    column = CHANGE_COLUMNS["competitor_prices"]
+    query = (
+        supabase.table("competitor_prices")
+        .select(f"id,check_in_date,{column}")
+        .gte("check_in_date", start)
+        .lte("check_in_date", end)
+    )
+    if since.get("competitor_prices"):
+        query = query.gt(column, with_overlap(since["competitor_prices"]))
+    for row in _execute(query, "competitor_prices"):
+        if is_new("competitor_prices", row) and row["check_in_date"] in window:
+            changed.add(row["check_in_date"])
+
+    # Todos los eventos de la ventana (solo id, fechas y timestamp): así se detectan
+    # también los que se movieron o se borraron desde la corrida anterior
+    column = CHANGE_COLUMNS["detected_events"]
+    query = (
+        supabase.table("detected_events")
+        .select(f"id,start_date,end_date,{column}")
+        .lte("start_date", end)
+        .gte("end_date", start)
+    )
+    previous = event_intervals or {}
+    intervals: Dict[str, List[str]] = {}
+    for row in _execute(query, "detected_events"):
+        event_id = str(row["id"])
+        interval = [row["start_date"], row["end_date"]]
+        intervals[event_id] = interval
+        old = previous.get(event_id)
+        if is_new("detected_events", row) or old != interval:
+            changed.update(_dates_between(days, *interval))
+        if old is not None and old != interval:
+            changed.update(_dates_between(days, *old))
+    for event_id, old in previous.items():
+        if event_id not in intervals:
+            changed.update(_dates_between(days, *old))
+
+    # Solo hace falta recordar las filas que la siguiente consulta volverá a traer por el traslape
+    recent = {}
+    for table, rows in timestamps.items():
+        cutoff = with_overlap(latest.get(table))
+        recent[table] = {row_id: timestamp for row_id, timestamp in rows.items()
+                         if cutoff and not _is_after(cutoff, timestamp)}
+    return changed, latest, intervals, recent
+
+
+def generate_incremental_recommendations(
+    supabase,
+    hotel_id: str,
+    hotel_coords: Tuple[float, float],
+    own_room_types: Dict[str, str],
+    days_in_advance: int = 60,
+    engine: Callable = get_price_recommendations,
+    watermarks_path: str = WATERMARKS_FILE
+) -> Dict:
+    """
+    Recalcula y guarda solo las fechas que cambiaron desde la última corrida del hotel.
+    La primera corrida (o si cambian los tipos de habitación, o pasaron INCREMENTAL_FULL_HOURS
+    desde la última completa) recalcula la ventana completa.
+    Las fechas que entran a la ventana por el paso de los días siempre se recalculan.
+    """
+    today = date.today()
+    days = [(today + timedelta(days=day_offset)).isoformat() for day_offset in range(days_in_advance)]
+    if not days:
+        return {"mode": "incremental", "changed_dates": [], "recommendations": [], "write_report": None}
+    room_signature = sorted(own_room_types.values())
+    previous = load_watermarks(watermarks_path).get(hotel_id)
+
+    now = datetime.now()
+    last_full_at = previous.get("last_full_at") if previous else None
+    full = (previous is None or previous.get("room_types") != room_signature or not last_full_at
+            or now - datetime.fromisoformat(last_full_at) >= timedelta(hours=INCREMENTAL_FULL_HOURS))
+    since = {} if full else previous.get("tables", {})
+    changed, latest, event_intervals, recent = fetch_changed_dates(
+        supabase, since, days, None if full else previous.get("event_intervals"),
+        None if full else previous.get("recent"))
+    if full:
+        target_dates = set(days)
+    else:
+        # Fechas nuevas al final de la ventana que nunca se calcularon
+        target_dates = changed | {day for day in days if day > previous.get("window_end", "")}
+
+    recommendations = []
+    write_report = None
+    if target_dates:
+        recommendations = engine(supabase, hotel_id, hotel_coords, own_room_types, days_in_advance,
+                                 target_dates=None if full else target_dates)
+        write_report = bulk_write_recommendations(supabase, recommendations)
+
+    # Solo se avanza la marca de agua si todo se guardó
+    if write_report is None or write_report["failed"] == 0:
+        save_watermark(hotel_id, {
+            "tables": latest,
+            "room_types": room_signature,
+            "window_end": days[-1],
+            "event_intervals": event_intervals,
+            "recent": recent,
+            "last_full_at": now.isoformat() if full else last_full_at,
+            "last_run_at": now.isoformat(),
+        }, watermarks_path)
+
+    return {
+        "mode": "full" if full else "incremental",
+        "changed_dates": sorted(target_dates),
+        "recommendations": recommendations,
+        "write_report": write_report,
+    }
@@ -0,0 +1,113 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.ai_engine.room_types import classify_room_type
+
+# Índices por fecha que se construyen una sola vez por llamada al optimizador,
+# para que cada celda (tipo de habitación × día) sea una consulta O(1) en lugar
+# de recorrer todas las filas de competencia y eventos.
+
+
+def _accumulate(stats: List, price) -> None:
+    # El conteo incluye filas sin precio, igual que el promedio original
+    stats[2] += 1
+    if price:
+        stats[0] += price
+        if stats[1] is None or price < stats[1]:
+            stats[1] = price
+
+
+class CompetitorPriceIndex:
+    """
+    Agregados de precios de competencia agrupados por check_in_date y, además,
+    por (check_in_date, clase de habitación) según room_type_raw.
+    Por grupo se mantiene suma, mínimo y conteo acumulados.
+    """
+
+    def __init__(self, competitor_prices: Iterable[Dict] = ()):
+        self._stats: Dict[str, List] = {}
+        self._by_class: Dict[Tuple[str, str], List] = {}
+        for row in competitor_prices:
+            self.add(row)
+
+    def add(self, row: Dict) -> None:
+        """Agrega una fila de competitor_prices a los acumulados de su fecha y de su clase."""
+        check_in = row["check_in_date"]
+        stats = self._stats.get(check_in)
+        if stats is None:
+            stats = self._stats[check_in] = [0.0, None, 0]  # suma, mínimo, conteo
+        price = row.get("price_per_night")
+        _accumulate(stats, price)
+        room_class = classify_room_type(row.get("room_type_raw"))
+        if room_class is not None:
+            class_stats = self._by_class.get((check_in, room_class))
+            if class_stats is None:
+                class_stats = self._by_class[(check_in, room_class)] = [0.0, None, 0]
+            _accumulate(class_stats, price)
+
+    def lookup(self, check_in_date: str, room_class: Optional[str] = None) -> Optional[Tuple[float, float]]:
+        """
+        Devuelve (promedio, mínimo) para la fecha, o None si no hay precios válidos.
+        Con room_class solo cuentan las tarifas de la competencia de esa clase.
+        """
+        if room_class is None:
+            stats = self._stats.get(check_in_date)
+        else:
+            stats = self._by_class.get((check_in_date, room_class))
+        if stats is None or stats[1] is None:
+            return None
+        return stats[0] / stats[2], stats[1]
+
+    def room_classes(self) -> List[str]:
+        return sorted({room_class for _day, room_class in self._by_class})
+
+    def dates(self) -> List[str]:
+        return list(self._stats.keys())
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+
+class EventCalendar:
+    """
+    Proyecta los intervalos [start_date, end_date] de los eventos sobre una
+    ventana de fechas ISO ordenadas. Usa arreglos de diferencias por nivel de
+    impacto y un barrido lineal, así que construirlo cuesta O(E log D + D).
+    """
+
+    def __init__(self, events: Iterable[Dict], days: List[str]):
+        self.days = days
+        self._positions = {day: i for i, day in enumerate(days)}
+        n = len(days)
+        diffs: Dict[str, List[int]] = {}
+        for event in events:
+            # Comparación de cadenas ISO, igual que start_date <= fecha <= end_date
+            lo = bisect_left(days, event["start_date"])
+            hi = bisect_right(days, event["end_date"])
+            if lo >= hi:
+                continue
+            diff = diffs.get(event["estimated_impact"])
+            if diff is None:
+                diff = diffs[event["estimated_impact"]] = [0] * (n + 1)
+            diff[lo] += 1
+            diff[hi] -= 1
+
+        self._labels: List[Tuple[str, ...]] = []
+        # Orden fijo de niveles: no depende del orden en que llegaron los eventos
+        diffs = dict(sorted(diffs.items()))
+        running = {label: 0 for label in diffs}
+        for i in range(n):
+            active = []
+            for label, diff in diffs.items():
+                running[label] += diff[i]
+                if running[label] > 0:
+                    active.append(label)
+            self._labels.append(tuple(active))
+
+    def labels_on(self, iso_date: str) -> Tuple[str, ...]:
+        """Niveles de impacto de los eventos activos en la fecha."""
+        i = self._positions.get(iso_date)
+        return self._labels[i] if i is not None else ()
+
+    def max_impact_on(self, iso_date: str, impact_pct: Dict[str, float]) -> float:
+        return max((impact_pct.get(label, 0) for label in self.labels_on(iso_date)), default=0)
@@ -1,6 +1,14 @@
-from datetime import date, timedelta, datetime
-from typing import List, Dict, Tuple
-from backend.db.supabase_client import fetch_competitor_prices_for_range, fetch_detected_events_for_range
+from datetime import date, timedelta
+from typing import Iterable, List, Dict, Optional, Tuple, Union
+from backend.db.market_data import fetch_market_data
+from backend.ai_engine.price_index import CompetitorPriceIndex, EventCalendar
+from backend.ai_engine.recommendation_set import (
+    RULE_COMPETITOR_FALLBACK,
+    RecommendationSet,
+    competitor_rule,
+)
+from backend.ai_engine.room_types import classify_room_type
+from backend.metrics.registry import timed
 
 # Configuración heurística para el MVP
 COMPETITOR_UNDERCUT_PCT = 0.05  # 5% por debajo del promedio de competencia
@@ -14,75 +22,138 @@ BASE_PRICES = {     # Precios base por tipo de habitación (puedes ajustar)
     "R2": 1800.0,   # Deluxe Suite
     # ...
 }
+COMPETITOR_STRENGTH = 0.8
+# Sin tarifas de la misma clase de habitación se usa toda la competencia del día, con menos confianza
+ROOM_CLASS_FALLBACK_STRENGTH = 0.7
+
+def pricing_window(today: date, days_in_advance: int, target_dates: Optional[Iterable[str]] = None) -> Tuple[List[str], date, date]:
+    """
+    Fechas ISO a calcular y el rango (inicio, fin) que hay que consultar.
+    Sin target_dates es la ventana completa [today, today + days_in_advance].
+    """
+    days = [(today + timedelta(days=day_offset)).isoformat() for day_offset in range(days_in_advance)]
+    if target_dates is None:
+        return days, today, today + timedelta(days=days_in_advance)
+    wanted = set(target_dates)
+    days = [day for day in days if day in wanted]
+    if not days:
+        return [], today, today
+    return days, date.fromisoformat(days[0]), date.fromisoformat(days[-1])
+
+def competitor_stats(price_index: CompetitorPriceIndex, target_iso: str,
+                     room_class: Optional[str]) -> Tuple[Optional[Tuple[float, float]], bool]:
+    """
+    (promedio, mínimo) de la competencia comparable en la fecha y si son de la misma
+    clase de habitación. Si la clase no se reconoce o no tiene tarifas ese día se
+    usan todas las habitaciones de la competencia.
+    """
+    if room_class is not None:
+        stats = price_index.lookup(target_iso, room_class)
+        if stats:
+            return stats, True
+    return price_index.lookup(target_iso), False
 
 def get_price_recommendations(
     supabase,
     hotel_id: str,
     hotel_coords: Tuple[float, float],
     own_room_types: Dict[str, str],
-    days_in_advance: int = 60
-) -> List[Dict]:
+    days_in_advance: int = 60,
+    target_dates: Optional[Iterable[str]] = None,
+    compact: bool = False
+) -> Union[List[Dict], RecommendationSet]:
     """
     Genera recomendaciones de precios para los próximos days_in_advance días.
     Aplica reglas heurísticas sobre competencia y eventos.
+    Si se pasa target_dates (fechas ISO) solo se calculan esas fechas de la ventana.
+    Con compact=True devuelve un RecommendationSet en lugar de la lista de diccionarios.
     """
     today = date.today()
-    end_date = today + timedelta(days=days_in_advance)
-    # 1. Traer datos de competencia y eventos
-    competitor_prices = fetch_competitor_prices_for_range(supabase, today, end_date)
-    detected_events = fetch_detected_events_for_range(supabase, hotel_coords, today, end_date, radius_km=20)
+    days, start_date, end_date = pricing_window(today, days_in_advance, target_dates)
+    if not days:
+        return empty_recommendation_set(hotel_id, own_room_types) if compact else []
+    # 1. Traer competencia y eventos en paralelo; la competencia llega ya indexada por fecha
+    price_index, detected_events = fetch_market_data(supabase, hotel_coords, start_date, end_date, radius_km=20)
+
+    # 2. Indexar una sola vez por fecha: cada celda es una consulta O(1)
+    event_calendar = EventCalendar(detected_events, days)
+    recommendations = recommend_from_market_compact(hotel_id, own_room_types, days, price_index, event_calendar)
+    return recommendations if compact else recommendations.to_dicts()
 
-    recommendations = []
-    for room_name, room_type_id in own_room_types.items():
-        for day_offset in range(days_in_advance):
-            target_date = today + timedelta(days=day_offset)
+def room_class_rows(own_room_types: Dict[str, str]) -> Tuple[List[Optional[str]], List[int]]:
+    """Clases distintas de las habitaciones propias y la fila (clase) de cada habitación."""
+    own_classes = [classify_room_type(room_name) for room_name in own_room_types]
+    room_classes = list(dict.fromkeys(own_classes))
+    return room_classes, [room_classes.index(room_class) for room_class in own_classes]
+
+def empty_recommendation_set(hotel_id: str, own_room_types: Dict[str, str]) -> RecommendationSet:
+    room_classes, room_rows = room_class_rows(own_room_types)
+    return RecommendationSet(hotel_id, list(own_room_types.values()), room_classes, room_rows, [])
+
+def recommend_from_market(
+    hotel_id: str,
+    own_room_types: Dict[str, str],
+    days: List[str],
+    price_index: CompetitorPriceIndex,
+    event_calendar: EventCalendar
+) -> List[Dict]:
+    """Aplica las reglas sobre índices ya construidos (compartibles entre hoteles)."""
+    return recommend_from_market_compact(hotel_id, own_room_types, days, price_index, event_calendar).to_dicts()
+
+@timed('pricing')
+def recommend_from_market_compact(
+    hotel_id: str,
+    own_room_types: Dict[str, str],
+    days: List[str],
+    price_index: CompetitorPriceIndex,
+    event_calendar: EventCalendar
+) -> RecommendationSet:
+    """Igual que recommend_from_market, pero guarda regla y parámetros en un RecommendationSet."""
+    room_classes, room_rows = room_class_rows(own_room_types)
+    result = RecommendationSet(hotel_id, list(own_room_types.values()), room_classes, room_rows, days)
+    filled_rows = set()
+    for r, (room_name, room_type_id) in enumerate(own_room_types.items()):
+        row = room_rows[r]
+        room_class = room_classes[row]
+        # La regla y sus parámetros dependen solo de la clase y el día: se guardan una vez por clase
+        fill_row = row not in filled_rows
+        filled_rows.add(row)
+        room_prices, room_strength = [], []
+        for d, target_iso in enumerate(days):
             # --- Regla 1: Reacción a Competencia ---
-            comp_prices = [
-                p for p in competitor_prices
-                if p["check_in_date"] == target_date.isoformat()
-                # Aquí podrías mapear room_type_raw a room_type_id si tienes lógica
-            ]
-            if comp_prices:
-                avg_price = sum(p["price_per_night"] for p in comp_prices if p["price_per_night"]) / len(comp_prices)
-                min_price = min(p["price_per_night"] for p in comp_prices if p["price_per_night"])
+            # Se compara contra las tarifas de la misma clase de habitación (suite con suite)
+            comp_stats, matched = competitor_stats(price_index, target_iso, room_class)
+            if comp_stats:
+                avg_price, min_price = comp_stats
                 # Estrategia: ser 5% más barato que el promedio, pero nunca menos que el mínimo
                 recommended_price = max(min_price, avg_price * (1 - COMPETITOR_UNDERCUT_PCT))
-                reasoning = f"Ajuste por competencia: promedio={avg_price:.2f}, mínimo={min_price:.2f}."
-                recommendation_strength = 0.8
+                rule = competitor_rule(room_class, matched)
+                recommendation_strength = (ROOM_CLASS_FALLBACK_STRENGTH if rule == RULE_COMPETITOR_FALLBACK
+                                           else COMPETITOR_STRENGTH)
+                if fill_row:
+                    result.rule[row, d] = rule
+                    result.comp_avg[row, d] = avg_price
+                    result.comp_min[row, d] = min_price
             else:
                 # --- Regla 3: Precio base ---
                 recommended_price = BASE_PRICES.get(room_type_id, 1000.0)
-                reasoning = "Precio base por falta de datos de competencia."
                 recommendation_strength = 0.5
 
             # --- Regla 2: Impacto de eventos ---
-            events_today = [
-                e for e in detected_events
-                if e["start_date"] <= target_date.isoformat() <= e["end_date"]
-            ]
-            if events_today:
+            event_labels = event_calendar.labels_on(target_iso)
+            if event_labels:
                 # Aplica el mayor impacto de los eventos del día
-                max_impact = max(EVENT_IMPACT_PCT.get(e["estimated_impact"], 0) for e in events_today)
+                max_impact = event_calendar.max_impact_on(target_iso, EVENT_IMPACT_PCT)
                 if max_impact > 0:
-                    old_price = recommended_price
                     recommended_price = recommended_price * (1 + max_impact)
-                    reasoning += f" Incremento por evento(s) de impacto {', '.join(set(e['estimated_impact'] for e in events_today))}."
+                    result.day_labels[d] = event_labels
                     recommendation_strength = 1.0 if max_impact >= 0.1 else 0.9
 
             # --- Regla 4: Mapeo de habitaciones ---
-            # En el MVP, se asume que el mapeo es directo por own_room_types
+            # La clase de cada habitación propia sale de su nombre en own_room_types (ver room_types.py)
 
-            recommendations.append({
-                "hotel_id": hotel_id,
-                "room_type_id": room_type_id,
-                "target_date": target_date.isoformat(),
-                "recommended_price": round(recommended_price, 2),
-                "current_price": None,  # Si tienes integración PMS, pon el precio actual aquí
-                "reasoning": reasoning,
-                "recommendation_strength": recommendation_strength,
-                "status": "Pending Review",
-                "generated_at": datetime.now().isoformat(),
-                "applied_at": None,
-                "user_id": None
-            })
-    return recommendations 
\ No newline at end of file
+            room_prices.append(recommended_price)
+            room_strength.append(recommendation_strength)
+        result.prices[r] = room_prices
+        result.strength[r] = room_strength
+    return result 
\ No newline at end of file
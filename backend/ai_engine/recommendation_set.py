@@ -0,0 +1,181 @@
+import csv
+import io
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Representación compacta de las recomendaciones de un hotel. Ambos motores
+# calculan la rejilla completa (tipo de habitación × fecha), así que se guarda
+# como columnas: precio y fuerza por celda, y la regla aplicada con sus
+# parámetros (promedio y mínimo de competencia) por clase de habitación y día.
+# Los eventos solo dependen del día. El texto de razonamiento se arma al pedirlo
+# y generated_at es uno solo para todo el conjunto. Los diccionarios con el
+# formato de price_recommendations se generan solo al serializar.
+
+# Regla de precio aplicada a una celda
+RULE_BASE = 0                 # precio base, sin datos de competencia
+RULE_COMPETITOR = 1           # competencia de la misma clase (o habitación sin clase reconocida)
+RULE_COMPETITOR_FALLBACK = 2  # toda la competencia del día: no hubo tarifas de la clase
+RULE_NAMES = {RULE_BASE: 'base', RULE_COMPETITOR: 'competitor', RULE_COMPETITOR_FALLBACK: 'competitor_fallback'}
+
+BASE_REASONING = "Precio base por falta de datos de competencia."
+
+EXPORT_COLUMNS = (
+    'hotel_id', 'room_type_id', 'target_date', 'recommended_price', 'recommendation_strength',
+    'rule', 'competitor_avg', 'competitor_min', 'room_class', 'event_labels', 'generated_at',
+)
+
+
+def competitor_rule(room_class: Optional[str], matched: bool) -> int:
+    return RULE_COMPETITOR_FALLBACK if room_class is not None and not matched else RULE_COMPETITOR
+
+
+def render_reasoning(rule: int, avg_price: float, min_price: float, room_class: Optional[str],
+                     event_labels: Tuple[str, ...] = ()) -> str:
+    """
+    Texto de razonamiento de una celda a partir de su regla y parámetros.
+    event_labels viene de EventCalendar.labels_on: sin repetidos y en orden fijo.
+    """
+    if rule == RULE_BASE:
+        text = BASE_REASONING
+    else:
+        if rule == RULE_COMPETITOR_FALLBACK:
+            scope = f" (todas las habitaciones, sin tarifas {room_class})"
+        elif room_class is not None:
+            scope = f" ({room_class})"
+        else:
+            scope = ""
+        text = f"Ajuste por competencia{scope}: promedio={avg_price:.2f}, mínimo={min_price:.2f}."
+    if event_labels:
+        text += f" Incremento por evento(s) de impacto {', '.join(event_labels)}."
+    return text
+
+
+class RecommendationSet:
+    """
+    Recomendaciones de un hotel: precios y fuerza con forma (habitaciones, días) y
+    la regla con sus parámetros con forma (clases, días). room_rows indica la
+    clase (fila) de cada habitación.
+    """
+
+    __slots__ = ('hotel_id', 'room_type_ids', 'room_classes', 'room_rows', 'days', 'prices', 'strength',
+                 'rule', 'comp_avg', 'comp_min', 'day_labels', 'generated_at')
+
+    def __init__(self, hotel_id: str, room_type_ids: List[str], room_classes: Sequence[Optional[str]],
+                 room_rows: Sequence[int], days: List[str], generated_at: Optional[str] = None):
+        rooms, classes, n = len(room_type_ids), len(room_classes), len(days)
+        self.hotel_id = hotel_id
+        self.room_type_ids = list(room_type_ids)
+        self.room_classes = list(room_classes)
+        self.room_rows = np.asarray(room_rows, dtype=np.int32)
+        self.days = days
+        self.prices = np.zeros((rooms, n))
+        self.strength = np.zeros((rooms, n))
+        self.rule = np.full((classes, n), RULE_BASE, dtype=np.uint8)
+        self.comp_avg = np.full((classes, n), np.nan)
+        self.comp_min = np.full((classes, n), np.nan)
+        # Niveles de impacto por día; vacío si los eventos no subieron el precio
+        self.day_labels: List[Tuple[str, ...]] = [()] * n
+        self.generated_at = generated_at or datetime.now().isoformat()
+
+    def __len__(self) -> int:
+        return self.prices.size
+
+    def reasoning(self, room: int, day: int) -> str:
+        row = self.room_rows[room]
+        return render_reasoning(int(self.rule[row, day]), self.comp_avg[row, day], self.comp_min[row, day],
+                                self.room_classes[row], self.day_labels[day])
+
+    def _rounded_prices(self) -> List[List[float]]:
+        # round() de Python por celda, igual que el formato original (np.round puede diferir en el último centavo)
+        return [[round(price, 2) for price in row] for row in self.prices.tolist()]
+
+    def _reasoning_rows(self) -> List[List[str]]:
+        """Textos por clase y día: se arman una vez por clase, no por habitación."""
+        return [
+            [render_reasoning(rule, avg, low, room_class, labels)
+             for rule, avg, low, labels in zip(self.rule[row].tolist(), self.comp_avg[row].tolist(),
+                                               self.comp_min[row].tolist(), self.day_labels)]
+            for row, room_class in enumerate(self.room_classes)
+        ]
+
+    def iter_dicts(self) -> Iterator[Dict]:
+        """Filas con el formato de price_recommendations (habitación por habitación, día por día)."""
+        reasoning = self._reasoning_rows()
+        price_rows = self._rounded_prices()
+        strength_rows = self.strength.tolist()
+        for r, room_type_id in enumerate(self.room_type_ids):
+            room_reasoning = reasoning[self.room_rows[r]]
+            room_prices, room_strength = price_rows[r], strength_rows[r]
+            for d, target_iso in enumerate(self.days):
+                yield {
+                    "hotel_id": self.hotel_id,
+                    "room_type_id": room_type_id,
+                    "target_date": target_iso,
+                    "recommended_price": room_prices[d],
+                    "current_price": None,
+                    "reasoning": room_reasoning[d],
+                    "recommendation_strength": room_strength[d],
+                    "status": "Pending Review",
+                    "generated_at": self.generated_at,
+                    "applied_at": None,
+                    "user_id": None
+                }
+
+    def to_dicts(self) -> List[Dict]:
+        return list(self.iter_dicts())
+
+    def to_columns(self, reasoning: bool = False) -> Dict[str, List]:
+        """Una lista por columna de EXPORT_COLUMNS (y 'reasoning' si se pide), fila por celda."""
+        rooms, n = self.prices.shape
+        rows = self.room_rows.repeat(n)
+        day_positions = np.tile(np.arange(n), rooms)
+        comp_avg = self.comp_avg[rows, day_positions]
+        comp_min = self.comp_min[rows, day_positions]
+        columns = {
+            'hotel_id': [self.hotel_id] * (rooms * n),
+            'room_type_id': [room_type_id for room_type_id in self.room_type_ids for _day in self.days],
+            'target_date': self.days * rooms,
+            'recommended_price': [price for row in self._rounded_prices() for price in row],
+            'recommendation_strength': self.strength.ravel().tolist(),
+            'rule': [RULE_NAMES[rule] for rule in self.rule[rows, day_positions].tolist()],
+            'competitor_avg': [None if np.isnan(value) else round(value, 2) for value in comp_avg.tolist()],
+            'competitor_min': [None if np.isnan(value) else round(value, 2) for value in comp_min.tolist()],
+            'room_class': [self.room_classes[row] for row in rows.tolist()],
+            'event_labels': ['|'.join(sorted(set(self.day_labels[d]))) for d in day_positions.tolist()],
+            'generated_at': [self.generated_at] * (rooms * n),
+        }
+        if reasoning:
+            texts = self._reasoning_rows()
+            columns['reasoning'] = [texts[row][d] for row, d in zip(rows.tolist(), day_positions.tolist())]
+        return columns
+
+    def to_csv(self, reasoning: bool = True) -> str:
+        columns = self.to_columns(reasoning)
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(columns.keys())
+        writer.writerows(zip(*columns.values()))
+        return out.getvalue()
+
+    def packed(self) -> Dict[str, np.ndarray]:
+        """Arreglos empacados (para np.savez o transporte binario) sin una fila por celda."""
+        return {
+            'room_type_ids': np.array(self.room_type_ids),
+            'room_classes': np.array(['' if room_class is None else room_class for room_class in self.room_classes]),
+            'room_rows': self.room_rows,
+            'days': np.array(self.days),
+            'prices': np.array(self._rounded_prices()).reshape(self.prices.shape),
+            'strength': self.strength,
+            'rule': self.rule,
+            'comp_avg': self.comp_avg,
+            'comp_min': self.comp_min,
+            'day_labels': np.array(['|'.join(sorted(set(labels))) for labels in self.day_labels]),
+        }
+
+    def to_npz(self) -> bytes:
+        out = io.BytesIO()
+        np.savez_compressed(out, hotel_id=np.array(self.hotel_id), generated_at=np.array(self.generated_at),
+                            **self.packed())
+        return out.getvalue()
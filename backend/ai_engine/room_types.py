@@ -0,0 +1,60 @@
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+# Clasifica los nombres de habitación (room_type_raw de la competencia y los
+# nombres de own_room_types) en clases comparables, para que el ajuste por
+# competencia compare suites con suites y no con habitaciones estándar. Los
+# scrapes repiten los mismos textos miles de veces, así que la clasificación se
+# memoiza con LRU y cada texto se analiza una sola vez.
+
+ROOM_TYPE_CACHE_SIZE = int(os.getenv('ROOM_TYPE_CACHE_SIZE', '4096'))
+
+# Reglas en orden de prioridad: la primera clase con una frase presente gana
+# ("Deluxe Suite" es suite, "Standard Double" es doble)
+ROOM_CLASS_RULES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ('suite', ('suite', 'suites', 'presidencial', 'presidential', 'penthouse')),
+    ('deluxe', ('deluxe', 'de lujo', 'lujo', 'luxury', 'premium', 'executive', 'ejecutiva', 'ejecutivo',
+                'superior', 'club')),
+    ('family', ('family', 'familiar', 'triple', 'cuadruple', 'quadruple', 'literas', 'bunk')),
+    ('double', ('double', 'doble', 'twin', 'two queen', 'two double', '2 queen', '2 double', 'dos camas',
+                '2 camas', 'queen queen', 'two beds')),
+    ('standard', ('standard', 'estandar', 'king', 'queen', 'sencilla', 'sencillo', 'single', 'individual', 'basic', 'basica',
+                  'economy', 'economica', 'budget', 'classic', 'clasica')),
+)
+ROOM_CLASSES = tuple(room_class for room_class, _phrases in ROOM_CLASS_RULES)
+
+
+def _fold(text: str) -> str:
+    """Minúsculas sin acentos, con espacios en los extremos para buscar frases completas."""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+    return ' ' + re.sub(r'[^a-z0-9]+', ' ', text).strip() + ' '
+
+
+@lru_cache(maxsize=ROOM_TYPE_CACHE_SIZE)
+def _classify_cached(raw: str) -> Optional[str]:
+    folded = _fold(raw)
+    for room_class, phrases in ROOM_CLASS_RULES:
+        if any(f' {phrase} ' in folded for phrase in phrases):
+            return room_class
+    return None
+
+
+def classify_room_type(raw: Optional[str]) -> Optional[str]:
+    """Clase de habitación ('suite', 'deluxe', 'family', 'double', 'standard') o None si no se reconoce."""
+    return _classify_cached(raw) if raw else None
+
+
+def classify_cache_info():
+    return _classify_cached.cache_info()
+
+
+def room_class_counts(raw_names: Iterable[Optional[str]]) -> Dict[Optional[str], int]:
+    """Cuántos textos caen en cada clase (None = no reconocidos); útil para revisar las reglas."""
+    counts: Dict[Optional[str], int] = {}
+    for raw in raw_names:
+        room_class = classify_room_type(raw)
+        counts[room_class] = counts.get(room_class, 0) + 1
+    return counts
@@ -0,0 +1,167 @@
+from datetime import date
+from typing import Iterable, List, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from backend.db.market_data import fetch_market_data
+from backend.ai_engine.price_index import CompetitorPriceIndex, EventCalendar
+from backend.ai_engine.price_optimizer import (
+    BASE_PRICES,
+    COMPETITOR_STRENGTH,
+    COMPETITOR_UNDERCUT_PCT,
+    EVENT_IMPACT_PCT,
+    ROOM_CLASS_FALLBACK_STRENGTH,
+    competitor_stats,
+    empty_recommendation_set,
+    pricing_window,
+    room_class_rows,
+)
+from backend.ai_engine.recommendation_set import (
+    RULE_BASE,
+    RULE_COMPETITOR,
+    RULE_COMPETITOR_FALLBACK,
+    RecommendationSet,
+)
+from backend.metrics.registry import timed
+
+# Motor alterno al de reglas: calcula la matriz completa (tipo de habitación × fecha)
+# con arreglos de NumPy y la entrega como RecommendationSet; los diccionarios solo
+# se construyen al serializar.
+
+
+def build_market_arrays(
+    price_index: CompetitorPriceIndex,
+    event_calendar: EventCalendar,
+    days: List[str],
+    impact_pct: Dict[str, float] = EVENT_IMPACT_PCT,
+    room_classes: Sequence[Optional[str]] = (None,)
+) -> Dict[str, np.ndarray]:
+    """
+    Resume el mercado por día: promedio y mínimo de competencia (NaN si no hay datos),
+    con una fila por clase de habitación, si esa fila usó tarifas de la misma clase
+    y el mayor impacto de eventos (compartido por todas las clases).
+    """
+    n = len(days)
+    comp_mean = np.full((len(room_classes), n), np.nan)
+    comp_min = np.full((len(room_classes), n), np.nan)
+    matched = np.zeros((len(room_classes), n), dtype=bool)
+    max_impact = np.zeros(n)
+    for i, day in enumerate(days):
+        for row, room_class in enumerate(room_classes):
+            stats, matched[row, i] = competitor_stats(price_index, day, room_class)
+            if stats:
+                comp_mean[row, i], comp_min[row, i] = stats
+        max_impact[i] = event_calendar.max_impact_on(day, impact_pct)
+    return {"room_classes": list(room_classes), "comp_mean": comp_mean, "comp_min": comp_min,
+            "matched": matched, "max_impact": max_impact}
+
+
+def compute_price_matrix(
+    room_type_ids: List[str],
+    market: Dict[str, np.ndarray],
+    undercut_pct: float = COMPETITOR_UNDERCUT_PCT,
+    base_prices: Dict[str, float] = BASE_PRICES,
+    room_rows: Optional[Sequence[int]] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Devuelve (precios, fuerza) con forma (habitaciones, días) aplicando las mismas
+    reglas que get_price_recommendations. room_rows indica la fila del mercado
+    (clase de habitación) de cada habitación; por defecto todas usan la primera.
+    """
+    rows = np.zeros(len(room_type_ids), dtype=int) if room_rows is None else np.asarray(room_rows, dtype=int)
+    comp_mean = market["comp_mean"][rows]
+    comp_min = market["comp_min"][rows]
+    has_comp = ~np.isnan(comp_mean)
+    comp_price = np.maximum(comp_min, comp_mean * (1 - undercut_pct))
+    base = np.array([base_prices.get(room_type_id, 1000.0) for room_type_id in room_type_ids])
+
+    prices = np.where(has_comp, comp_price, base[:, None])
+    room_classes = market["room_classes"]
+    # Sin tarifas de la misma clase la fuerza baja, igual que en el motor de reglas
+    fallback = np.array([room_classes[row] is not None for row in rows], dtype=bool)[:, None] & ~market["matched"][rows]
+    strength = np.where(has_comp, np.where(fallback, ROOM_CLASS_FALLBACK_STRENGTH, COMPETITOR_STRENGTH), 0.5)
+
+    impact = market["max_impact"]
+    has_impact = impact > 0
+    prices = np.where(has_impact[None, :], prices * (1 + impact)[None, :], prices)
+    strength = np.where(has_impact[None, :], np.where(impact >= 0.1, 1.0, 0.9)[None, :], strength)
+    return prices, strength
+
+
+def build_recommendation_set(
+    hotel_id: str,
+    room_type_ids: List[str],
+    days: List[str],
+    prices: np.ndarray,
+    strength: np.ndarray,
+    market: Dict[str, np.ndarray],
+    event_calendar: EventCalendar,
+    room_rows: Optional[Sequence[int]] = None
+) -> RecommendationSet:
+    """
+    Empaca la matriz y el mercado en un RecommendationSet: la regla y sus parámetros
+    se guardan por clase de habitación y día, y el texto se arma al serializar.
+    """
+    rows = [0] * len(room_type_ids) if room_rows is None else list(room_rows)
+    result = RecommendationSet(hotel_id, room_type_ids, market["room_classes"], rows, days)
+    result.prices[:] = prices
+    result.strength[:] = strength
+    has_comp = ~np.isnan(market["comp_mean"])
+    fallback = np.array([room_class is not None for room_class in market["room_classes"]], dtype=bool)[:, None] & ~market["matched"]
+    result.rule[:] = np.where(has_comp, np.where(fallback, RULE_COMPETITOR_FALLBACK, RULE_COMPETITOR), RULE_BASE)
+    result.comp_avg[:] = market["comp_mean"]
+    result.comp_min[:] = market["comp_min"]
+    for i in np.flatnonzero(market["max_impact"] > 0).tolist():
+        result.day_labels[i] = event_calendar.labels_on(days[i])
+    return result
+
+
+def get_price_recommendations_vectorized(
+    supabase,
+    hotel_id: str,
+    hotel_coords: Tuple[float, float],
+    own_room_types: Dict[str, str],
+    days_in_advance: int = 60,
+    target_dates: Optional[Iterable[str]] = None,
+    compact: bool = False
+) -> Union[List[Dict], RecommendationSet]:
+    """
+    Misma firma y salida que get_price_recommendations, calculada con NumPy.
+    """
+    days, start_date, end_date = pricing_window(date.today(), days_in_advance, target_dates)
+    if not days:
+        return empty_recommendation_set(hotel_id, own_room_types) if compact else []
+    price_index, detected_events = fetch_market_data(supabase, hotel_coords, start_date, end_date, radius_km=20)
+
+    event_calendar = EventCalendar(detected_events, days)
+    recommendations = recommend_from_market_vectorized_compact(hotel_id, own_room_types, days, price_index, event_calendar)
+    return recommendations if compact else recommendations.to_dicts()
+
+
+def recommend_from_market_vectorized(
+    hotel_id: str,
+    own_room_types: Dict[str, str],
+    days: List[str],
+    price_index: CompetitorPriceIndex,
+    event_calendar: EventCalendar
+) -> List[Dict]:
+    """Misma salida que recommend_from_market, sobre índices ya construidos."""
+    return recommend_from_market_vectorized_compact(hotel_id, own_room_types, days, price_index, event_calendar).to_dicts()
+
+
+@timed('pricing')
+def recommend_from_market_vectorized_compact(
+    hotel_id: str,
+    own_room_types: Dict[str, str],
+    days: List[str],
+    price_index: CompetitorPriceIndex,
+    event_calendar: EventCalendar
+) -> RecommendationSet:
+    """Misma salida que recommend_from_market_compact, sobre índices ya construidos."""
+    # Una fila de mercado por clase de habitación distinta, no por habitación
+    room_classes, room_rows = room_class_rows(own_room_types)
+    market = build_market_arrays(price_index, event_calendar, days, room_classes=room_classes)
+
+    room_type_ids = list(own_room_types.values())
+    prices, strength = compute_price_matrix(room_type_ids, market, room_rows=room_rows)
+    return build_recommendation_set(hotel_id, room_type_ids, days, prices, strength, market, event_calendar, room_rows)
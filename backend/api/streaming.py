@@ -0,0 +1,69 @@
+import json
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Serialización incremental de los datos del dashboard: NDJSON (un registro por
+# línea) o JSON por partes, ambos generados registro por registro sin armar el
+# payload completo en memoria. Las listas de eventos se emiten una sola vez por
+# fuente en lugar de repetirse en 'events'.
+
+STREAM_FORMATS = ('ndjson', 'stream')
+
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    """'nombre,precio_promedio' -> ['nombre', 'precio_promedio'] (None = todos los campos)."""
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    return fields or None
+
+
+def project(record: Dict, fields: Optional[List[str]]) -> Dict:
+    if fields is None:
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def ndjson_lines(
+    sections: Iterable[Tuple[str, str, Iterable[Dict]]],
+    fields: Optional[List[str]] = None,
+    header: Optional[Dict] = None,
+    footer: Optional[Dict] = None
+) -> Iterator[str]:
+    """
+    sections: (nombre de la sección, tipo de registro, registros).
+    Emite {"type": "metadata"} primero, luego {"type": <tipo>, "source": <sección>, "data": {...}}
+    por registro y al final {"type": "analytics"} si se da footer.
+    """
+    if header is not None:
+        yield _dumps({'type': 'metadata', 'data': header}) + '\n'
+    for section, record_type, records in sections:
+        for record in records:
+            yield _dumps({'type': record_type, 'source': section, 'data': project(record, fields)}) + '\n'
+    if footer is not None:
+        yield _dumps({'type': 'analytics', 'data': footer}) + '\n'
+
+
+def json_chunks(
+    sections: Iterable[Tuple[str, str, Iterable[Dict]]],
+    fields: Optional[List[str]] = None,
+    extra: Optional[Dict] = None
+) -> Iterator[str]:
+    """Un objeto JSON {sección: [registros], ...extra} emitido por partes."""
+    yield '{'
+    first_section = True
+    for section, _record_type, records in sections:
+        yield ('' if first_section else ',') + _dumps(section) + ':['
+        first_section = False
+        first_record = True
+        for record in records:
+            yield ('' if first_record else ',') + _dumps(project(record, fields))
+            first_record = False
+        yield ']'
+    for key, value in (extra or {}).items():
+        yield ('' if first_section else ',') + _dumps(key) + ':' + _dumps(value)
+        first_section = False
+    yield '}'
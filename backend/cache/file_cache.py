@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional
+
+from backend.metrics.registry import span
+
+# Caché en memoria de los JSON de resultados/. Cada archivo se vuelve a leer solo
+# cuando cambia su mtime o tamaño; mientras tanto se sirven los datos ya parseados,
+# los bytes originales y un ETag estable para responder 304 a los dashboards.
+# Con resolve (p. ej. VersionedResultStore.resolve) se lee la última versión
+# publicada del archivo en lugar del archivo fijo.
+
+
+def hotel_price_stats(hotels: List[Dict]) -> Dict:
+    """Total, promedio, mínimo y máximo de precio_promedio en una sola pasada."""
+    total = 0
+    price_sum = 0
+    min_price = max_price = None
+    for hotel in hotels:
+        price = hotel.get('precio_promedio', 0)
+        total += 1
+        price_sum += price
+        if min_price is None or price < min_price:
+            min_price = price
+        if max_price is None or price > max_price:
+            max_price = price
+    if not total:
+        return {'total_hotels': 0, 'average_price': 0, 'min_price': 0, 'max_price': 0}
+    return {
+        'total_hotels': total,
+        'average_price': price_sum / total,
+        'min_price': min_price,
+        'max_price': max_price,
+    }
+
+
+class JsonFileCache:
+    def __init__(self, resolve: Optional[Callable[[str], str]] = None):
+        self._resolve = resolve
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str, analyze: Optional[Callable] = None) -> Optional[Dict]:
+        """
+        Devuelve {'data', 'body', 'etag', 'analytics'} para el archivo, o None si no existe.
+        'analytics' es el resultado de analyze(data), calculado una vez por versión del archivo.
+        """
+        real_path = self._resolve(path) if self._resolve is not None else path
+        try:
+            stat = os.stat(real_path)
+        except OSError:
+            with self._lock:
+                self._entries.pop(path, None)
+            return None
+        signature = (real_path, stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry['signature'] == signature:
+                self.hits += 1
+                if analyze is not None and entry['analyzer'] is not analyze:
+                    entry['analytics'] = analyze(entry['data'])
+                    entry['analyzer'] = analyze
+                return entry
+
+        with span('file_read'):
+            with open(real_path, 'rb') as f:
+                body = f.read()
+            entry = {
+                'signature': signature,
+                'data': json.loads(body.decode('utf-8')),
+                'body': body,
+                'etag': hashlib.blake2b(body, digest_size=12).hexdigest(),
+                'analytics': None,
+                'analyzer': None,
+            }
+        if analyze is not None:
+            entry['analytics'] = analyze(entry['data'])
+            entry['analyzer'] = analyze
+        with self._lock:
+            self.misses += 1
+            self._entries[path] = entry
+        return entry
+
+    def load(self, path: str, default=None):
+        """Datos parseados del archivo, o default si no existe."""
+        entry = self.get(path)
+        return entry['data'] if entry is not None else default
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+
+
+class ResponseCache:
+    """
+    Guarda cuerpos de respuesta ya serializados (o cualquier valor derivado) por
+    nombre, junto con el ETag de los datos de los que se derivan. Se reconstruyen
+    solo si ese ETag cambia.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bodies: Dict[str, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, name: str, etag: str, build: Callable[[], object]):
+        with self._lock:
+            cached = self._bodies.get(name)
+            if cached is not None and cached[0] == etag:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+        with span('serialize'):
+            body = build()
+        with self._lock:
+            self._bodies[name] = (etag, body)
+        return body
+
+
+def combine_etags(*etags: Optional[str]) -> str:
+    """ETag de una respuesta compuesta por varios archivos (None = archivo ausente)."""
+    return hashlib.blake2b('|'.join(etag or '-' for etag in etags).encode(), digest_size=12).hexdigest()
@@ -0,0 +1,185 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Versiones inmutables de los archivos de resultados/. Cada scrape publica una
+# versión nueva en resultados/versions/<nombre>/ (se escribe aparte y se renombra)
+# y después reemplaza de forma atómica el puntero LATEST de ese nombre. Los
+# lectores resuelven "la última versión" leyendo el puntero, así que nunca ven un
+# archivo a medio escribir y una versión que ya leyeron no cambia debajo de ellos.
+# El archivo fijo (resultados/<nombre>.json) se sigue actualizando, también con
+# reemplazo atómico, para quien lo lea directamente.
+
+RESULTS_DIR = 'resultados'
+VERSIONS_DIRNAME = 'versions'
+POINTER_FILE = 'LATEST'
+STAGING_PREFIX = '.staging-'
+VERSIONS_KEEP = int(os.getenv('RESULT_VERSIONS_KEEP', '5'))
+# Una versión reemplazada se conserva al menos este tiempo por si un lector ya la resolvió
+# (al reemplazarla se le actualiza el mtime, así que se cuenta desde el reemplazo)
+VERSIONS_MIN_AGE = float(os.getenv('RESULT_VERSIONS_MIN_AGE_SECONDS', '300'))
+STAGING_MAX_AGE = 24 * 3600
+
+
+def _atomic_write(path: str, body: bytes) -> None:
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=STAGING_PREFIX, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class VersionedResultStore:
+    def __init__(self, base_dir: str = RESULTS_DIR, keep: int = VERSIONS_KEEP, min_age: float = VERSIONS_MIN_AGE):
+        self.base_dir = base_dir
+        self.keep = max(keep, 1)
+        self.min_age = min_age
+        self._lock = threading.Lock()
+        self._pointers: Dict[str, tuple] = {}  # directorio -> (firma del puntero, versión)
+        self.published = 0
+        self.collected = 0
+
+    def _versions_dir(self, path: str) -> Optional[str]:
+        """resultados/versions/<nombre>/ para un archivo de resultados/, o None si está fuera."""
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.base_dir):
+            return None
+        name = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.base_dir, VERSIONS_DIRNAME, name)
+
+    def staging_path(self, path: str) -> str:
+        """Archivo temporal único (en el mismo disco que las versiones) para que un scrape escriba."""
+        directory = self._versions_dir(path) or os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f'{STAGING_PREFIX}{uuid.uuid4().hex}.json')
+
+    def latest_version(self, path: str) -> Optional[str]:
+        """Ruta de la última versión publicada del archivo, o None si no tiene versiones."""
+        directory = self._versions_dir(path)
+        if directory is None:
+            return None
+        pointer = os.path.join(directory, POINTER_FILE)
+        try:
+            stat = os.stat(pointer)
+        except OSError:
+            return None
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        cached = self._pointers.get(directory)
+        if cached is not None and cached[0] == signature:
+            return os.path.join(directory, cached[1])
+        try:
+            with open(pointer, 'r', encoding='utf-8') as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+        self._pointers[directory] = (signature, version)
+        return os.path.join(directory, version)
+
+    def resolve(self, path: str) -> str:
+        """Lo que deben leer los lectores: la última versión, o el archivo fijo si aún no hay versiones."""
+        return self.latest_version(path) or path
+
+    def publish(self, path: str, produced_file: str) -> str:
+        """
+        Publica lo que escribió un scrape (produced_file) como versión nueva de path.
+        Lanza ValueError si no es JSON válido (p. ej. un archivo a medio escribir).
+        Devuelve la ruta de la versión.
+        """
+        with open(produced_file, 'rb') as f:
+            body = f.read()
+        json.loads(body.decode('utf-8'))
+        directory = self._versions_dir(path)
+        if directory is None:
+            if os.path.abspath(produced_file) != os.path.abspath(path):
+                _atomic_write(path, body)
+            return path
+        os.makedirs(directory, exist_ok=True)
+        version = f'{datetime.now():%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:6]}.json'
+        version_path = os.path.join(directory, version)
+        if os.path.basename(produced_file).startswith(STAGING_PREFIX):
+            os.replace(produced_file, version_path)
+        else:
+            _atomic_write(version_path, body)
+
+        with self._lock:
+            # Dos scrapes que terminan juntos: el puntero solo avanza a una versión más nueva
+            current = self.latest_version(path)
+            if current is None or os.path.basename(current) < version:
+                if current is not None:
+                    # Marca la hora de reemplazo antes de mover el puntero: collect() no
+                    # borra la actual, y desde aquí empieza a contar VERSIONS_MIN_AGE
+                    try:
+                        os.utime(current)
+                    except OSError:
+                        pass
+                _atomic_write(os.path.join(directory, POINTER_FILE), version.encode('utf-8'))
+                if os.path.abspath(produced_file) != os.path.abspath(path):
+                    _atomic_write(path, body)
+            self.published += 1
+        self.collect(path)
+        return version_path
+
+    def versions(self, path: str) -> List[str]:
+        """Nombres de las versiones publicadas, de la más antigua a la más nueva."""
+        directory = self._versions_dir(path)
+        if directory is None or not os.path.isdir(directory):
+            return []
+        return sorted(name for name in os.listdir(directory)
+                      if name.endswith('.json') and not name.startswith(STAGING_PREFIX))
+
+    def collect(self, path: str) -> int:
+        """
+        Borra las versiones viejas: se conservan las VERSIONS_KEEP más nuevas, la
+        actual y las reemplazadas (o escritas, si nunca fueron la actual) hace menos
+        de VERSIONS_MIN_AGE. También limpia archivos temporales abandonados por un
+        proceso que murió a medio scrape.
+        """
+        directory = self._versions_dir(path)
+        if directory is None or not os.path.isdir(directory):
+            return 0
+        now = time.time()
+        current = self.latest_version(path)
+        current = os.path.basename(current) if current else None
+        removed = 0
+        for name in self.versions(path)[:-self.keep]:
+            version_path = os.path.join(directory, name)
+            try:
+                if name != current and now - os.path.getmtime(version_path) >= self.min_age:
+                    os.remove(version_path)
+                    removed += 1
+            except OSError:
+                pass
+        for name in os.listdir(directory):
+            staging = os.path.join(directory, name)
+            try:
+                if name.startswith(STAGING_PREFIX) and now - os.path.getmtime(staging) >= STAGING_MAX_AGE:
+                    os.remove(staging)
+            except OSError:
+                pass
+        with self._lock:
+            self.collected += removed
+        return removed
+
+    def stats(self, paths: List[str]) -> Dict:
+        files = {}
+        for path in paths:
+            latest = self.latest_version(path)
+            files[path] = {
+                'latest': os.path.basename(latest) if latest else None,
+                'versions': self.versions(path),
+            }
+        return {'published': self.published, 'collected': self.collected, 'keep': self.keep,
+                'min_age_s': self.min_age, 'files': files}
+
+
+# Instancia compartida por el orquestador de scraping y los lectores del backend
+result_store = VersionedResultStore()
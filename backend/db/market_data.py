@@ -0,0 +1,195 @@
+import asyncio
+import inspect
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from backend.ai_engine.price_index import CompetitorPriceIndex
+from backend.db.supabase_client import DETECTED_EVENT_COLUMNS
+from backend.geo.distance import bounding_box, haversine_km
+from backend.metrics.registry import span
+
+# Acceso asíncrono a los datos de mercado que necesita el optimizador de precios.
+# competitor_prices y detected_events se consultan al mismo tiempo, cada una por
+# páginas con paginación por llave (id > último id visto) y solo con las columnas
+# que usan las reglas. Las filas de competencia se agregan al índice conforme
+# llegan, así que en memoria solo hay una página a la vez por consulta.
+#
+# Cada tramo de fechas pagina en serie, así que la latencia crece con las páginas
+# por tramo. Por eso primero se cuentan las filas de competencia del rango (una
+# consulta con count) y el rango se parte en tantos tramos como páginas haga falta
+# (hasta MARKET_MAX_PARTITIONS), para que cada tramo sea cerca de una página. La
+# latencia queda en ~2 viajes (conteo + una página) mientras las filas quepan en
+# MARKET_MAX_PARTITIONS páginas; pasado eso vuelve a crecer con las páginas por
+# tramo. Los tramos asumen filas repartidas parejo entre días: un día con muchas
+# más filas hace que su tramo pida más páginas. Si el cliente no devuelve el
+# conteo se usan MARKET_PARTITIONS tramos fijos.
+#
+# Con el cliente síncrono de supabase-py cada página se ejecuta en un pool de
+# hilos compartido; si el cliente es asíncrono se espera su execute() directamente.
+
+# 1000 es también el máximo de filas por respuesta que Supabase devuelve por defecto
+MARKET_PAGE_SIZE = int(os.getenv('MARKET_PAGE_SIZE', '1000'))
+MARKET_PARTITIONS = int(os.getenv('MARKET_PARTITIONS', '4'))
+MARKET_FETCH_WORKERS = int(os.getenv('MARKET_FETCH_WORKERS', '16'))
+# Un hilo del pool queda para la consulta de eventos
+MARKET_MAX_PARTITIONS = int(os.getenv('MARKET_MAX_PARTITIONS', str(max(1, MARKET_FETCH_WORKERS - 1))))
+
+# Compartido entre llamadas: asyncio.run crearía un pool nuevo en cada una
+_fetch_pool = ThreadPoolExecutor(max_workers=MARKET_FETCH_WORKERS, thread_name_prefix='market-fetch')
+
+# Columnas de competitor_prices que usa CompetitorPriceIndex (id para paginar)
+COMPETITOR_PRICE_COLUMNS = "id,check_in_date,price_per_night,room_type_raw"
+
+
+async def _execute(query, table: str):
+    with span('db_fetch'):
+        if inspect.iscoroutinefunction(query.execute):
+            response = await query.execute()
+        else:
+            response = await asyncio.get_running_loop().run_in_executor(_fetch_pool, query.execute)
+    if hasattr(response, 'error') and response.error:
+        raise Exception(f"Error fetching {table}: {response.error}")
+    return response
+
+
+async def _execute_page(query, table: str) -> List[Dict]:
+    response = await _execute(query, table)
+    return response.data if hasattr(response, 'data') else response
+
+
+async def count_rows(supabase, table: str, apply_filters: Callable) -> Optional[int]:
+    """Filas que cumplen apply_filters(query) según count="exact", o None si el cliente no lo soporta."""
+    try:
+        query = apply_filters(supabase.table(table).select("id", count="exact")).limit(1)
+    except TypeError:
+        return None
+    return getattr(await _execute(query, table), 'count', None)
+
+
+async def stream_rows(supabase, table: str, columns: str, apply_filters: Callable,
+                      page_size: int = MARKET_PAGE_SIZE) -> AsyncIterator[Dict]:
+    """
+    Filas de la tabla que cumplen apply_filters(query), página por página en orden de id.
+    Cada página pide las filas con id mayor al último de la anterior (sin offset).
+    """
+    last_id = None
+    while True:
+        query = apply_filters(supabase.table(table).select(columns))
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = await _execute_page(query.order("id").limit(page_size), table)
+        for row in rows:
+            yield row
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+def _check_in_between(start_date: date, end_date: date) -> Callable:
+    return lambda query: query.gte("check_in_date", start_date.isoformat()).lte("check_in_date", end_date.isoformat())
+
+
+def stream_competitor_prices(supabase, start_date: date, end_date: date,
+                             page_size: int = MARKET_PAGE_SIZE) -> AsyncIterator[Dict]:
+    return stream_rows(supabase, "competitor_prices", COMPETITOR_PRICE_COLUMNS,
+                       _check_in_between(start_date, end_date), page_size)
+
+
+def stream_detected_events_in_box(supabase, start_date: date, end_date: date, box: Tuple[float, float, float, float],
+                                  page_size: int = MARKET_PAGE_SIZE) -> AsyncIterator[Dict]:
+    """Eventos que se traslapan con [start_date, end_date] dentro de la caja (min_lat, max_lat, min_lon, max_lon)."""
+    min_lat, max_lat, min_lon, max_lon = box
+    return stream_rows(
+        supabase, "detected_events", DETECTED_EVENT_COLUMNS,
+        lambda query: (query.lte("start_date", end_date.isoformat()).gte("end_date", start_date.isoformat())
+                       .gte("latitude", min_lat).lte("latitude", max_lat)
+                       .gte("longitude", min_lon).lte("longitude", max_lon)),
+        page_size
+    )
+
+
+def partitions_for(rows: Optional[int], page_size: int = MARKET_PAGE_SIZE,
+                   max_partitions: int = MARKET_MAX_PARTITIONS) -> int:
+    """Tramos para que cada uno sea cerca de una página (MARKET_PARTITIONS si no hay conteo)."""
+    if rows is None:
+        return MARKET_PARTITIONS
+    return max(1, min(max_partitions, -(-rows // max(page_size, 1))))
+
+
+def split_date_range(start_date: date, end_date: date, parts: int,
+                     min_days: int = 1) -> List[Tuple[date, date]]:
+    """Tramos contiguos y sin traslape que cubren [start_date, end_date], de al menos min_days días."""
+    total_days = (end_date - start_date).days + 1
+    parts = max(1, min(parts, total_days // max(min_days, 1)))
+    ranges = []
+    for i in range(parts):
+        first = start_date + timedelta(days=total_days * i // parts)
+        last = start_date + timedelta(days=total_days * (i + 1) // parts - 1)
+        ranges.append((first, last))
+    return ranges
+
+
+async def load_market_async(
+    supabase,
+    start_date: date,
+    end_date: date,
+    box: Tuple[float, float, float, float],
+    hotel_coords: Optional[Tuple[float, float]] = None,
+    radius_km: float = 20,
+    page_size: int = MARKET_PAGE_SIZE,
+    partitions: Optional[int] = None
+) -> Dict:
+    """
+    Consulta ambas tablas en paralelo y devuelve {'price_index', 'competitor_rows', 'events'}.
+    Con hotel_coords los eventos se filtran a radius_km (haversine) y llevan distance_to_hotel_km.
+    Sin partitions, los tramos de competencia salen del conteo de filas (partitions_for).
+    """
+    price_index = CompetitorPriceIndex()
+
+    async def index_prices(first: date, last: date) -> int:
+        # Todas las corrutinas corren en el mismo hilo: agregan al índice sin lock
+        rows = 0
+        async for row in stream_competitor_prices(supabase, first, last, page_size):
+            price_index.add(row)
+            rows += 1
+        return rows
+
+    async def collect_events():
+        events = []
+        async for event in stream_detected_events_in_box(supabase, start_date, end_date, box, page_size):
+            if hotel_coords is not None:
+                distance = haversine_km(hotel_coords[0], hotel_coords[1], event["latitude"], event["longitude"])
+                if distance > radius_km:
+                    continue
+                event["distance_to_hotel_km"] = round(distance, 2)
+            events.append(event)
+        return events
+
+    async def collect_prices() -> int:
+        parts = partitions
+        if parts is None:
+            expected = await count_rows(supabase, "competitor_prices", _check_in_between(start_date, end_date))
+            parts = partitions_for(expected, page_size)
+        ranges = split_date_range(start_date, end_date, parts)
+        return sum(await asyncio.gather(*(index_prices(first, last) for first, last in ranges)))
+
+    rows, events = await asyncio.gather(collect_prices(), collect_events())
+    return {'price_index': price_index, 'competitor_rows': rows, 'events': events}
+
+
+def load_market(supabase, start_date: date, end_date: date, box: Tuple[float, float, float, float],
+                hotel_coords: Optional[Tuple[float, float]] = None, radius_km: float = 20,
+                page_size: int = MARKET_PAGE_SIZE, partitions: Optional[int] = None) -> Dict:
+    """Versión síncrona de load_market_async para el código de Flask y los pools de hilos."""
+    return asyncio.run(load_market_async(supabase, start_date, end_date, box, hotel_coords, radius_km,
+                                         page_size, partitions))
+
+
+def fetch_market_data(supabase, hotel_coords: Tuple[float, float], start_date: date, end_date: date,
+                      radius_km: float = 20) -> Tuple[CompetitorPriceIndex, List[Dict]]:
+    """Índice de competencia del rango y eventos a radius_km del hotel, con ambas consultas en paralelo."""
+    market = load_market(supabase, start_date, end_date, bounding_box(*hotel_coords, radius_km),
+                         hotel_coords, radius_km)
+    return market['price_index'], market['events']
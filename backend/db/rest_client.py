@@ -0,0 +1,180 @@
+import base64
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from backend.metrics.registry import span
+
+# Cliente REST de Supabase para los endpoints de paso (/api/events, /api/hotels):
+# una sesión HTTP compartida con keep-alive y reintentos, caché TTL + LRU por
+# consulta, unión de consultas idénticas concurrentes y paginación en el servidor.
+
+REST_CACHE_TTL = float(os.getenv('SUPABASE_REST_CACHE_TTL', '30'))
+REST_CACHE_SIZE = int(os.getenv('SUPABASE_REST_CACHE_SIZE', '256'))
+REST_TIMEOUT = float(os.getenv('SUPABASE_REST_TIMEOUT', '15'))
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def build_session(retries: int = 3, backoff: float = 0.3, pool_size: int = 10) -> requests.Session:
+    """Sesión con pool de conexiones y reintentos con backoff para GET."""
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET'])
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class TTLCache:
+    """Caché LRU acotada cuyas entradas expiran después de ttl segundos."""
+
+    def __init__(self, ttl: float = REST_CACHE_TTL, maxsize: int = REST_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def encode_cursor(row: Dict, order_column: str) -> str:
+    raw = json.dumps([row.get(order_column), row.get('id')]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, object]:
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError('Cursor inválido')
+    if value is None:
+        raise ValueError('Cursor inválido')
+    return value, row_id
+
+
+class SupabaseRestClient:
+    def __init__(self, url: str, key: str, session: Optional[requests.Session] = None, cache: Optional[TTLCache] = None):
+        self.url = url
+        self.key = key
+        self.session = session or build_session()
+        self.cache = cache or TTLCache()
+        self._in_flight: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _headers(self) -> Dict[str, str]:
+        return {'apikey': self.key, 'Authorization': f'Bearer {self.key}'}
+
+    def fetch(self, table: str, params: List[Tuple[str, str]]) -> Tuple[int, object]:
+        """
+        GET a /rest/v1/<table> y devuelve (status_code, json). Las respuestas 200 se
+        guardan en la caché; si otra petición idéntica está en curso se espera su resultado.
+        """
+        key = table + '?' + '&'.join(f'{k}={v}' for k, v in params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return 200, cached
+
+        with self._lock:
+            waiter = self._in_flight.get(key)
+            leader = waiter is None
+            if leader:
+                waiter = self._in_flight[key] = {'done': threading.Event(), 'result': None, 'error': None}
+        if not leader:
+            waiter['done'].wait()
+            if waiter['error'] is not None:
+                raise waiter['error']
+            return waiter['result']
+
+        try:
+            with span('db_fetch'):
+                response = self.session.get(f'{self.url}/rest/v1/{table}', params=params,
+                                            headers=self._headers(), timeout=REST_TIMEOUT)
+            if response.status_code == 200:
+                result = (200, response.json())
+                self.cache.set(key, result[1])
+            else:
+                result = (response.status_code, None)
+            waiter['result'] = result
+            return result
+        except Exception as e:
+            waiter['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            waiter['done'].set()
+
+    def fetch_page(
+        self,
+        table: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        offset: Optional[int] = None,
+        cursor: Optional[str] = None,
+        order_column: str = 'created_at',
+        select: str = '*'
+    ) -> Tuple[int, Dict]:
+        """
+        Una página ordenada por order_column descendente (id como desempate).
+        Con cursor se usa paginación por llave (keyset); sin él, limit/offset.
+        Devuelve (status_code, {'rows', 'next_cursor', 'next_offset'}).
+        Lanza ValueError si offset es negativo.
+        """
+        if offset is not None and int(offset) < 0:
+            raise ValueError('offset debe ser mayor o igual a 0')
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        params = [('select', select), ('order', f'{order_column}.desc,id.desc'), ('limit', str(limit))]
+        if cursor:
+            value, row_id = decode_cursor(cursor)
+            params.append(('or', f'({order_column}.lt."{value}",and({order_column}.eq."{value}",id.lt."{row_id}"))'))
+        elif offset:
+            params.append(('offset', str(int(offset))))
+
+        status, rows = self.fetch(table, params)
+        if status != 200:
+            return status, {'rows': None, 'next_cursor': None, 'next_offset': None}
+        full_page = len(rows) == limit
+        # En orden descendente PostgREST pone los nulos primero: si la página termina en
+        # una fila sin order_column (o la proyección no lo incluye) no hay cursor posible
+        # y se sigue por offset. Con cursor ya no llegan nulos (lt/eq los excluye).
+        keyset = full_page and rows[-1].get(order_column) is not None
+        return 200, {
+            'rows': rows,
+            'next_cursor': encode_cursor(rows[-1], order_column) if keyset else None,
+            'next_offset': (offset or 0) + limit if full_page and not cursor else None,
+        }
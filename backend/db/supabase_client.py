@@ -1,9 +1,14 @@
 from datetime import date
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Tuple
 
+from backend.geo.distance import bounding_box, haversine_km
+from backend.metrics.registry import timed
+
 # Se asume que la instancia global 'supabase' está en backend_server.py
 # Puedes importar supabase aquí si es global, o pasarla como argumento a las funciones.
 
+@timed('db_fetch')
 def fetch_competitor_prices_for_range(supabase, start_date: date, end_date: date) -> List[Dict]:
     """
     Obtiene precios de la competencia para el rango de fechas dado.
@@ -19,23 +24,81 @@ def fetch_competitor_prices_for_range(supabase, start_date: date, end_date: date
         raise Exception(f"Error fetching competitor prices: {response.error}")
     return response.data if hasattr(response, 'data') else response
 
-def fetch_detected_events_for_range(supabase, hotel_coords: Tuple[float, float], start_date: date, end_date: date, radius_km: int = 20) -> List[Dict]:
+# Columnas de detected_events que necesitan el filtro espacial y las reglas de precios
+DETECTED_EVENT_COLUMNS = "id,start_date,end_date,estimated_impact,latitude,longitude"
+
+@timed('db_fetch')
+def fetch_detected_events_in_box(supabase, start_date: date, end_date: date, box: Tuple[float, float, float, float]) -> List[Dict]:
     """
-    Obtiene eventos detectados cercanos al hotel para el rango de fechas dado.
+    Eventos que se traslapan con [start_date, end_date] dentro de la caja
+    (min_lat, max_lat, min_lon, max_lon), filtrados en la consulta.
     """
+    min_lat, max_lat, min_lon, max_lon = box
     response = (
         supabase.table("detected_events")
-        .select("*")
-        .gte("start_date", start_date.isoformat())
-        .lte("end_date", end_date.isoformat())
+        .select(DETECTED_EVENT_COLUMNS)
+        .lte("start_date", end_date.isoformat())
+        .gte("end_date", start_date.isoformat())
+        .gte("latitude", min_lat)
+        .lte("latitude", max_lat)
+        .gte("longitude", min_lon)
+        .lte("longitude", max_lon)
         .execute()
     )
     if hasattr(response, 'error') and response.error:
         raise Exception(f"Error fetching detected events: {response.error}")
+    return response.data if hasattr(response, 'data') else response
+
+def fetch_detected_events_for_range(supabase, hotel_coords: Tuple[float, float], start_date: date, end_date: date, radius_km: int = 20) -> List[Dict]:
+    """
+    Obtiene eventos detectados cercanos al hotel para el rango de fechas dado.
+    El traslape de fechas y una caja alrededor del hotel se filtran en la consulta;
+    la distancia exacta (haversine) se calcula desde hotel_coords.
+    """
     lat, lon = hotel_coords
+    events = fetch_detected_events_in_box(supabase, start_date, end_date, bounding_box(lat, lon, radius_km))
     filtered = []
-    for event in (response.data if hasattr(response, 'data') else response):
-        dist = event.get("distance_to_hotel_km")
-        if dist is not None and dist <= radius_km:
+    for event in events:
+        dist = haversine_km(lat, lon, event["latitude"], event["longitude"])
+        if dist <= radius_km:
+            event["distance_to_hotel_km"] = round(dist, 2)
             filtered.append(event)
-    return filtered 
\ No newline at end of file
+    return filtered
+
+RECOMMENDATION_CONFLICT_KEYS = "hotel_id,room_type_id,target_date"
+
+def _write_recommendation_chunk(supabase, chunk: List[Dict], upsert: bool):
+    table = supabase.table("price_recommendations")
+    if upsert:
+        response = table.upsert(chunk, on_conflict=RECOMMENDATION_CONFLICT_KEYS).execute()
+    else:
+        response = table.insert(chunk).execute()
+    if hasattr(response, 'error') and response.error:
+        raise Exception(f"Error writing price recommendations: {response.error}")
+    return response
+
+@timed('insert')
+def bulk_write_recommendations(supabase, recommendations: List[Dict], chunk_size: int = 500, max_workers: int = 4, upsert: bool = True) -> Dict:
+    """
+    Guarda recomendaciones en lotes multi-fila (upsert sobre hotel_id, room_type_id, target_date)
+    enviando los lotes en paralelo con un pool acotado.
+    Los errores se reportan por lote en lugar de abortar toda la escritura.
+    """
+    chunks = [recommendations[i:i + chunk_size] for i in range(0, len(recommendations), chunk_size)]
+    report = {"total": len(recommendations), "written": 0, "failed": 0, "chunks": len(chunks), "errors": []}
+    if not chunks:
+        return report
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+        futures = {pool.submit(_write_recommendation_chunk, supabase, chunk, upsert): index for index, chunk in enumerate(chunks)}
+        for future in as_completed(futures):
+            index = futures[future]
+            size = len(chunks[index])
+            try:
+                future.result()
+                report["written"] += size
+            except Exception as e:
+                report["failed"] += size
+                report["errors"].append({"chunk": index, "offset": index * chunk_size, "size": size, "error": str(e)})
+    report["errors"].sort(key=lambda error: error["chunk"])
+    return report
@@ -0,0 +1,220 @@
+import hashlib
+import re
+import unicodedata
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from backend.events.event_dates import parse_event_date
+from backend.geo.distance import haversine_km
+from backend.geo.spatial_index import GeoGridIndex
+
+# Deduplicación de eventos entre Eventbrite y tijuanaeventos (y entre scrapes
+# repetidos). Primero se agrupan los nombres normalizados idénticos por hash;
+# después se comparan con similitud difusa de nombre y lugar solo los grupos que
+# caen en el mismo bloque (fecha + celda geográfica), así que el costo crece casi
+# linealmente con el número de eventos. Cada grupo produce un registro canónico
+# con la procedencia de todas sus fuentes.
+
+DEDUP_CELL_KM = 1.0
+MATCH_RADIUS_KM = 1.0           # dos eventos con ubicación precisa deben estar a esta distancia o menos
+NAME_MATCH = 0.85               # similitud de nombre suficiente por sí sola
+NAME_WITH_VENUE_MATCH = 0.7     # similitud de nombre suficiente si el lugar también coincide
+VENUE_MATCH = 0.7
+# Coordenadas por defecto que ponen los scrapers cuando no conocen la ubicación (centro de Tijuana)
+APPROXIMATE_COORDS = {(32.5149, -117.0382)}
+
+# Campos propios de cada publicación: no se copian de un duplicado al registro canónico
+PROVENANCE_FIELDS = {'source', 'fuente', 'enlace'}
+SOURCE_PRIORITY = {'eventbrite': 2, 'eventbrite.com': 2, 'tijuanaeventos': 1, 'tijuanaeventos.com': 1}
+NAME_NOISE = {'entradas', 'entrada', 'tickets', 'ticket', 'boletos', 'boleto', 'evento', 'en', 'de', 'la', 'el',
+              'los', 'las', 'the', 'at', 'y', 'and'}
+
+
+def _fold(text: Optional[str]) -> str:
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii').lower()
+    return re.sub(r'[^a-z0-9]+', ' ', text).strip()
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """
+    Nombre comparable: sin acentos, puntuación ni palabras de relleno.
+    Letras sueltas consecutivas se unen ("M U L U K" -> "muluk").
+    """
+    text = re.sub(r'\b([a-z0-9])\s(?=[a-z0-9]\b)', r'\1', _fold(name))
+    tokens = [token for token in text.split() if token not in NAME_NOISE]
+    return ' '.join(tokens) if tokens else text
+
+
+def name_hash(normalized: str) -> str:
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def similarity(a: str, b: str, floor: float = 0.0, counts_a: Optional[Counter] = None,
+               counts_b: Optional[Counter] = None) -> float:
+    """
+    Máximo entre Jaccard de palabras y la razón de SequenceMatcher (0 a 1).
+    La razón exacta solo se calcula si la cota por conteo de caracteres (la misma
+    de quick_ratio, con conteos que se pueden precalcular) puede superar floor.
+    """
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    tokens_a, tokens_b = set(a.split()), set(b.split())
+    jaccard = len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+    if 2 * min(len(a), len(b)) / (len(a) + len(b)) < floor:
+        return jaccard
+    common = sum(((counts_a or Counter(a)) & (counts_b or Counter(b))).values())
+    upper = 2 * common / (len(a) + len(b))
+    if upper <= jaccard or upper < floor:
+        return jaccard
+    return max(jaccard, SequenceMatcher(None, a, b, autojunk=False).ratio())
+
+
+class _DisjointSet:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> None:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+def _prepare(event: Dict, reference, grid: GeoGridIndex) -> Dict:
+    name = normalize_name(event.get('nombre') or event.get('name'))
+    day = event.get('start_date')
+    if day is None and event.get('fecha'):
+        day = parse_event_date(event.get('fecha'), reference).start_date
+    lat, lon = event.get('latitude'), event.get('longitude')
+    located = lat is not None and lon is not None and (round(lat, 4), round(lon, 4)) not in APPROXIMATE_COORDS
+    return {
+        'name': name,
+        'chars': Counter(name),
+        'hash': name_hash(name),
+        'venue': normalize_name(event.get('lugar') or event.get('venue')),
+        'day': day,
+        'point': (lat, lon) if located else None,
+        'cell': grid.cell_of(lat, lon) if located else None,
+    }
+
+
+def is_match(a: Dict, b: Dict) -> bool:
+    """Compara dos eventos preparados que ya comparten bloque de fecha."""
+    if a['point'] and b['point'] and haversine_km(*a['point'], *b['point']) > MATCH_RADIUS_KM:
+        return False
+    name_score = similarity(a['name'], b['name'], NAME_WITH_VENUE_MATCH, a['chars'], b['chars'])
+    if name_score >= NAME_MATCH:
+        return True
+    if name_score >= NAME_WITH_VENUE_MATCH and a['venue'] and b['venue']:
+        return similarity(a['venue'], b['venue'], floor=VENUE_MATCH) >= VENUE_MATCH
+    return False
+
+
+def _source_of(event: Dict) -> Optional[str]:
+    return event.get('source') or event.get('fuente')
+
+
+def _completeness(event: Dict, prepared: Dict) -> Tuple:
+    filled = sum(1 for value in event.values() if value not in (None, '', []))
+    return (prepared['point'] is not None, SOURCE_PRIORITY.get(_source_of(event) or '', 0), filled)
+
+
+def _merge(cluster: List[int], events: List[Dict], prepared: List[Dict]) -> Dict:
+    """Registro canónico: el más completo del grupo, con los campos vacíos llenados por los demás."""
+    best = max(cluster, key=lambda i: _completeness(events[i], prepared[i]))
+    canonical = dict(events[best])
+    for i in cluster:
+        for key, value in events[i].items():
+            if key not in PROVENANCE_FIELDS and canonical.get(key) in (None, '') and value not in (None, ''):
+                canonical[key] = value
+    canonical['event_id'] = name_hash(f"{prepared[best]['name']}|{prepared[best]['day']}")
+    canonical['sources'] = [
+        {'source': _source_of(events[i]), 'nombre': events[i].get('nombre'), 'lugar': events[i].get('lugar'),
+         'fecha': events[i].get('fecha'), 'enlace': events[i].get('enlace')}
+        for i in cluster
+    ]
+    canonical['source_count'] = len({_source_of(events[i]) for i in cluster})
+    canonical['duplicates'] = len(cluster) - 1
+    return canonical
+
+
+def _compare_block(members: List[int], prepared: List[Dict], groups: _DisjointSet,
+                   others: Iterable[int] = ()) -> int:
+    """Une los pares que coinciden dentro del bloque (y contra others); devuelve comparaciones hechas."""
+    comparisons = 0
+    members = list(members)
+    others = list(others)
+    for position, i in enumerate(members):
+        for j in members[position + 1:] + others:
+            if groups.find(i) == groups.find(j):
+                continue
+            comparisons += 1
+            if is_match(prepared[i], prepared[j]):
+                groups.union(i, j)
+    return comparisons
+
+
+def dedupe_events(events: Iterable[Dict], reference=None, cell_km: float = DEDUP_CELL_KM) -> Dict:
+    """
+    Agrupa eventos duplicados y devuelve {'events': canónicos en orden de aparición,
+    'clusters': posiciones de entrada de cada canónico, 'input': total recibido,
+    'duplicates': registros fusionados, 'comparisons': pares comparados de forma difusa}.
+    Acepta eventos con start_date ISO o con la fecha en texto ('fecha', relativa a reference).
+    """
+    events = list(events)
+    grid = GeoGridIndex(cell_km)
+    prepared = [_prepare(event, reference, grid) for event in events]
+    groups = _DisjointSet(len(events))
+
+    # 1. Mismo nombre normalizado y misma fecha: duplicado exacto sin comparar texto
+    exact: Dict[Tuple[str, Optional[str]], int] = {}
+    for i, item in enumerate(prepared):
+        key = (item['hash'], item['day'])
+        if key in exact:
+            groups.union(exact[key], i)
+        else:
+            exact[key] = i
+
+    # 2. Comparación difusa entre representantes del mismo día y de celdas vecinas.
+    #    Los eventos sin ubicación precisa se comparan con todos los del mismo día;
+    #    los que no tienen fecha solo se fusionan por nombre exacto.
+    blocks: Dict[str, Dict[Hashable, List[int]]] = {}
+    for i in exact.values():
+        item = prepared[i]
+        if item['day'] is not None:
+            blocks.setdefault(item['day'], {}).setdefault(item['cell'], []).append(i)
+
+    comparisons = 0
+    for cells in blocks.values():
+        unlocated = cells.get(None, [])
+        comparisons += _compare_block(unlocated, prepared, groups)
+        for cell, members in cells.items():
+            if cell is None:
+                continue
+            # Vecinos "hacia adelante" para no comparar dos veces el mismo par de celdas
+            forward = [
+                j for di, dj in ((0, 1), (1, -1), (1, 0), (1, 1))
+                for j in cells.get((cell[0] + di, cell[1] + dj), [])
+            ]
+            comparisons += _compare_block(members, prepared, groups, forward + unlocated)
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(events)):
+        clusters.setdefault(groups.find(i), []).append(i)
+    ordered = sorted(clusters.values(), key=lambda members: members[0])
+    merged = [_merge(members, events, prepared) for members in ordered]
+    return {
+        'events': merged,
+        'clusters': ordered,
+        'input': len(events),
+        'duplicates': len(events) - len(merged),
+        'comparisons': comparisons,
+    }
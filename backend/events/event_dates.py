@@ -0,0 +1,259 @@
+import os
+import re
+import unicodedata
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Normaliza las fechas en texto libre de los eventos scrapeados ("Sat, Jul 19 •
+# 8:00 PM", "Friday • 7:00 PM + 33 more", "Fecha por confirmar") a rangos ISO
+# start_date/end_date, que es lo que usan EventCalendar y el historial. Las
+# mismas cadenas se repiten entre scrapes, así que el parseo se memoiza con LRU.
+
+EVENT_DATE_CACHE_SIZE = int(os.getenv('EVENT_DATE_CACHE_SIZE', '4096'))
+RECURRENCE_INTERVAL_DAYS = 7     # "+N more" se expande como ocurrencias semanales
+RECURRENCE_HORIZON_DAYS = 365    # no se generan ocurrencias más allá de este horizonte
+DEFAULT_SCRAPED_IMPACT = os.getenv('SCRAPED_EVENT_IMPACT', 'Low')
+
+MONTHS = {
+    'jan': 1, 'january': 1, 'ene': 1, 'enero': 1,
+    'feb': 2, 'february': 2, 'febrero': 2,
+    'mar': 3, 'march': 3, 'marzo': 3,
+    'apr': 4, 'april': 4, 'abr': 4, 'abril': 4,
+    'may': 5, 'mayo': 5,
+    'jun': 6, 'june': 6, 'junio': 6,
+    'jul': 7, 'july': 7, 'julio': 7,
+    'aug': 8, 'august': 8, 'ago': 8, 'agosto': 8,
+    'sep': 9, 'sept': 9, 'september': 9, 'septiembre': 9, 'set': 9, 'setiembre': 9,
+    'oct': 10, 'october': 10, 'octubre': 10,
+    'nov': 11, 'november': 11, 'noviembre': 11,
+    'dec': 12, 'december': 12, 'dic': 12, 'diciembre': 12,
+}
+WEEKDAYS = {
+    'mon': 0, 'monday': 0, 'lun': 0, 'lunes': 0,
+    'tue': 1, 'tues': 1, 'tuesday': 1, 'mar': 1, 'martes': 1,
+    'wed': 2, 'wednesday': 2, 'mie': 2, 'miercoles': 2,
+    'thu': 3, 'thur': 3, 'thurs': 3, 'thursday': 3, 'jue': 3, 'jueves': 3,
+    'fri': 4, 'friday': 4, 'vie': 4, 'viernes': 4,
+    'sat': 5, 'saturday': 5, 'sab': 5, 'sabado': 5,
+    'sun': 6, 'sunday': 6, 'dom': 6, 'domingo': 6,
+}
+RELATIVE_DAYS = {'today': 0, 'hoy': 0, 'tonight': 0, 'tomorrow': 1, 'manana': 1}
+TBD_MARKERS = ('por confirmar', 'tbd', 'tba', 'to be announced', 'sin fecha', 'proximamente')
+
+_MORE_RE = re.compile(r'\+\s*(\d+)\s*(?:more|mas)\b')
+_TIME_RE = re.compile(r'\b(\d{1,2})(?::(\d{2}))?\s*([ap])\.?\s*m\b\.?|\b(\d{1,2}):(\d{2})\b')
+_ISO_RE = re.compile(r'\b(\d{4})-(\d{2})-(\d{2})(?!\d)')
+_MONTH_DAY_RE = re.compile(r'\b([a-z]+)\.?\s+(\d{1,2})\b(?:,?\s*(\d{4}))?')
+_DAY_MONTH_RE = re.compile(r'\b(\d{1,2})\s+(?:de\s+)?([a-z]+)\.?(?:\s+(?:de\s+)?(\d{4}))?')
+_WORD_RE = re.compile(r'[a-z]+')
+
+
+class ParsedEventDate(NamedTuple):
+    """Resultado inmutable (se comparte desde la caché LRU)."""
+    status: str                   # 'parsed', 'tbd' (por confirmar) o 'unparsed'
+    start_date: Optional[str]
+    end_date: Optional[str]
+    time: Optional[str]           # 'HH:MM' en 24 h
+    more: int                     # ocurrencias adicionales anunciadas con "+N more"
+
+
+def _fold(text: str) -> str:
+    """Minúsculas sin acentos y con separadores uniformes."""
+    text = re.sub(r'[•·]', '|', re.sub(r'[–—]', '-', text))
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+    text = re.sub(r'(\d{4}-\d{2}-\d{2})t', r'\1 ', text)  # 2025-08-01T20:00 -> 2025-08-01 20:00
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _parse_time(text: str) -> Optional[str]:
+    match = _TIME_RE.search(text)
+    if not match:
+        return None
+    if match.group(3):
+        hour = int(match.group(1)) % 12 + (12 if match.group(3) == 'p' else 0)
+        minute = int(match.group(2) or 0)
+    else:
+        hour, minute = int(match.group(4)), int(match.group(5))
+    if hour > 23 or minute > 59:
+        return None
+    return f'{hour:02d}:{minute:02d}'
+
+
+def _weekday_in(text: str) -> Optional[int]:
+    for word in _WORD_RE.findall(text):
+        if word in WEEKDAYS and word not in MONTHS:
+            return WEEKDAYS[word]
+    return None
+
+
+def _infer_year(month: int, day: int, weekday: Optional[int], reference: date) -> Optional[date]:
+    """
+    Sin año explícito se elige el año más cercano a la fecha del scrape,
+    prefiriendo fechas próximas y, si hay día de la semana, el año en que coincide.
+    """
+    candidates = []
+    for year in (reference.year - 1, reference.year, reference.year + 1):
+        try:
+            candidates.append(date(year, month, day))
+        except ValueError:
+            continue
+    if weekday is not None and any(c.weekday() == weekday for c in candidates):
+        candidates = [c for c in candidates if c.weekday() == weekday]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda c: (c < reference - timedelta(days=1), abs((c - reference).days)))
+
+
+def _parse_day(text: str, reference: date, default_month: Optional[int] = None) -> Optional[date]:
+    """Una fecha dentro de un fragmento sin hora."""
+    for word, offset in RELATIVE_DAYS.items():
+        if re.search(rf'\b{word}\b', text):
+            return reference + timedelta(days=offset)
+
+    weekday = _weekday_in(text)
+    for regex, month_group, day_group in ((_MONTH_DAY_RE, 1, 2), (_DAY_MONTH_RE, 2, 1)):
+        for match in regex.finditer(text):
+            month = MONTHS.get(match.group(month_group))
+            if month is None:
+                continue
+            day = int(match.group(day_group))
+            if match.group(3):
+                try:
+                    return date(int(match.group(3)), month, day)
+                except ValueError:
+                    return None
+            return _infer_year(month, day, weekday, reference)
+
+    # "Jul 19 - 21": el segundo extremo solo trae el día
+    if default_month is not None:
+        match = re.fullmatch(r'\s*(\d{1,2})\s*', text)
+        if match:
+            return _infer_year(default_month, int(match.group(1)), weekday, reference)
+
+    if weekday is not None:
+        # "Friday": el próximo viernes (hoy se anunciaría como "Today")
+        return reference + timedelta(days=(weekday - reference.weekday() - 1) % 7 + 1)
+    return None
+
+
+@lru_cache(maxsize=EVENT_DATE_CACHE_SIZE)
+def _parse_cached(text: str, reference_iso: str) -> ParsedEventDate:
+    folded = _fold(text)
+    if not folded or any(marker in folded for marker in TBD_MARKERS):
+        return ParsedEventDate('tbd', None, None, None, 0)
+
+    more_match = _MORE_RE.search(folded)
+    more = int(more_match.group(1)) if more_match else 0
+    folded = _MORE_RE.sub('', folded)
+    time_of_day = _parse_time(folded)
+
+    # "Sat, Jul 19 • 8:00 PM": la fecha va antes del separador, la hora después
+    date_part = re.split(r'\s*[|@]\s*', folded)[0]
+    date_part = _TIME_RE.sub('', date_part)
+    reference = date.fromisoformat(reference_iso)
+
+    iso_dates = _ISO_RE.findall(date_part)
+    if iso_dates:
+        try:
+            bounds = sorted(date(int(y), int(m), int(d)) for y, m, d in iso_dates)
+        except ValueError:
+            return ParsedEventDate('unparsed', None, None, time_of_day, more)
+        return ParsedEventDate('parsed', bounds[0].isoformat(), bounds[-1].isoformat(), time_of_day, more)
+
+    ends = re.split(r'\s*-\s*|\s+(?:to|al|a)\s+', date_part, maxsplit=1)
+    start = _parse_day(ends[0], reference)
+    if start is None and len(ends) == 2:
+        # "19 al 21 de julio": el mes solo aparece en el segundo extremo
+        end = _parse_day(ends[1], reference)
+        start = _parse_day(ends[0], reference, default_month=end.month) if end else None
+    if start is None:
+        return ParsedEventDate('unparsed', None, None, time_of_day, more)
+    end = start
+    if len(ends) == 2:
+        end = _parse_day(ends[1], start, default_month=start.month) or start
+        if end < start:
+            end = start
+    return ParsedEventDate('parsed', start.isoformat(), end.isoformat(), time_of_day, more)
+
+
+def parse_event_date(text: Optional[str], reference: Optional[date] = None) -> ParsedEventDate:
+    """
+    Parsea una fecha de evento relativa a reference (el día del scrape).
+    Cadenas repetidas con la misma referencia se resuelven desde la caché LRU.
+    """
+    return _parse_cached(text or '', (reference or date.today()).isoformat())
+
+
+def parse_cache_info():
+    return _parse_cached.cache_info()
+
+
+def expand_occurrences(parsed: ParsedEventDate, interval_days: int = RECURRENCE_INTERVAL_DAYS,
+                       horizon_days: int = RECURRENCE_HORIZON_DAYS) -> List[Tuple[str, str]]:
+    """
+    [(start_date, end_date)] de la primera ocurrencia y de las "+N more". El texto
+    no dice cuándo son las demás, así que se asume una recurrencia cada interval_days.
+    """
+    if parsed.status != 'parsed':
+        return []
+    start = date.fromisoformat(parsed.start_date)
+    length = date.fromisoformat(parsed.end_date) - start
+    limit = start + timedelta(days=horizon_days)
+    occurrences = []
+    for i in range(parsed.more + 1):
+        occurrence = start + timedelta(days=i * interval_days)
+        if occurrence > limit:
+            break
+        occurrences.append((occurrence.isoformat(), (occurrence + length).isoformat()))
+    return occurrences
+
+
+def normalize_events(events: Iterable[Dict], reference: Optional[date] = None, source: Optional[str] = None,
+                     impact: str = DEFAULT_SCRAPED_IMPACT) -> Dict[str, List[Dict]]:
+    """
+    Convierte eventos scrapeados en ocurrencias con start_date/end_date ISO (una por
+    cada "+N more"), con la forma de detected_events que consumen los motores de precios.
+    Devuelve {'events': ocurrencias, 'undated': eventos sin fecha utilizable}.
+    """
+    normalized, undated = [], []
+    for event in events:
+        parsed = parse_event_date(event.get('fecha'), reference)
+        occurrences = expand_occurrences(parsed)
+        if not occurrences:
+            undated.append({**event, 'date_status': parsed.status})
+            continue
+        for number, (start_date, end_date) in enumerate(occurrences):
+            normalized.append({
+                **event,
+                'source': source or event.get('fuente'),
+                'start_date': start_date,
+                'end_date': end_date,
+                'time': parsed.time,
+                'occurrence': number,
+                'occurrences': len(occurrences),
+                'estimated_impact': event.get('estimated_impact') or impact,
+                'date_status': parsed.status,
+            })
+    return {'events': normalized, 'undated': undated}
+
+
+def build_event_date_table(events: Iterable[Dict], start_date: Optional[str] = None,
+                           end_date: Optional[str] = None) -> Dict[str, List[int]]:
+    """
+    Tabla {fecha ISO: [posiciones en events]} con cada día que cubre cada ocurrencia,
+    recortada opcionalmente a [start_date, end_date].
+    """
+    events = list(events)
+    table: Dict[str, List[int]] = {}
+    for position, event in enumerate(events):
+        day = date.fromisoformat(event['start_date'])
+        last = date.fromisoformat(event['end_date'])
+        if start_date is not None:
+            day = max(day, date.fromisoformat(start_date))
+        if end_date is not None:
+            last = min(last, date.fromisoformat(end_date))
+        while day <= last:
+            table.setdefault(day.isoformat(), []).append(position)
+            day += timedelta(days=1)
+    return dict(sorted(table.items()))
@@ -0,0 +1,225 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend.geo.distance import haversine_km
+from backend.geo.spatial_index import GeoGridIndex
+from backend.scraping.orchestrator import ScrapeSource, run_source, scraper_source
+from hotel_coordinates import get_hotel_coordinates
+
+# Caché de scrapes de Eventbrite por celda geográfica. Cada hotel se ubica con
+# get_hotel_coordinates y su celda se scrapea desde el centro de la celda, así
+# que todos los hoteles de una misma celda comparten un solo scrape (y uno en
+# curso). Un scrape vigente de una celda vecina cuyo centro esté a
+# EVENT_REUSE_KM o menos también se reutiliza. Cada celda se guarda en
+# resultados/event_cells/ y vence después de EVENT_SCRAPE_TTL_SECONDS.
+
+EVENT_CELL_KM = float(os.getenv('EVENT_SCRAPE_CELL_KM', '5'))
+EVENT_SCRAPE_TTL = float(os.getenv('EVENT_SCRAPE_TTL_SECONDS', '21600'))
+EVENT_REUSE_KM = float(os.getenv('EVENT_SCRAPE_REUSE_KM', str(EVENT_CELL_KM)))
+EVENT_CELLS_DIR = os.path.join('resultados', 'event_cells')
+EVENTS_EVENTBRITE_FILE = os.path.join('resultados', 'eventos_cercanos.json')
+GEO_SCRIPT = 'scrapeo_geo.py'
+
+Cell = Tuple[int, int]
+
+
+def cell_id(cell: Cell) -> str:
+    return f'{cell[0]}_{cell[1]}'
+
+
+def format_point(lat: float, lon: float) -> str:
+    """Coordenadas como las recibe scrapeo_geo.py ('lat,lon')."""
+    return f'{lat:.5f},{lon:.5f}'
+
+
+DEFAULT_GRID = GeoGridIndex(EVENT_CELL_KM)
+
+
+def hotel_scrape_point(hotel_name: str, grid: GeoGridIndex = DEFAULT_GRID) -> Tuple[Cell, float, float]:
+    """Celda del hotel y el punto (centro de la celda) desde el que se scrapea."""
+    lat, lon = get_hotel_coordinates(hotel_name)
+    cell = grid.cell_of(lat, lon)
+    center_lat, center_lon = grid.cell_center(cell)
+    return cell, center_lat, center_lon
+
+
+def geo_scrape_args(hotel_name: str) -> List[str]:
+    """Argumentos de scrapeo_geo.py para el hotel: centro de su celda y nombre."""
+    _cell, lat, lon = hotel_scrape_point(hotel_name)
+    return [format_point(lat, lon), hotel_name]
+
+
+def geo_cell_key(hotel_name: str) -> str:
+    """Clave de coalescencia: hoteles de la misma celda comparten el scrape."""
+    return cell_id(hotel_scrape_point(hotel_name)[0])
+
+
+class GeoEventCache:
+    def __init__(self, cell_km: float = EVENT_CELL_KM, ttl: float = EVENT_SCRAPE_TTL,
+                 reuse_km: float = EVENT_REUSE_KM, directory: str = EVENT_CELLS_DIR,
+                 output_file: str = EVENTS_EVENTBRITE_FILE, clock: Callable[[], float] = time.time):
+        self.grid = GeoGridIndex(cell_km)
+        self.ttl = ttl
+        self.reuse_km = reuse_km
+        self.directory = directory
+        self.output_file = output_file
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[Cell, Dict] = {}
+        self._in_flight: Dict[Cell, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self.scrapes = 0
+        self._load()
+
+    def _load(self) -> None:
+        """Recupera las celdas guardadas por corridas anteriores."""
+        if not os.path.isdir(self.directory):
+            return
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+                self._entries[tuple(entry['cell'])] = entry
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Celda de eventos ilegible {filename}: {e}")
+
+    def scrape_point(self, hotel_name: str) -> Tuple[Cell, float, float]:
+        return hotel_scrape_point(hotel_name, self.grid)
+
+    def source_for(self, hotel_name: str, name: str = 'events_eventbrite') -> ScrapeSource:
+        """Fuente de scrapeo_geo.py para la celda del hotel."""
+        _cell, lat, lon = self.scrape_point(hotel_name)
+        return scraper_source(name, GEO_SCRIPT, [format_point(lat, lon), hotel_name], self.output_file)
+
+    def is_fresh(self, entry: Optional[Dict]) -> bool:
+        return entry is not None and self._clock() - entry['scraped_at'] < self.ttl
+
+    def lookup(self, hotel_name: str) -> Optional[Dict]:
+        """Scrape vigente de la celda del hotel o, si no hay, del vecino vigente más cercano a EVENT_REUSE_KM."""
+        cell, _lat, _lon = self.scrape_point(hotel_name)
+        hotel_lat, hotel_lon = get_hotel_coordinates(hotel_name)
+        with self._lock:
+            entry = self._entries.get(cell)
+            if self.is_fresh(entry):
+                return entry
+            nearby = [
+                (haversine_km(hotel_lat, hotel_lon, *candidate['center']), candidate)
+                for candidate in self._entries.values() if self.is_fresh(candidate)
+            ]
+        nearby = [item for item in nearby if item[0] <= self.reuse_km]
+        return min(nearby, key=lambda item: item[0])[1] if nearby else None
+
+    def record(self, lat: float, lon: float, hotel_name: Optional[str], events: List[Dict]) -> Dict:
+        """Guarda el resultado de un scrape hecho desde (lat, lon) como la celda de ese punto."""
+        cell = self.grid.cell_of(lat, lon)
+        entry = {
+            'cell': list(cell),
+            'cell_id': cell_id(cell),
+            'center': [round(lat, 5), round(lon, 5)],
+            'scraped_at': self._clock(),
+            'hotel_name': hotel_name,
+            'events': events,
+        }
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(self.directory, f'{cell_id(cell)}.json'))
+        with self._lock:
+            self._entries[cell] = entry
+        return entry
+
+    def record_scrape(self, source: ScrapeSource) -> None:
+        """
+        Hook del orquestador: todo scrape exitoso de scrapeo_geo.py (síncrono, en cola
+        o programado) queda guardado en la celda de sus coordenadas.
+        """
+        if source.script != GEO_SCRIPT or not source.args:
+            return
+        try:
+            lat, lon = (float(value) for value in source.args[0].split(','))
+            with open(source.result_file, 'r', encoding='utf-8') as f:
+                events = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ No se pudo guardar la celda de eventos de {source.name}: {e}")
+            return
+        self.record(lat, lon, source.args[1] if len(source.args) > 1 else None, events)
+
+    def get_or_scrape(self, hotel_name: str, force: bool = False,
+                      cancel_event: Optional[threading.Event] = None) -> Dict:
+        """
+        Eventos de la celda del hotel: {'status', 'cache' (hit, miss o shared),
+        'entry', 'duration_s', 'started_at', 'error', 'mode'}. Si otra petición ya
+        está scrapeando la misma celda se espera ese resultado en lugar de repetirlo.
+        """
+        if not force:
+            entry = self.lookup(hotel_name)
+            if entry is not None:
+                with self._lock:
+                    self.hits += 1
+                return {'status': 'success', 'cache': 'hit', 'entry': entry, 'duration_s': 0.0,
+                        'started_at': None, 'error': None, 'mode': 'cache'}
+
+        cell, _lat, _lon = self.scrape_point(hotel_name)
+        with self._lock:
+            self.misses += 1
+            waiter = self._in_flight.get(cell)
+            leader = waiter is None
+            if leader:
+                waiter = self._in_flight[cell] = {'done': threading.Event(), 'result': None}
+        if not leader:
+            waiter['done'].wait()
+            return {**waiter['result'], 'cache': 'shared'}
+
+        try:
+            source = self.source_for(hotel_name)
+            started = self._clock()
+            result = run_source(source, cancel_event)
+            with self._lock:
+                self.scrapes += 1
+                entry = self._entries.get(cell)
+            if result['status'] == 'success' and (entry is None or entry['scraped_at'] < started):
+                # El hook no está registrado (uso fuera de backend_server): guardar aquí
+                self.record_scrape(source.replace(version_file=result.get('version_file')))
+                with self._lock:
+                    entry = self._entries.get(cell)
+            if result['status'] == 'success' and entry is None:
+                result.update(status='failed', error='No se encontró el archivo de resultados')
+            waiter['result'] = {**result, 'cache': 'miss', 'entry': entry if result['status'] == 'success' else None}
+            return waiter['result']
+        except Exception as e:
+            waiter['result'] = {'status': 'failed', 'cache': 'miss', 'entry': None, 'duration_s': 0.0,
+                                'started_at': datetime.now().isoformat(), 'error': str(e), 'mode': None}
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[cell]
+            waiter['done'].set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = list(self._entries.values())
+            stats = {'hits': self.hits, 'misses': self.misses, 'scrapes': self.scrapes,
+                     'in_flight': len(self._in_flight)}
+        stats.update(cells=len(entries), fresh_cells=sum(1 for entry in entries if self.is_fresh(entry)),
+                     cell_km=self.grid.cell_km, ttl_s=self.ttl, reuse_km=self.reuse_km)
+        return stats
+
+
+def entry_metadata(entry: Optional[Dict]) -> Dict:
+    """Campos de una celda para metadata de las respuestas (sin los eventos)."""
+    if entry is None:
+        return {}
+    return {
+        'cell': entry['cell_id'],
+        'scrape_center': entry['center'],
+        'cell_scraped_at': datetime.fromtimestamp(entry['scraped_at']).isoformat(),
+    }
@@ -0,0 +1,26 @@
+from math import asin, cos, degrees, pi, radians, sin, sqrt
+from typing import Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 2 * pi * EARTH_RADIUS_KM / 360  # consistente con haversine_km
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distancia en km sobre la esfera entre dos coordenadas (grados)."""
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(a)))
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    Caja (min_lat, max_lat, min_lon, max_lon) que contiene el círculo de radius_km.
+    Sirve como prefiltro barato antes de calcular la distancia exacta, así que
+    usa la extensión exacta del círculo en la esfera (nunca debe quedar corta).
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    dlat = degrees(angular)
+    ratio = sin(angular) / max(cos(radians(lat)), 1e-6)
+    dlon = degrees(asin(ratio)) if ratio < 1 else 180.0
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
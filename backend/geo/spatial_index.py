@@ -0,0 +1,131 @@
+from math import cos, floor, radians
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.geo.distance import EARTH_RADIUS_KM, KM_PER_DEGREE_LAT, bounding_box
+
+# Índice geoespacial por celdas uniformes (en grados) para hoteles y eventos.
+# Las consultas solo revisan las celdas que cubren la caja del radio buscado y
+# calculan la distancia exacta con haversine vectorizado sobre esos candidatos.
+
+DEFAULT_CELL_KM = 2.0
+
+
+def haversine_km_vec(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Distancias en km desde (lat, lon) hacia arreglos de coordenadas."""
+    lat1 = np.radians(lat)
+    lats = np.radians(lats)
+    dlat = lats - lat1
+    dlon = np.radians(lons) - np.radians(lon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lats) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class GeoGridIndex:
+    """
+    Puntos con llave única agrupados en celdas de cell_km × cell_km (aprox. en
+    reference_lat). Soporta altas y bajas incrementales.
+    """
+
+    def __init__(self, cell_km: float = DEFAULT_CELL_KM, reference_lat: float = 32.5):
+        self.cell_km = cell_km
+        self.cell_deg_lat = cell_km / KM_PER_DEGREE_LAT
+        self.cell_deg_lon = cell_km / (KM_PER_DEGREE_LAT * max(cos(radians(reference_lat)), 1e-6))
+        self._cells: Dict[Tuple[int, int], Dict[Hashable, Tuple[float, float]]] = {}
+        self._points: Dict[Hashable, Tuple[float, float]] = {}
+        self._payloads: Dict[Hashable, object] = {}
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._points
+
+    def cell_of(self, lat: float, lon: float) -> Tuple[int, int]:
+        return floor(lat / self.cell_deg_lat), floor(lon / self.cell_deg_lon)
+
+    def cell_center(self, cell: Tuple[int, int]) -> Tuple[float, float]:
+        return (cell[0] + 0.5) * self.cell_deg_lat, (cell[1] + 0.5) * self.cell_deg_lon
+
+    def add(self, key: Hashable, lat: float, lon: float, payload: object = None) -> None:
+        """Agrega o mueve un punto."""
+        if key in self._points:
+            self.remove(key)
+        self._points[key] = (lat, lon)
+        self._cells.setdefault(self.cell_of(lat, lon), {})[key] = (lat, lon)
+        if payload is not None:
+            self._payloads[key] = payload
+
+    def remove(self, key: Hashable) -> bool:
+        point = self._points.pop(key, None)
+        if point is None:
+            return False
+        cell = self.cell_of(*point)
+        bucket = self._cells[cell]
+        del bucket[key]
+        if not bucket:
+            del self._cells[cell]
+        self._payloads.pop(key, None)
+        return True
+
+    def get(self, key: Hashable) -> Optional[Tuple[float, float]]:
+        return self._points.get(key)
+
+    def payload(self, key: Hashable):
+        return self._payloads.get(key)
+
+    def _candidates(self, lat: float, lon: float, radius_km: float) -> Tuple[List[Hashable], np.ndarray, np.ndarray]:
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+        lo_i, lo_j = self.cell_of(min_lat, min_lon)
+        hi_i, hi_j = self.cell_of(max_lat, max_lon)
+        keys, lats, lons = [], [], []
+        if (hi_i - lo_i + 1) * (hi_j - lo_j + 1) > len(self._cells):
+            # La caja cubre más celdas de las que existen: recorrer las ocupadas
+            cells = [bucket for (i, j), bucket in self._cells.items() if lo_i <= i <= hi_i and lo_j <= j <= hi_j]
+        else:
+            cells = [self._cells[(i, j)] for i in range(lo_i, hi_i + 1) for j in range(lo_j, hi_j + 1)
+                     if (i, j) in self._cells]
+        for bucket in cells:
+            for key, (point_lat, point_lon) in bucket.items():
+                keys.append(key)
+                lats.append(point_lat)
+                lons.append(point_lon)
+        return keys, np.array(lats, dtype=float), np.array(lons, dtype=float)
+
+    def within_radius(self, lat: float, lon: float, radius_km: float) -> List[Tuple[Hashable, float]]:
+        """[(llave, distancia_km)] de los puntos a radius_km o menos, del más cercano al más lejano."""
+        keys, lats, lons = self._candidates(lat, lon, radius_km)
+        if not keys:
+            return []
+        distances = haversine_km_vec(lat, lon, lats, lons)
+        inside = np.nonzero(distances <= radius_km)[0]
+        order = inside[np.argsort(distances[inside], kind='stable')]
+        return [(keys[i], float(distances[i])) for i in order]
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[Tuple[Hashable, float]]:
+        """
+        Los k puntos más cercanos. Duplica el radio de búsqueda hasta reunir k
+        candidatos; como within_radius es exacto, esos incluyen a los k más cercanos.
+        """
+        if k <= 0 or not self._points:
+            return []
+        k = min(k, len(self._points))
+        radius_km = self.cell_km
+        while True:
+            found = self.within_radius(lat, lon, radius_km)
+            if len(found) >= k:
+                return found[:k]
+            radius_km *= 2
+            if radius_km > 2 * np.pi * EARTH_RADIUS_KM:
+                return found
+
+
+def build_event_index(events: Iterable[Dict], cell_km: float = DEFAULT_CELL_KM, key_field: Optional[str] = None) -> GeoGridIndex:
+    """Índice de eventos con latitude/longitude; la llave es event[key_field] o su posición."""
+    index = GeoGridIndex(cell_km)
+    for position, event in enumerate(events):
+        if event.get('latitude') is None or event.get('longitude') is None:
+            continue
+        index.add(event.get(key_field) if key_field else position, event['latitude'], event['longitude'], event)
+    return index
@@ -0,0 +1,252 @@
+import json
+import os
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Historial local, solo de anexado, de precios de hoteles y eventos scrapeados.
+# Cada tabla es un archivo binario de registros de tamaño fijo (arreglo estructurado
+# de NumPy) que se lee con memmap, así que las consultas por rango filtran columnas
+# vectorizadas sin cargar todo en diccionarios de Python. Los nombres se internan
+# en names.json y los registros guardan solo su id numérico.
+
+HISTORY_DIR = os.path.join('resultados', 'history')
+
+EPOCH = date(1970, 1, 1)
+NO_DATE = np.iinfo(np.int32).min  # fecha desconocida (p. ej. "Fecha por confirmar")
+
+PRICE_DTYPE = np.dtype([
+    ('hotel', '<u4'),        # id en names.json['hotels']
+    ('check_in', '<i4'),     # días desde 1970-01-01
+    ('scraped_at', '<i8'),   # segundos epoch
+    ('price', '<f8'),
+    ('nights', '<u2'),
+])
+
+EVENT_DTYPE = np.dtype([
+    ('event', '<u4'),        # id en names.json['events']
+    ('start', '<i4'),
+    ('end', '<i4'),
+    ('scraped_at', '<i8'),
+    ('latitude', '<f4'),
+    ('longitude', '<f4'),
+    ('distance_km', '<f4'),
+])
+
+
+def to_day(value) -> int:
+    """date/ISO -> días desde 1970-01-01 (NO_DATE si es None)."""
+    if value is None:
+        return NO_DATE
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    if isinstance(value, datetime):
+        value = value.date()
+    return (value - EPOCH).days
+
+
+def from_day(day: int) -> Optional[str]:
+    return None if day == NO_DATE else (EPOCH + timedelta(days=int(day))).isoformat()
+
+
+def to_timestamp(value) -> int:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return int(value.timestamp())
+
+
+class PriceHistoryStore:
+    def __init__(self, root: str = HISTORY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._names_path = os.path.join(root, 'names.json')
+        self._names: Dict[str, List[str]] = {'hotels': [], 'events': []}
+        self._ids: Dict[str, Dict[str, int]] = {'hotels': {}, 'events': {}}
+        if os.path.exists(self._names_path):
+            with open(self._names_path, 'r', encoding='utf-8') as f:
+                self._names.update(json.load(f))
+            for kind, names in self._names.items():
+                self._ids[kind] = {name: i for i, name in enumerate(names)}
+
+    def _path(self, table: str) -> str:
+        return os.path.join(self.root, f'{table}.bin')
+
+    def _intern(self, kind: str, name: str) -> Tuple[int, bool]:
+        """Id del nombre (con el lock tomado); True si es nuevo."""
+        ids = self._ids[kind]
+        if name in ids:
+            return ids[name], False
+        ids[name] = len(self._names[kind])
+        self._names[kind].append(name)
+        return ids[name], True
+
+    def _save_names(self) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self._names, f, ensure_ascii=False)
+        os.replace(tmp_path, self._names_path)
+
+    def _append(self, table: str, records: np.ndarray) -> int:
+        # Se agregan registros completos al final; los lectores solo ven múltiplos del tamaño de registro
+        with open(self._path(table), 'ab') as f:
+            f.write(records.tobytes())
+        return len(records)
+
+    def _read(self, table: str, dtype: np.dtype) -> np.ndarray:
+        path = self._path(table)
+        if not os.path.exists(path):
+            return np.zeros(0, dtype=dtype)
+        count = os.path.getsize(path) // dtype.itemsize
+        if count == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+
+    # --- escritura ---
+
+    def append_prices(self, rows: Iterable[Tuple[str, object, object, float, int]]) -> int:
+        """Agrega filas (hotel, check_in, scraped_at, precio, noches)."""
+        rows = list(rows)
+        if not rows:
+            return 0
+        records = np.zeros(len(rows), dtype=PRICE_DTYPE)
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            interned = [self._intern('hotels', row[0]) for row in rows]
+            if any(is_new for _, is_new in interned):
+                self._save_names()
+            records['hotel'] = [hotel_id for hotel_id, _ in interned]
+            records['check_in'] = [to_day(row[1]) for row in rows]
+            records['scraped_at'] = [to_timestamp(row[2]) for row in rows]
+            records['price'] = [row[3] or 0 for row in rows]
+            records['nights'] = [row[4] or 0 for row in rows]
+            return self._append('hotel_prices', records)
+
+    def append_hotel_scrape(self, hotels: List[Dict], scraped_at: Optional[datetime] = None,
+                            check_in: Optional[date] = None) -> int:
+        """
+        Registra una corrida de scrape_hotels.py. El JSON solo trae precio_promedio
+        por hotel, así que la fecha de check-in por defecto es la del scrape.
+        """
+        scraped_at = scraped_at or datetime.now()
+        check_in = check_in or scraped_at.date()
+        return self.append_prices(
+            (hotel['nombre'], check_in, scraped_at, hotel.get('precio_promedio', 0), hotel.get('noches_contadas', 0))
+            for hotel in hotels if hotel.get('nombre')
+        )
+
+    def append_events(self, events: List[Dict], scraped_at: Optional[datetime] = None) -> int:
+        """Registra eventos scrapeados; start_date/end_date son opcionales (ISO)."""
+        if not events:
+            return 0
+        scraped_at = to_timestamp(scraped_at or datetime.now())
+        records = np.zeros(len(events), dtype=EVENT_DTYPE)
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            interned = [self._intern('events', event.get('nombre') or event.get('name') or '') for event in events]
+            if any(is_new for _, is_new in interned):
+                self._save_names()
+            records['event'] = [event_id for event_id, _ in interned]
+            records['start'] = [to_day(event.get('start_date')) for event in events]
+            records['end'] = [to_day(event.get('end_date') or event.get('start_date')) for event in events]
+            records['scraped_at'] = scraped_at
+            records['latitude'] = [event.get('latitude') if event.get('latitude') is not None else np.nan for event in events]
+            records['longitude'] = [event.get('longitude') if event.get('longitude') is not None else np.nan for event in events]
+            records['distance_km'] = [event.get('distance_km') if event.get('distance_km') is not None else np.nan for event in events]
+            return self._append('events', records)
+
+    # --- lectura ---
+
+    def hotel_id(self, name: str) -> Optional[int]:
+        return self._ids['hotels'].get(name)
+
+    def hotel_name(self, hotel_id: int) -> str:
+        return self._names['hotels'][hotel_id]
+
+    def event_name(self, event_id: int) -> str:
+        return self._names['events'][event_id]
+
+    def query_prices(self, hotel: Optional[str] = None, check_in_from=None, check_in_to=None,
+                     scraped_from=None, scraped_to=None) -> np.ndarray:
+        """Registros de precios que cumplen todos los filtros dados (copia, no memmap)."""
+        records = self._read('hotel_prices', PRICE_DTYPE)
+        mask = np.ones(len(records), dtype=bool)
+        if hotel is not None:
+            hotel_id = self.hotel_id(hotel)
+            if hotel_id is None:
+                return np.zeros(0, dtype=PRICE_DTYPE)
+            mask &= records['hotel'] == hotel_id
+        if check_in_from is not None:
+            mask &= records['check_in'] >= to_day(check_in_from)
+        if check_in_to is not None:
+            mask &= records['check_in'] <= to_day(check_in_to)
+        if scraped_from is not None:
+            mask &= records['scraped_at'] >= to_timestamp(scraped_from)
+        if scraped_to is not None:
+            mask &= records['scraped_at'] <= to_timestamp(scraped_to)
+        return np.array(records[mask])
+
+    def query_events(self, active_from=None, active_to=None, scraped_from=None) -> np.ndarray:
+        """Eventos cuyo intervalo se traslapa con [active_from, active_to]."""
+        records = self._read('events', EVENT_DTYPE)
+        mask = np.ones(len(records), dtype=bool)
+        if active_from is not None:
+            mask &= (records['end'] >= to_day(active_from)) & (records['start'] != NO_DATE)
+        if active_to is not None:
+            mask &= (records['start'] <= to_day(active_to)) & (records['start'] != NO_DATE)
+        if scraped_from is not None:
+            mask &= records['scraped_at'] >= to_timestamp(scraped_from)
+        return np.array(records[mask])
+
+    def price_trend(self, hotel: Optional[str] = None, check_in_from=None, check_in_to=None) -> Dict[str, np.ndarray]:
+        """
+        Promedio, mínimo, máximo y conteo de precios por día de check-in,
+        calculados con operaciones agrupadas de NumPy.
+        """
+        records = self.query_prices(hotel, check_in_from, check_in_to)
+        records = records[records['price'] > 0]
+        if len(records) == 0:
+            empty = np.zeros(0)
+            return {'day': np.zeros(0, dtype=np.int32), 'mean': empty, 'min': empty, 'max': empty,
+                    'count': np.zeros(0, dtype=np.int64)}
+        days, groups = np.unique(records['check_in'], return_inverse=True)
+        counts = np.bincount(groups)
+        sums = np.bincount(groups, weights=records['price'])
+        mins = np.full(len(days), np.inf)
+        maxs = np.full(len(days), -np.inf)
+        np.minimum.at(mins, groups, records['price'])
+        np.maximum.at(maxs, groups, records['price'])
+        return {'day': days, 'mean': sums / counts, 'min': mins, 'max': maxs, 'count': counts}
+
+    def competitor_price_rows(self, check_in_from, check_in_to) -> List[Dict]:
+        """
+        Filas con la forma de competitor_prices (último scrape por hotel y fecha)
+        para alimentar CompetitorPriceIndex desde el historial.
+        """
+        records = self.query_prices(check_in_from=check_in_from, check_in_to=check_in_to)
+        if len(records) == 0:
+            return []
+        order = np.lexsort((records['scraped_at'], records['check_in'], records['hotel']))
+        records = records[order]
+        keys = records[['hotel', 'check_in']]
+        last = np.ones(len(records), dtype=bool)
+        last[:-1] = keys[1:] != keys[:-1]
+        return [
+            {'hotel_name': self.hotel_name(int(r['hotel'])), 'check_in_date': from_day(r['check_in']),
+             'price_per_night': float(r['price'])}
+            for r in records[last]
+        ]
+
+    def price_records_to_dicts(self, records: np.ndarray) -> List[Dict]:
+        return [
+            {
+                'hotel': self.hotel_name(int(r['hotel'])),
+                'check_in_date': from_day(r['check_in']),
+                'scraped_at': datetime.fromtimestamp(int(r['scraped_at'])).isoformat(),
+                'price': float(r['price']),
+                'nights': int(r['nights']),
+            }
+            for r in records
+        ]
@@ -0,0 +1,192 @@
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from backend.jobs.scrape_jobs import FINISHED_STATUSES, SCRAPE_SCRIPTS, ScrapeJobManager
+
+# Refresco programado de los datos del dashboard. Cada fuente se vuelve a
+# scrapear en segundo plano cada cierto intervalo (con jitter para que no
+# coincidan), mientras las lecturas sirven siempre el último archivo de
+# resultados/ al instante (stale-while-revalidate). Si una lectura encuentra
+# datos más viejos que stale_after, dispara el refresco sin esperarlo.
+
+REFRESH_TICK_SECONDS = float(os.getenv('REFRESH_TICK_SECONDS', '5'))
+REFRESH_JITTER = float(os.getenv('REFRESH_JITTER', '0.1'))  # fracción del intervalo
+# Espera mínima entre refrescos disparados por lecturas, para no reintentar un scrape fallido en cada petición
+REFRESH_RETRY_SECONDS = float(os.getenv('REFRESH_RETRY_SECONDS', '300'))
+
+
+class RefreshSource:
+    """Fuente refrescada periódicamente; script es una clave de SCRAPE_SCRIPTS."""
+
+    def __init__(self, name: str, script: str, interval: float, stale_after: Optional[float] = None,
+                 jitter: float = REFRESH_JITTER):
+        if script not in SCRAPE_SCRIPTS:
+            raise ValueError(f"Script de scraping desconocido: {script}")
+        self.name = name
+        self.script = script
+        self.output_file = SCRAPE_SCRIPTS[script][2]
+        self.interval = interval
+        self.stale_after = stale_after if stale_after is not None else interval
+        self.jitter = jitter
+
+
+def default_refresh_sources() -> List[RefreshSource]:
+    """Fuentes del dashboard con intervalos configurables por variable de entorno (segundos)."""
+    return [
+        RefreshSource('hotels', 'scrape_hotels',
+                      float(os.getenv('REFRESH_HOTELS_SECONDS', '3600')),
+                      float(os.getenv('STALE_HOTELS_SECONDS', '7200'))),
+        RefreshSource('events_eventbrite', 'scrapeo_geo',
+                      float(os.getenv('REFRESH_EVENTBRITE_SECONDS', '21600')),
+                      float(os.getenv('STALE_EVENTBRITE_SECONDS', '43200'))),
+        RefreshSource('events_tijuana_eventos', 'scrape_tijuana_eventos',
+                      float(os.getenv('REFRESH_TIJUANA_EVENTOS_SECONDS', '21600')),
+                      float(os.getenv('STALE_TIJUANA_EVENTOS_SECONDS', '43200'))),
+    ]
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp is not None else None
+
+
+class RefreshScheduler:
+    def __init__(self, jobs: ScrapeJobManager, sources: Optional[List[RefreshSource]] = None,
+                 tick: float = REFRESH_TICK_SECONDS, retry_after: float = REFRESH_RETRY_SECONDS,
+                 clock: Callable[[], float] = time.time, rng: Optional[random.Random] = None):
+        self.jobs = jobs
+        self.sources = {source.name: source for source in (sources or default_refresh_sources())}
+        self.tick_seconds = tick
+        self.retry_after = retry_after
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._state: Dict[str, Dict] = {
+            name: {'period': self._sample_period(source), 'job_id': None, 'trigger': None, 'triggered_at': None}
+            for name, source in self.sources.items()
+        }
+
+    def _sample_period(self, source: RefreshSource) -> float:
+        return source.interval * (1 + self._rng.uniform(-source.jitter, source.jitter))
+
+    # --- ciclo en segundo plano ---
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='refresh-scheduler', daemon=True)
+        self._thread.start()
+        print(f"🕒 Refresco programado activo para: {', '.join(self.sources)}")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"❌ Error en el refresco programado: {e}")
+            self._stop.wait(self.tick_seconds)
+
+    def tick(self) -> List[str]:
+        """Dispara las fuentes cuyo siguiente refresco ya venció; devuelve sus nombres."""
+        now = self._clock()
+        triggered = []
+        for name in self.sources:
+            due_at = self._next_refresh_at(name)
+            if now >= due_at and self.trigger(name, 'scheduled') is not None:
+                triggered.append(name)
+        return triggered
+
+    # --- estado por fuente ---
+
+    def updated_at(self, name: str) -> Optional[float]:
+        """mtime del archivo de resultados de la fuente (None si aún no existe)."""
+        try:
+            return os.path.getmtime(self.sources[name].output_file)
+        except OSError:
+            return None
+
+    def _next_refresh_at(self, name: str) -> float:
+        # Un archivo actualizado por otra vía (p. ej. /run-*) también reinicia el intervalo
+        state = self._state[name]
+        last = max(state['triggered_at'] or 0, self.updated_at(name) or 0)
+        return last + state['period']
+
+    def _current_job(self, name: str) -> Optional[Dict]:
+        job_id = self._state[name]['job_id']
+        return self.jobs.get(job_id) if job_id else None
+
+    def is_refreshing(self, name: str) -> bool:
+        job = self._current_job(name)
+        return job is not None and job['status'] not in FINISHED_STATUSES
+
+    def is_stale(self, name: str) -> bool:
+        updated_at = self.updated_at(name)
+        return updated_at is None or self._clock() - updated_at > self.sources[name].stale_after
+
+    def trigger(self, name: str, reason: str = 'manual') -> Optional[Dict]:
+        """Encola el refresco de la fuente; None si ya hay uno en curso."""
+        source = self.sources[name]
+        with self._lock:
+            if self.is_refreshing(name):
+                return None
+            job, _coalesced = self.jobs.submit(source.script)
+            state = self._state[name]
+            state.update(job_id=job['id'], trigger=reason, triggered_at=self._clock(),
+                         period=self._sample_period(source))
+        print(f"🔄 Refresco de {name} en segundo plano ({reason})")
+        return job
+
+    def revalidate(self, name: Optional[str] = None) -> List[str]:
+        """Para lecturas: dispara el refresco de las fuentes viejas sin esperarlo."""
+        triggered = []
+        now = self._clock()
+        for source_name in ([name] if name else self.sources):
+            last_triggered = self._state[source_name]['triggered_at']
+            if last_triggered is not None and now - last_triggered < self.retry_after:
+                continue
+            if self.is_stale(source_name) and self.trigger(source_name, 'stale') is not None:
+                triggered.append(source_name)
+        return triggered
+
+    def freshness(self, name: str) -> Dict:
+        """
+        Frescura de la fuente. No incluye la edad en segundos para que el resultado
+        (y el ETag de las respuestas que lo usan) solo cambie cuando cambia el estado.
+        """
+        source = self.sources[name]
+        state = self._state[name]
+        job = self._current_job(name)
+        return {
+            'updated_at': _isoformat(self.updated_at(name)),
+            'stale': self.is_stale(name),
+            'refreshing': job is not None and job['status'] not in FINISHED_STATUSES,
+            'refresh_interval_s': source.interval,
+            'stale_after_s': source.stale_after,
+            'next_refresh_at': _isoformat(self._next_refresh_at(name)),
+            'last_refresh': {
+                'job_id': state['job_id'],
+                'trigger': state['trigger'],
+                'triggered_at': _isoformat(state['triggered_at']),
+                'status': job['status'] if job else None,
+                'error': job['error'] if job else None,
+            } if state['job_id'] else None,
+        }
+
+    def freshness_all(self) -> Dict[str, Dict]:
+        return {name: self.freshness(name) for name in self.sources}
@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from backend.events.geo_event_cache import geo_cell_key, geo_scrape_args
+from backend.scraping.orchestrator import run_source, scraper_source
+
+# Cola de trabajos de scraping en segundo plano: las peticiones HTTP reciben un
+# job_id de inmediato y un pool acotado ejecuta los scrapes. Peticiones idénticas
+# en curso (mismo script + hotel_name) se unen al mismo trabajo; en scrapeo_geo
+# basta con que los hoteles caigan en la misma celda geográfica.
+
+SCRAPE_JOB_WORKERS = int(os.getenv('SCRAPE_JOB_WORKERS', '2'))
+JOB_RETENTION_SECONDS = int(os.getenv('SCRAPE_JOB_RETENTION_SECONDS', '3600'))
+
+# Scripts permitidos: nombre -> (script, argumentos según hotel_name, archivo de resultados)
+SCRAPE_SCRIPTS = {
+    'scrape_hotels': (
+        'scrape_hotels.py',
+        lambda hotel_name: [],
+        os.path.join('resultados', 'hoteles_tijuana_promedios.json'),
+    ),
+    'scrapeo_geo': (
+        'scrapeo_geo.py',
+        geo_scrape_args,
+        os.path.join('resultados', 'eventos_cercanos.json'),
+    ),
+    'scrape_tijuana_eventos': (
+        'scrape_tijuana_eventos.py',
+        lambda hotel_name: [hotel_name],
+        os.path.join('resultados', 'eventos_tijuana_eventos.json'),
+    ),
+}
+
+# Clave de coalescencia por script según hotel_name (por defecto el propio nombre)
+SCRAPE_JOB_KEYS = {
+    'scrape_hotels': lambda hotel_name: '',
+    'scrapeo_geo': geo_cell_key,
+}
+
+FINISHED_STATUSES = ('succeeded', 'failed', 'timeout', 'cancelled')
+
+
+class ScrapeJobManager:
+    def __init__(self, max_workers: int = SCRAPE_JOB_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scrape-job')
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._in_flight: Dict[Tuple[str, str], str] = {}
+
+    def submit(self, script: str, hotel_name: str = 'Grand Hotel Tijuana') -> Tuple[Dict, bool]:
+        """
+        Encola un scrape y devuelve (trabajo, coalesced). Si ya hay un trabajo igual
+        en cola o en ejecución se devuelve ese mismo con coalesced=True.
+        """
+        if script not in SCRAPE_SCRIPTS:
+            raise ValueError(f"Script de scraping desconocido: {script}")
+        key = (script, SCRAPE_JOB_KEYS.get(script, str)(hotel_name))
+        with self._lock:
+            self._prune()
+            job_id = self._in_flight.get(key)
+            if job_id is not None:
+                job = self._jobs[job_id]
+                job['requests'] += 1
+                return dict(job), True
+
+            job_id = uuid.uuid4().hex
+            job = {
+                'id': job_id,
+                'script': script,
+                'hotel_name': hotel_name,
+                'status': 'queued',
+                'progress': 'En cola',
+                'requests': 1,
+                'created_at': datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'duration_s': None,
+                'result': None,
+                'error': None,
+            }
+            self._jobs[job_id] = job
+            self._cancel_events[job_id] = threading.Event()
+            self._in_flight[key] = job_id
+        self._pool.submit(self._run, job_id, key)
+        return dict(job), False
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self) -> List[Dict]:
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """Marca el trabajo para cancelarse; si ya corre, se termina el subproceso."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job['status'] not in FINISHED_STATUSES:
+                self._cancel_events[job_id].set()
+            return dict(job)
+
+    def _update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _run(self, job_id: str, key: Tuple[str, str]) -> None:
+        job = self._jobs[job_id]
+        cancel_event = self._cancel_events[job_id]
+        script, build_args, output_file = SCRAPE_SCRIPTS[job['script']]
+        try:
+            if cancel_event.is_set():
+                self._update(job_id, status='cancelled', progress='Cancelado antes de iniciar')
+                return
+            started = time.monotonic()
+            self._update(job_id, status='running', progress='Ejecutando scraping',
+                         started_at=datetime.now().isoformat())
+            source = scraper_source(job['script'], script, build_args(job['hotel_name']), output_file)
+            outcome = run_source(source, cancel_event)
+            if outcome['status'] != 'success':
+                status = outcome['status'] if outcome['status'] in ('timeout', 'cancelled') else 'failed'
+                self._update(job_id, status=status, progress='Terminado con error', error=outcome['error'],
+                             duration_s=round(time.monotonic() - started, 3))
+                return
+
+            self._update(job_id, progress='Leyendo resultados')
+            # La versión publicada por esta corrida, aunque otra ya haya movido el puntero
+            result_file = outcome.get('version_file') or output_file
+            result = None
+            if os.path.exists(result_file):
+                with open(result_file, 'r', encoding='utf-8') as f:
+                    result = json.load(f)
+            self._update(job_id, status='succeeded', progress='Completado', result=result,
+                         duration_s=round(time.monotonic() - started, 3))
+        except Exception as e:
+            print(f"❌ Error en trabajo de scraping {job_id}: {e}")
+            self._update(job_id, status='failed', progress='Terminado con error', error=str(e))
+        finally:
+            with self._lock:
+                self._jobs[job_id]['finished_at'] = datetime.now().isoformat()
+                if self._in_flight.get(key) == job_id:
+                    del self._in_flight[key]
+
+    def _prune(self) -> None:
+        """Descarta trabajos terminados más antiguos que JOB_RETENTION_SECONDS (con el lock tomado)."""
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id, job in list(self._jobs.items()):
+            finished_at = job['finished_at']
+            if finished_at and datetime.fromisoformat(finished_at).timestamp() < cutoff:
+                del self._jobs[job_id]
+                del self._cancel_events[job_id]
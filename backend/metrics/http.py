@@ -0,0 +1,55 @@
+import time
+
+from flask import Flask, g, request
+
+from backend.metrics.profiler import SamplingProfiler
+from backend.metrics.registry import METRICS_ENABLED, REQUEST_LATENCY, request_spans, start_request_spans
+
+# Instrumentación de Flask: latencia por endpoint (con la regla de la ruta como
+# etiqueta, p. ej. /api/jobs/<job_id>, para no crear una serie por id), encabezado
+# Server-Timing con las etapas de la petición y perfil de las peticiones lentas.
+# En las respuestas en streaming la latencia se mide hasta que Flask entrega la
+# respuesta, no hasta el último byte.
+
+
+def server_timing(spans, total_s: float) -> str:
+    """Encabezado Server-Timing: milisegundos acumulados por etapa y el total."""
+    totals = {}
+    for stage, elapsed in spans:
+        totals[stage] = totals.get(stage, 0.0) + elapsed
+    parts = [f'{stage};dur={elapsed * 1000:.1f}' for stage, elapsed in totals.items()]
+    parts.append(f'total;dur={total_s * 1000:.1f}')
+    return ', '.join(parts)
+
+
+def instrument_app(app: Flask, profiler: SamplingProfiler) -> None:
+    if not METRICS_ENABLED:
+        return
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        start_request_spans()
+        g.metrics_profiling = profiler.begin()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        REQUEST_LATENCY.observe(elapsed, method=request.method, endpoint=endpoint, status=response.status_code)
+        response.headers['Server-Timing'] = server_timing(request_spans(), elapsed)
+        if g.pop('metrics_profiling', False):
+            profile = profiler.end(f'{request.method} {request.full_path.rstrip("?")}', elapsed)
+            if profile is not None:
+                print(f"🐢 Petición lenta {profile['request']}: {profile['duration_s']}s "
+                      f"({profile['samples']} muestras)")
+        return response
+
+    @app.teardown_request
+    def stop_request_profiling(error=None):
+        # Si after_request no llegó a ejecutarse el hilo se deja de muestrear igual
+        if g.pop('metrics_profiling', False):
+            profiler.end('', 0.0)
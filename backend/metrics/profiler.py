@@ -0,0 +1,131 @@
+import os
+import sys
+import threading
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Perfilador por muestreo para peticiones lentas. Un solo hilo toma cada
+# interval segundos la pila de los hilos que están atendiendo una petición
+# (sys._current_frames) y cuenta las pilas vistas. Al terminar la petición, si
+# duró más que threshold, se guarda su perfil en formato "colapsado" (el que
+# leen flamegraph.pl y speedscope). Está apagado por defecto: activarlo cuesta
+# un hilo extra y una lectura de pilas por intervalo.
+
+PROFILER_ENABLED = os.getenv('PROFILE_SLOW_REQUESTS', '0') == '1'
+PROFILER_INTERVAL = float(os.getenv('PROFILER_INTERVAL_SECONDS', '0.005'))
+PROFILER_THRESHOLD = float(os.getenv('PROFILER_SLOW_SECONDS', '1.0'))
+PROFILER_KEEP = int(os.getenv('PROFILER_KEEP', '20'))
+PROFILER_MAX_DEPTH = 64
+
+
+def _collapse(frame, max_depth: int = PROFILER_MAX_DEPTH) -> str:
+    """Pila como 'archivo:funcion:linea;...' de la llamada más externa a la más interna."""
+    names = []
+    while frame is not None and len(names) < max_depth:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = PROFILER_INTERVAL, threshold: float = PROFILER_THRESHOLD,
+                 keep: int = PROFILER_KEEP, enabled: bool = PROFILER_ENABLED):
+        self.interval = interval
+        self.threshold = threshold
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._active: Dict[int, Counter] = {}
+        self._profiles = deque(maxlen=keep)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def configure(self, enabled: Optional[bool] = None, threshold: Optional[float] = None,
+                  interval: Optional[float] = None) -> Dict:
+        if threshold is not None:
+            self.threshold = float(threshold)
+        if interval is not None:
+            self.interval = max(0.001, float(interval))
+        if enabled is not None:
+            self.enabled = bool(enabled)
+            if not self.enabled:
+                self.stop()
+        return self.status()
+
+    def status(self) -> Dict:
+        with self._lock:
+            active, kept = len(self._active), len(self._profiles)
+        return {'enabled': self.enabled, 'threshold_s': self.threshold, 'interval_s': self.interval,
+                'active_requests': active, 'profiles': kept}
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            samples = [(thread_id, stacks, _collapse(frames[thread_id]))
+                       for thread_id, stacks in active if thread_id in frames]
+            # end() lee el Counter fuera del lock después de sacarlo de _active:
+            # solo se cuenta en los que siguen activos
+            with self._lock:
+                for thread_id, stacks, stack in samples:
+                    if self._active.get(thread_id) is stacks:
+                        stacks[stack] += 1
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self._thread = None
+
+    def begin(self) -> bool:
+        """Empieza a muestrear el hilo actual; False si el perfilador está apagado."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+            self._ensure_thread()
+        return True
+
+    def end(self, label: str, duration_s: float) -> Optional[Dict]:
+        """
+        Deja de muestrear el hilo actual; guarda y devuelve el perfil si la petición
+        fue lenta y alcanzó a tomarse al menos una muestra.
+        """
+        with self._lock:
+            stacks = self._active.pop(threading.get_ident(), None)
+        if not stacks or duration_s < self.threshold:
+            return None
+        profile = {
+            'request': label,
+            'duration_s': round(duration_s, 3),
+            'recorded_at': datetime.now().isoformat(),
+            'samples': sum(stacks.values()),
+            'interval_s': self.interval,
+            'stacks': [{'stack': stack, 'samples': count} for stack, count in stacks.most_common()],
+        }
+        with self._lock:
+            self._profiles.append(profile)
+        return profile
+
+    def profiles(self) -> List[Dict]:
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    @staticmethod
+    def collapsed(profile: Dict) -> str:
+        """Texto 'pila conteo' por línea para flamegraph.pl o speedscope."""
+        return ''.join(f"{entry['stack']} {entry['samples']}\n" for entry in profile['stacks'])
+
+
+profiler = SamplingProfiler()
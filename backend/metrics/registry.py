@@ -0,0 +1,258 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Métricas en memoria del backend (latencia por endpoint, duración por etapa y
+# contadores) expuestas en formato de texto de Prometheus. Todo vive en el
+# proceso: no hay dependencias externas y el costo por observación es un lock y
+# una búsqueda lineal en los buckets.
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+METRIC_PREFIX = 'hotel_'
+# Buckets en segundos: desde lecturas de caché (ms) hasta scrapes completos (minutos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 600.0)
+
+LabelValues = Tuple[str, ...]
+INF_BUCKET = 'le="+Inf"'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Contador monótono con etiquetas."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, float] = {}
+
+    def _key(self, labels: Dict) -> LabelValues:
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}' for key, value in values]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """Histograma acumulativo con etiquetas (buckets en segundos)."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # {etiquetas: [conteo por bucket (no acumulado)..., conteo total, suma]}
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def _key(self, labels: Dict) -> LabelValues:
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        position = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                position = i
+                break
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0, 0.0]
+            if position < len(self.buckets):
+                series[position] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def snapshot(self, **labels) -> Optional[Dict]:
+        """{'count', 'sum', 'buckets': {límite: acumulado}} de una serie, o None si no tiene datos."""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            series = list(series) if series is not None else None
+        if series is None:
+            return None
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.buckets, series):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {'count': series[-2], 'sum': series[-1], 'buckets': buckets}
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        lines = []
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                labels = _format_labels(self.labels, key, f'le="{_format_value(bound)}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(self.labels, key, INF_BUCKET)} {values[-2]}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, key)} {_format_value(values[-1])}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, key)} {values[-2]}')
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class MetricsRegistry:
+    """
+    Registro de métricas por nombre. Además de contadores e histogramas acepta
+    colectores: funciones que al exportar devuelven [(nombre, tipo, ayuda,
+    {etiquetas}, valor)] con contadores que ya llevan otros componentes (cachés, pool).
+    """
+
+    def __init__(self, prefix: str = METRIC_PREFIX):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, object] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple]]] = []
+
+    def _get_or_create(self, factory, name: str, *args, **kwargs):
+        full_name = self.prefix + name
+        with self._lock:
+            metric = self._metrics.get(full_name)
+            if metric is None:
+                metric = self._metrics[full_name] = factory(full_name, *args, **kwargs)
+            elif not isinstance(metric, factory):
+                raise ValueError(f'La métrica {full_name} ya existe con otro tipo')
+            return metric
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labels)
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labels, buckets)
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Todas las métricas en formato de exposición de texto de Prometheus (0.0.4)."""
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []
+        for name, metric in metrics:
+            lines.append(f'# HELP {name} {metric.help}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            lines.extend(metric.render())
+
+        collected: Dict[str, Dict] = {}
+        for collector in self._collectors:
+            try:
+                samples = list(collector())
+            except Exception as e:
+                print(f"❌ Error en colector de métricas: {e}")
+                continue
+            for name, kind, help_text, labels, value in samples:
+                family = collected.setdefault(self.prefix + name, {'kind': kind, 'help': help_text, 'samples': []})
+                family['samples'].append((labels, value))
+        for name, family in sorted(collected.items()):
+            lines.append(f'# HELP {name} {family["help"]}')
+            lines.append(f'# TYPE {name} {family["kind"]}')
+            for labels, value in family['samples']:
+                lines.append(f'{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'Latencia de las peticiones HTTP por endpoint', ('method', 'endpoint', 'status'))
+STAGE_LATENCY = registry.histogram(
+    'stage_duration_seconds', 'Duración de cada etapa (scrape, file_read, db_fetch, pricing, insert, serialize)',
+    ('stage',))
+STAGE_ERRORS = registry.counter('stage_errors_total', 'Etapas que terminaron con excepción', ('stage',))
+SCRAPE_RUNS = registry.counter('scrape_runs_total', 'Scrapes ejecutados por fuente y estado', ('source', 'status'))
+
+# Etapas abiertas en la petición actual: [(etapa, segundos)], para el encabezado Server-Timing
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar('request_spans', default=None)
+
+
+def start_request_spans() -> None:
+    _request_spans.set([])
+
+
+def request_spans() -> List[Tuple[str, float]]:
+    return _request_spans.get() or []
+
+
+@contextmanager
+def span(stage: str):
+    """Mide un bloque como etapa: histograma, errores y (si hay petición) Server-Timing."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_LATENCY.observe(elapsed, stage=stage)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+def timed(stage: str):
+    """Decorador equivalente a envolver la función en span(stage)."""
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,139 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+# Pool de navegadores headless de larga vida para los scrapers. Los WebDriver se
+# crean bajo demanda hasta BROWSER_POOL_SIZE, se prestan a una tarea a la vez y se
+# reciclan después de BROWSER_MAX_USES usos o si la tarea falla con el navegador.
+
+BROWSER_POOL_SIZE = int(os.getenv('BROWSER_POOL_SIZE', '2'))
+BROWSER_MAX_USES = int(os.getenv('BROWSER_MAX_USES', '20'))
+BROWSER_LEASE_TIMEOUT = float(os.getenv('BROWSER_LEASE_TIMEOUT', '300'))
+# Cada cuánto revisa una espera de navegador si quien la pidió ya la abortó
+LEASE_POLL_INTERVAL = 0.5
+
+
+def default_driver_factory():
+    """Chrome headless con Selenium (importado aquí para no exigirlo al arrancar)."""
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    return webdriver.Chrome(options=options)
+
+
+class BrowserPool:
+    def __init__(self, size: int = BROWSER_POOL_SIZE, max_uses: int = BROWSER_MAX_USES,
+                 driver_factory: Callable = default_driver_factory):
+        self.size = size
+        self.max_uses = max_uses
+        self._factory = driver_factory
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: "queue.LifoQueue[Dict]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {
+            'created': 0,
+            'recycled': 0,
+            'crashed': 0,
+            'leases': 0,
+            'in_use': 0,
+            'wait_seconds_total': 0.0,
+            'busy_seconds_total': 0.0,
+        }
+
+    def _new_browser(self) -> Dict:
+        driver = self._factory()
+        with self._lock:
+            self._stats['created'] += 1
+        return {'driver': driver, 'uses': 0}
+
+    def _discard(self, browser: Dict, reason: str) -> None:
+        with self._lock:
+            self._stats[reason] += 1
+        try:
+            browser['driver'].quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def lease(self, timeout: float = BROWSER_LEASE_TIMEOUT, aborted: Optional[threading.Event] = None):
+        """
+        Presta un WebDriver. Si la tarea lanza una excepción el navegador se
+        considera dañado y se descarta; si no, vuelve al pool hasta agotar max_uses.
+        Si aborted se activa (timeout o cancelación de quien pidió el scrape) el
+        navegador también se descarta, aunque la tarea termine sin error, porque
+        quien abortó pudo haberlo cerrado. Una espera abortada lanza RuntimeError.
+        """
+        if self._closed:
+            raise RuntimeError('El pool de navegadores está cerrado')
+        waited = time.monotonic()
+        deadline = waited + timeout
+        while not self._slots.acquire(timeout=max(0.0, min(LEASE_POLL_INTERVAL, deadline - time.monotonic()))):
+            if aborted is not None and aborted.is_set():
+                raise RuntimeError('Préstamo de navegador abortado')
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f'No hay navegadores disponibles después de {timeout:.0f}s')
+        if aborted is not None and aborted.is_set():
+            self._slots.release()
+            raise RuntimeError('Préstamo de navegador abortado')
+        browser = None
+        counted = False
+        started = time.monotonic()
+        try:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                browser = self._new_browser()
+            browser['uses'] += 1
+            with self._lock:
+                self._stats['leases'] += 1
+                self._stats['in_use'] += 1
+                self._stats['wait_seconds_total'] += started - waited
+            counted = True
+            try:
+                yield browser['driver']
+            except BaseException:
+                self._discard(browser, 'crashed')
+                browser = None
+                raise
+        finally:
+            if counted:
+                with self._lock:
+                    self._stats['in_use'] -= 1
+                    self._stats['busy_seconds_total'] += time.monotonic() - started
+            if browser is not None:
+                if aborted is not None and aborted.is_set():
+                    self._discard(browser, 'crashed')
+                elif self._closed or browser['uses'] >= self.max_uses:
+                    self._discard(browser, 'recycled')
+                else:
+                    self._idle.put(browser)
+            self._slots.release()
+
+    def metrics(self) -> Dict:
+        """Utilización del pool: navegadores en uso/ociosos y contadores acumulados."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats['size'] = self.size
+        stats['max_uses'] = self.max_uses
+        stats['idle'] = self._idle.qsize()
+        stats['utilization'] = round(stats['in_use'] / self.size, 3) if self.size else 0.0
+        stats['wait_seconds_total'] = round(stats['wait_seconds_total'], 3)
+        stats['busy_seconds_total'] = round(stats['busy_seconds_total'], 3)
+        return stats
+
+    def shutdown(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(browser, 'recycled')
@@ -0,0 +1,198 @@
+import copy
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend.cache.versioned_store import result_store
+from backend.metrics.registry import SCRAPE_RUNS, span
+from backend.scraping.scraper_service import in_process_task, run_in_pool
+
+# Ejecuta los scripts de scraping en paralelo (como subproceso o en proceso con el
+# pool de navegadores), cada uno con su propio timeout, y reporta estado y duración
+# por fuente. Cada scrape exitoso se publica como versión nueva de su archivo de
+# resultados (ver backend/cache/versioned_store.py).
+
+PYTHON_BIN = os.getenv('SCRAPER_PYTHON', 'python')
+DEFAULT_SCRAPE_TIMEOUT = float(os.getenv('SCRAPE_TIMEOUT_SECONDS', '600'))
+POLL_INTERVAL = 0.5  # segundos entre revisiones de timeout/cancelación
+
+
+def scraper_command(script: str, *args: str) -> List[str]:
+    """Comando para ejecutar python_scripts/<script> con sus argumentos."""
+    return [PYTHON_BIN, os.path.join('python_scripts', script), *args]
+
+
+class ScrapeSource:
+    """
+    Una fuente de scraping: comando a ejecutar y archivo de resultados que produce.
+    script/args permiten ejecutarla dentro del proceso con el pool de navegadores.
+    """
+
+    def __init__(self, name: str, command: List[str], output_file: str, timeout: Optional[float] = None,
+                 script: Optional[str] = None, args: Tuple[str, ...] = ()):
+        self.name = name
+        self.command = command
+        self.output_file = output_file
+        self.timeout = timeout if timeout is not None else DEFAULT_SCRAPE_TIMEOUT
+        self.script = script
+        self.args = tuple(args)
+        # Versión publicada por esta corrida (solo en la copia que reciben los hooks)
+        self.version_file: Optional[str] = None
+
+    def replace(self, **fields) -> 'ScrapeSource':
+        """Copia de la fuente con otros valores (p. ej. output_file de una corrida)."""
+        clone = copy.copy(self)
+        for key, value in fields.items():
+            setattr(clone, key, value)
+        return clone
+
+    @property
+    def result_file(self) -> str:
+        """Archivo con el resultado de esta corrida: su versión o, si no hay, el archivo fijo."""
+        return self.version_file or self.output_file
+
+
+def scraper_source(name: str, script: str, args: List[str], output_file: str, timeout: Optional[float] = None) -> ScrapeSource:
+    """Fuente para python_scripts/<script>; se ejecuta en proceso si el script lo permite."""
+    return ScrapeSource(name, scraper_command(script, *args), output_file, timeout, script=script, args=tuple(args))
+
+
+# Funciones hook(source) que se llaman después de cada scrape exitoso
+_success_hooks: List[Callable[[ScrapeSource], None]] = []
+
+
+def add_success_hook(hook: Callable[[ScrapeSource], None]) -> None:
+    _success_hooks.append(hook)
+
+
+# Un lock por archivo de resultados para los scripts que corren como subproceso: esos
+# escriben siempre el archivo fijo, así que dos corridas no deben encimarse. Los
+# scrapes en proceso escriben un archivo temporal propio y corren sin lock.
+_output_locks: Dict[str, threading.Lock] = {}
+_output_locks_guard = threading.Lock()
+
+
+def _output_lock(output_file: str) -> threading.Lock:
+    with _output_locks_guard:
+        return _output_locks.setdefault(os.path.abspath(output_file or ''), threading.Lock())
+
+
+def run_source(source: ScrapeSource, cancel_event: Optional[threading.Event] = None) -> Dict:
+    """
+    Ejecuta una fuente y espera a que termine, se agote su timeout o se cancele.
+    Nunca lanza excepción: el resultado se describe en 'status'
+    (success, failed, timeout o cancelled).
+    """
+    task = in_process_task(source.script) if source.script else None
+    if task is not None:
+        staging = result_store.staging_path(source.output_file) if source.output_file else ''
+        with span('scrape'):
+            result = run_in_pool(source.replace(output_file=staging or source.output_file), task, cancel_event)
+        try:
+            return _finish_run(source, result, staging or source.output_file)
+        finally:
+            if staging and os.path.exists(staging):
+                os.remove(staging)
+    with _output_lock(source.output_file):
+        with span('scrape'):
+            result = _run_subprocess(source, cancel_event)
+        return _finish_run(source, result, source.output_file)
+
+
+def _finish_run(source: ScrapeSource, result: Dict, produced_file: str) -> Dict:
+    """Publica la versión nueva del archivo de resultados y llama a los hooks con ella."""
+    result['version_file'] = None
+    if result['status'] == 'success' and source.output_file:
+        try:
+            result['version_file'] = result_store.publish(source.output_file, produced_file)
+        except (OSError, ValueError) as e:
+            result['status'] = 'failed'
+            result['error'] = f'Resultados inválidos en {source.output_file}: {e}'
+    SCRAPE_RUNS.inc(source=source.name, status=result['status'])
+    if result['status'] == 'success':
+        published = source.replace(version_file=result['version_file'])
+        for hook in _success_hooks:
+            try:
+                hook(published)
+            except Exception as e:
+                print(f"❌ Error en hook posterior al scraping de {source.name}: {e}")
+    return result
+
+
+def _run_subprocess(source: ScrapeSource, cancel_event: Optional[threading.Event] = None) -> Dict:
+    started_at = datetime.now().isoformat()
+    started = time.monotonic()
+    result = {'status': 'failed', 'started_at': started_at, 'duration_s': 0.0, 'returncode': None,
+              'stdout': '', 'error': None, 'mode': 'subprocess'}
+    try:
+        process = subprocess.Popen(
+            source.command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8'
+        )
+    except OSError as e:
+        result['error'] = str(e)
+        result['duration_s'] = round(time.monotonic() - started, 3)
+        return result
+
+    deadline = started + source.timeout
+    while True:
+        try:
+            stdout, stderr = process.communicate(timeout=POLL_INTERVAL)
+            result['returncode'] = process.returncode
+            result['stdout'] = stdout
+            if process.returncode == 0:
+                result['status'] = 'success'
+            else:
+                result['error'] = stderr
+            break
+        except subprocess.TimeoutExpired:
+            if cancel_event is not None and cancel_event.is_set():
+                result['status'] = 'cancelled'
+            elif time.monotonic() >= deadline:
+                result['status'] = 'timeout'
+                result['error'] = f'Timeout de {source.timeout:.0f}s agotado'
+            else:
+                continue
+            process.kill()
+            process.communicate()
+            break
+
+    result['duration_s'] = round(time.monotonic() - started, 3)
+    return result
+
+
+class ScrapeError(Exception):
+    """Falla de un scrape ejecutado con run_scraper (mismos atributos que CalledProcessError)."""
+
+    def __init__(self, result: Dict):
+        super().__init__(result['error'] or result['status'])
+        self.result = result
+        self.stdout = result['stdout']
+        self.stderr = result['error']
+
+
+def run_scraper(script: str, *args: str, output_file: str = '', timeout: Optional[float] = None) -> Dict:
+    """Ejecuta un solo scraper y lanza ScrapeError si no termina con éxito."""
+    result = run_source(scraper_source(os.path.splitext(script)[0], script, list(args), output_file, timeout))
+    if result['status'] != 'success':
+        raise ScrapeError(result)
+    return result
+
+
+def run_sources(sources: List[ScrapeSource], cancel_event: Optional[threading.Event] = None) -> Dict[str, Dict]:
+    """
+    Lanza todas las fuentes en paralelo y devuelve {nombre: resultado}.
+    Una fuente lenta o fallida no bloquea ni invalida a las demás.
+    """
+    if not sources:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+        futures = {source.name: pool.submit(run_source, source, cancel_event) for source in sources}
+        return {name: future.result() for name, future in futures.items()}
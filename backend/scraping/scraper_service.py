@@ -0,0 +1,128 @@
+import ast
+import importlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from backend.scraping.browser_pool import BrowserPool
+
+# Servicio de scraping dentro del proceso del backend. Si un script de
+# python_scripts/ expone `scrape(driver, *args)`, se ejecuta con un navegador
+# prestado del pool en lugar de arrancar un intérprete y un Chrome nuevos.
+# Los scripts que no lo exponen siguen corriendo como subproceso.
+
+SCRAPER_IN_PROCESS = os.getenv('SCRAPER_IN_PROCESS', '1') == '1'
+SCRAPER_PACKAGE = 'python_scripts'
+POLL_INTERVAL = 0.5
+
+browser_pool = BrowserPool()
+
+_tasks: Dict[str, Optional[Callable]] = {}
+_tasks_lock = threading.Lock()
+
+
+def _defines_scrape(path: str) -> bool:
+    """Revisa sin importar el módulo que tenga una función scrape() de nivel superior."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError):
+        return False
+    return any(isinstance(node, ast.FunctionDef) and node.name == 'scrape' for node in tree.body)
+
+
+def in_process_task(script: str) -> Optional[Callable]:
+    """La función scrape del script, o None si debe ejecutarse como subproceso."""
+    if not SCRAPER_IN_PROCESS:
+        return None
+    with _tasks_lock:
+        if script not in _tasks:
+            task = None
+            if _defines_scrape(os.path.join(SCRAPER_PACKAGE, script)):
+                try:
+                    module = importlib.import_module(f"{SCRAPER_PACKAGE}.{os.path.splitext(script)[0]}")
+                    task = getattr(module, 'scrape', None)
+                except Exception as e:
+                    print(f"❌ No se pudo cargar {script} en proceso: {e}")
+            _tasks[script] = task if callable(task) else None
+        return _tasks[script]
+
+
+def _write_json(path: str, data, aborted: Optional[threading.Event] = None) -> None:
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        # Último chequeo antes de publicar: si se abortó, quien lanzó el scrape ya limpió el destino
+        if aborted is not None and aborted.is_set():
+            os.remove(tmp_path)
+            return
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def run_in_pool(source, task: Callable, cancel_event: Optional[threading.Event] = None) -> Dict:
+    """
+    Ejecuta task(driver, *source.args) con un navegador del pool y guarda lo que
+    devuelve en source.output_file. Devuelve el mismo formato que run_source.
+    Si se agota el timeout o se cancela, se cierra el navegador para abortar la tarea.
+    """
+    started_at = datetime.now().isoformat()
+    started = time.monotonic()
+    result = {'status': 'failed', 'started_at': started_at, 'duration_s': 0.0, 'returncode': None,
+              'stdout': '', 'error': None, 'mode': 'in_process'}
+    state = {'driver': None, 'error': None, 'done': False}
+    # Se activa al reportar timeout o cancelación: el hilo puede seguir vivo y no debe
+    # devolver el navegador al pool ni escribir un resultado que ya nadie espera
+    aborted = threading.Event()
+
+    def work():
+        try:
+            with browser_pool.lease(timeout=source.timeout, aborted=aborted) as driver:
+                state['driver'] = driver
+                data = task(driver, *source.args)
+            if aborted.is_set():
+                return
+            _write_json(source.output_file, data, aborted)
+            state['done'] = True
+        except Exception as e:
+            state['error'] = str(e)
+
+    worker = threading.Thread(target=work, name=f'scrape-{source.name}', daemon=True)
+    worker.start()
+    deadline = started + source.timeout
+    while worker.is_alive():
+        worker.join(POLL_INTERVAL)
+        if not worker.is_alive():
+            break
+        if cancel_event is not None and cancel_event.is_set():
+            result['status'] = 'cancelled'
+        elif time.monotonic() >= deadline:
+            result['status'] = 'timeout'
+            result['error'] = f'Timeout de {source.timeout:.0f}s agotado'
+        else:
+            continue
+        aborted.set()
+        if state['driver'] is not None:
+            try:
+                state['driver'].quit()
+            except Exception:
+                pass
+        result['duration_s'] = round(time.monotonic() - started, 3)
+        return result
+
+    if state['done']:
+        result['status'] = 'success'
+    else:
+        result['error'] = state['error']
+    result['duration_s'] = round(time.monotonic() - started, 3)
+    return result
@@ -1,13 +1,44 @@
-from flask import Flask, jsonify, send_file, request
+from flask import Flask, jsonify, send_file, request, stream_with_context
 from flask_cors import CORS
-import subprocess
 import os
-import requests
+from concurrent.futures import ThreadPoolExecutor
 import json
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import date, datetime
 from flask import request, jsonify
 from backend.ai_engine.price_optimizer import get_price_recommendations
+from backend.ai_engine.vectorized_optimizer import get_price_recommendations_vectorized
+from backend.ai_engine.incremental import generate_incremental_recommendations
+from backend.ai_engine.batch_pricing import EXECUTORS, MARKET_ENGINES, iter_batch_recommendations, prepare_batch
+from backend.ai_engine.backtest import (
+    EXECUTORS as BACKTEST_EXECUTORS,
+    METRICS as BACKTEST_METRICS,
+    SEARCHES,
+    default_config,
+    evaluate_config,
+    grid_configs,
+    load_backtest_market,
+    market_summary,
+    random_configs,
+    rank_results,
+    run_backtest,
+)
+from backend.db.supabase_client import bulk_write_recommendations
+from backend.scraping.orchestrator import ScrapeError, add_success_hook, run_scraper, run_sources, scraper_source
+from backend.scraping.scraper_service import browser_pool
+from backend.jobs.scrape_jobs import ScrapeJobManager
+from backend.jobs.refresh_scheduler import RefreshScheduler
+from backend.db.rest_client import SupabaseRestClient, DEFAULT_PAGE_SIZE
+from backend.history.price_history import PriceHistoryStore, from_day
+from backend.events.event_dates import build_event_date_table, normalize_events, parse_cache_info
+from backend.events.dedup import dedupe_events
+from backend.events.geo_event_cache import GeoEventCache, entry_metadata
+from backend.api.streaming import STREAM_FORMATS, json_chunks, ndjson_lines, parse_fields
+from backend.cache.file_cache import JsonFileCache, ResponseCache, combine_etags, hotel_price_stats
+from backend.cache.versioned_store import result_store
+from backend.metrics.registry import registry
+from backend.metrics.profiler import profiler
+from backend.metrics.http import instrument_app
 # Se asume que la instancia global 'supabase' ya está creada en este archivo
 
 # Load environment variables
@@ -15,106 +46,302 @@ load_dotenv()
 
 app = Flask(__name__)
 CORS(app)
+instrument_app(app, profiler)
 
 # Supabase configuration (server-side only)
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_ANON_KEY = os.getenv('SUPABASE_ANON_KEY')
 
-@app.route('/api/data/existing', methods=['GET'])
-def get_existing_data():
-    """Get existing data without running scraping"""
+# Motores de precios disponibles (misma firma y misma salida)
+PRICING_ENGINES = {
+    'rules': get_price_recommendations,
+    'vectorized': get_price_recommendations_vectorized,
+}
+# Formatos de /api/ai/generate-recommendations además de la lista de diccionarios (None)
+RECOMMENDATION_EXPORTS = (None, 'columns', 'csv', 'npz')
+
+# Cliente REST compartido (pool de conexiones + caché TTL) para /api/events y /api/hotels
+supabase_rest = SupabaseRestClient(SUPABASE_URL, SUPABASE_ANON_KEY) if SUPABASE_URL and SUPABASE_ANON_KEY else None
+
+def supabase_table_page(table):
+    """Página de una tabla de Supabase según ?limit=&offset=&cursor="""
+    if supabase_rest is None:
+        return jsonify({'error': 'Supabase configuration missing'}), 500
     try:
-        hotels_data = []
-        events_eventbrite_data = []
-        events_tijuana_data = []
-        
-        # Try to read existing hotel data
-        hotels_file = os.path.join('resultados', 'hoteles_tijuana_promedios.json')
-        if os.path.exists(hotels_file):
-            with open(hotels_file, 'r', encoding='utf-8') as f:
-                hotels_data = json.load(f)
-        
-        # Try to read existing Eventbrite events data
-        events_eventbrite_file = os.path.join('resultados', 'eventos_cercanos.json')
-        if os.path.exists(events_eventbrite_file):
-            with open(events_eventbrite_file, 'r', encoding='utf-8') as f:
-                events_eventbrite_data = json.load(f)
-        
-        # Try to read existing tijuanaeventos.com data
-        events_tijuana_file = os.path.join('resultados', 'eventos_tijuana_eventos.json')
-        if os.path.exists(events_tijuana_file):
-            with open(events_tijuana_file, 'r', encoding='utf-8') as f:
-                events_tijuana_data = json.load(f)
-        
-        # Combine all events
-        all_events = events_eventbrite_data + events_tijuana_data
-        
-        # Calculate analytics if we have data
-        analytics = None
-        if hotels_data or all_events:
-            total_hotels = len(hotels_data)
-            total_events = len(all_events)
-            events_eventbrite_count = len(events_eventbrite_data)
-            events_tijuana_count = len(events_tijuana_data)
-            
-            if hotels_data:
-                avg_price = sum(hotel.get('precio_promedio', 0) for hotel in hotels_data) / total_hotels
-                min_price = min(hotel.get('precio_promedio', 0) for hotel in hotels_data)
-                max_price = max(hotel.get('precio_promedio', 0) for hotel in hotels_data)
-            else:
-                avg_price = min_price = max_price = 0
-            
-            analytics = {
-                'total_hotels': total_hotels,
-                'total_events': total_events,
-                'events_eventbrite': events_eventbrite_count,
-                'events_tijuana_eventos': events_tijuana_count,
-                'average_price': round(avg_price, 2),
-                'min_price': min_price,
-                'max_price': max_price
-            }
-        
+        status, page = supabase_rest.fetch_page(
+            table,
+            limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+            offset=request.args.get('offset', type=int),
+            cursor=request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    if status != 200:
+        return jsonify({'error': f'Supabase error: {status}'}), status
+    response = jsonify(page['rows'])
+    if page['next_cursor']:
+        response.headers['X-Next-Cursor'] = page['next_cursor']
+    if page['next_offset'] is not None:
+        response.headers['X-Next-Offset'] = str(page['next_offset'])
+    return response
+
+# Archivos de resultados del scraping
+HOTELS_FILE = os.path.join('resultados', 'hoteles_tijuana_promedios.json')
+EVENTS_EVENTBRITE_FILE = os.path.join('resultados', 'eventos_cercanos.json')
+EVENTS_TIJUANA_FILE = os.path.join('resultados', 'eventos_tijuana_eventos.json')
+
+# Caché de resultados/ (lee la última versión publicada; se invalida al cambiar) y de respuestas serializadas
+resultados_cache = JsonFileCache(resolve=result_store.resolve)
+response_cache = ResponseCache()
+
+def cached_json_response(body, etag):
+    """Respuesta JSON con ETag; devuelve 304 si coincide con If-None-Match"""
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+def build_analytics(hotel_stats, events_eventbrite_count, events_tijuana_count, unique_events_count=None):
+    """
+    Analytics del dashboard a partir de las estadísticas precalculadas de hoteles.
+    total_events cuenta eventos únicos (sin duplicados entre fuentes) si se conoce.
+    """
+    raw_events_count = events_eventbrite_count + events_tijuana_count
+    total_events = raw_events_count if unique_events_count is None else unique_events_count
+    return {
+        'total_hotels': hotel_stats['total_hotels'],
+        'total_events': total_events,
+        'duplicate_events': raw_events_count - total_events,
+        'events_eventbrite': events_eventbrite_count,
+        'events_tijuana_eventos': events_tijuana_count,
+        'average_price': round(hotel_stats['average_price'], 2),
+        'min_price': hotel_stats['min_price'],
+        'max_price': hotel_stats['max_price']
+    }
+
+def file_date(path):
+    """Día en que se escribió el archivo (referencia para fechas relativas como "Today")"""
+    return datetime.fromtimestamp(os.path.getmtime(path)).date() if os.path.exists(path) else None
+
+def merge_dashboard_events(events_eventbrite, events_tijuana, reference=None):
+    """Eventos de ambas fuentes fusionados en registros canónicos con su procedencia"""
+    tagged = ([{**event, 'source': 'eventbrite'} for event in events_eventbrite] +
+              [{**event, 'source': 'tijuanaeventos'} for event in events_tijuana])
+    return dedupe_events(tagged, reference)['events']
+
+# Eventos fusionados por versión de los archivos de eventos (la deduplicación no se repite por petición)
+merged_events_cache = ResponseCache()
+
+def dashboard_stream_response(hotels, events_eventbrite, events_tijuana, analytics, metadata):
+    """
+    Respuesta generada registro por registro si se pidió ?format=ndjson|stream o ?fields=.
+    No repite los eventos en 'events'. Devuelve None para el JSON normal.
+    """
+    response_format = request.args.get('format')
+    fields = parse_fields(request.args.get('fields'))
+    if response_format not in STREAM_FORMATS and fields is None:
+        return None
+    sections = [
+        ('hotels', 'hotel', hotels),
+        ('events_eventbrite', 'event', events_eventbrite),
+        ('events_tijuana_eventos', 'event', events_tijuana),
+    ]
+    if response_format == 'ndjson':
+        return app.response_class(stream_with_context(ndjson_lines(sections, fields, metadata, analytics)),
+                                  mimetype='application/x-ndjson')
+    return app.response_class(stream_with_context(json_chunks(sections, fields, {'analytics': analytics, 'metadata': metadata})),
+                              mimetype='application/json')
+
+# Historial de precios y eventos: cada scrape exitoso se anexa al almacén columnar
+price_history = PriceHistoryStore()
+
+def load_run_result(source):
+    """
+    Datos que publicó la corrida de un hook. Si sigue siendo la versión vigente se
+    leen por la caché (que los lectores van a pedir enseguida); si otro scrape ya
+    publicó una más nueva se lee la versión de esta corrida directamente.
+    """
+    if result_store.resolve(source.output_file) == source.result_file:
+        return resultados_cache.load(source.output_file)
+    with open(source.result_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def record_scrape_history(source):
+    """Hook del orquestador: guarda en el historial el resultado de cada scrape"""
+    data = load_run_result(source) if source.output_file else None
+    if not data:
+        return
+    if source.output_file == HOTELS_FILE:
+        price_history.append_hotel_scrape(data)
+    elif source.output_file in (EVENTS_EVENTBRITE_FILE, EVENTS_TIJUANA_FILE):
+        normalized = normalize_events(data)
+        price_history.append_events(normalized['events'] + normalized['undated'])
+
+add_success_hook(record_scrape_history)
+
+# Scrapes de Eventbrite por celda geográfica del hotel (con TTL, compartidos entre hoteles cercanos)
+event_cache = GeoEventCache()
+add_success_hook(event_cache.record_scrape)
+
+def event_source_status(outcome):
+    """Estado de la fuente events_eventbrite a partir de GeoEventCache.get_or_scrape"""
+    return {
+        'status': outcome['status'],
+        'duration_s': outcome['duration_s'],
+        'started_at': outcome['started_at'],
+        'error': outcome['error'],
+        'mode': outcome['mode'],
+        'cache': outcome['cache'],
+        **entry_metadata(outcome['entry'])
+    }
+
+def scraped_events_with_dates():
+    """
+    Eventos de Eventbrite y tijuanaeventos con start_date/end_date ISO. Las fechas
+    relativas ("Today", "Friday") se resuelven contra el día en que se scrapeó cada archivo.
+    """
+    events, undated, etags = [], [], []
+    for source_name, path in (('eventbrite', EVENTS_EVENTBRITE_FILE), ('tijuanaeventos', EVENTS_TIJUANA_FILE)):
+        entry = resultados_cache.get(path)
+        etags.append(entry['etag'] if entry else None)
+        if entry is None:
+            continue
+        normalized = normalize_events(entry['data'], file_date(path), source=source_name)
+        events.extend(normalized['events'])
+        undated.extend({**event, 'source': source_name} for event in normalized['undated'])
+    # El mismo evento publicado en ambas fuentes (o scrapeado dos veces) queda una sola vez
+    return dedupe_events(events)['events'], dedupe_events(undated)['events'], combine_etags(*etags)
+
+# Cola de scraping en segundo plano (ver /api/jobs)
+scrape_jobs = ScrapeJobManager()
+
+def wants_async():
+    """True si la petición pide ejecución asíncrona (?async=1 o {"async": true})"""
+    flag = request.args.get('async')
+    if flag is None and request.is_json:
+        flag = (request.get_json(silent=True) or {}).get('async')
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+def enqueue_scrape(script, hotel_name='Grand Hotel Tijuana'):
+    """Encola un scrape y responde 202 con el job_id"""
+    job, coalesced = scrape_jobs.submit(script, hotel_name)
+    return jsonify({
+        'job_id': job['id'],
+        'status': job['status'],
+        'coalesced': coalesced,
+        'status_url': f"/api/jobs/{job['id']}"
+    }), 202
+
+# Refresco programado de hoteles, Eventbrite y tijuanaeventos (stale-while-revalidate)
+refresh_scheduler = RefreshScheduler(scrape_jobs)
+
+def snapshot_response(source_label, freshness=None):
+    """
+    Dashboard armado con los últimos archivos de resultados/, sin esperar scraping.
+    freshness ({fuente: estado}) se agrega a metadata.sources y forma parte del ETag.
+    """
+    hotels_entry = resultados_cache.get(HOTELS_FILE, analyze=hotel_price_stats)
+    events_eventbrite_entry = resultados_cache.get(EVENTS_EVENTBRITE_FILE)
+    events_tijuana_entry = resultados_cache.get(EVENTS_TIJUANA_FILE)
+    etag = combine_etags(*(entry['etag'] if entry else None
+                           for entry in (hotels_entry, events_eventbrite_entry, events_tijuana_entry)),
+                         json.dumps(freshness, sort_keys=True) if freshness else None)
+    hotels_data = hotels_entry['data'] if hotels_entry else []
+    events_eventbrite_data = events_eventbrite_entry['data'] if events_eventbrite_entry else []
+    events_tijuana_data = events_tijuana_entry['data'] if events_tijuana_entry else []
+    
+    events_etag = combine_etags(*(entry['etag'] if entry else None
+                                  for entry in (events_eventbrite_entry, events_tijuana_entry)))
+    all_events = merged_events_cache.get_or_build('dashboard_events', events_etag, lambda: merge_dashboard_events(
+        events_eventbrite_data, events_tijuana_data, file_date(EVENTS_EVENTBRITE_FILE)))
+    
+    # Calculate analytics if we have data
+    analytics = None
+    if hotels_data or events_eventbrite_data or events_tijuana_data:
+        hotel_stats = hotels_entry['analytics'] if hotels_entry else hotel_price_stats([])
+        analytics = build_analytics(hotel_stats, len(events_eventbrite_data), len(events_tijuana_data), len(all_events))
+    
+    metadata = {
+        'scraped_at': datetime.now().isoformat(),
+        'source': source_label
+    }
+    if freshness:
+        metadata['sources'] = freshness
+    
+    streamed = dashboard_stream_response(hotels_data, events_eventbrite_data, events_tijuana_data, analytics, metadata)
+    if streamed is not None:
+        return streamed
+    
+    def build_body():
         response_data = {
             'hotels': hotels_data,
             'events': all_events,
             'events_eventbrite': events_eventbrite_data,
             'events_tijuana_eventos': events_tijuana_data,
             'analytics': analytics,
-            'metadata': {
-                'scraped_at': datetime.now().isoformat(),
-                'source': 'existing_data'
-            }
+            'metadata': metadata
         }
-        
-        return jsonify(response_data), 200
-        
+        return app.json.dumps(response_data).encode('utf-8')
+    
+    # Solo se vuelve a serializar cuando cambia alguno de los archivos (o su frescura)
+    body = response_cache.get_or_build(source_label, etag, build_body)
+    return cached_json_response(body, etag)
+
+@app.route('/api/data/existing', methods=['GET'])
+def get_existing_data():
+    """Get existing data without running scraping"""
+    try:
+        return snapshot_response('existing_data')
     except Exception as e:
         print(f"❌ Error obteniendo datos existentes: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/dashboard', methods=['GET'])
+def get_dashboard_snapshot():
+    """
+    Último snapshot del dashboard al instante, con la frescura de cada fuente.
+    Las fuentes más viejas que su umbral se refrescan en segundo plano.
+    """
+    try:
+        refresh_scheduler.revalidate()
+        return snapshot_response('snapshot', refresh_scheduler.freshness_all())
+    except Exception as e:
+        print(f"❌ Error obteniendo snapshot del dashboard: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/refresh', methods=['GET'])
+def get_refresh_status():
+    return jsonify({'running': refresh_scheduler.running, 'sources': refresh_scheduler.freshness_all()})
+
+@app.route('/api/refresh/<source_name>', methods=['POST'])
+def trigger_refresh(source_name):
+    """Fuerza el refresco en segundo plano de una fuente (hotels, events_eventbrite, events_tijuana_eventos)"""
+    if source_name not in refresh_scheduler.sources:
+        return jsonify({'error': f'Fuente desconocida: {source_name}'}), 404
+    job = refresh_scheduler.trigger(source_name)
+    return jsonify({
+        'triggered': job is not None,
+        'source': refresh_scheduler.freshness(source_name)
+    }), 202
+
 @app.route('/api/hotels/live', methods=['GET'])
 def get_hotels_live():
     """Get hotels data directly from web scraping"""
+    if wants_async():
+        return enqueue_scrape('scrape_hotels')
     try:
         print("🔄 Iniciando scraping de hoteles en tiempo real...")
         
         # Run the scraping script
-        result = subprocess.run(
-            ['python', 'python_scripts/scrape_hotels.py'],
-            capture_output=True,
-            text=True,
-            check=True,
-            encoding='utf-8'
-        )
+        result = run_scraper('scrape_hotels.py', output_file=HOTELS_FILE)
         
         print("✅ Scraping completado, obteniendo datos...")
         
         # Read the latest results
-        filename = os.path.join('resultados', 'hoteles_tijuana_promedios.json')
-        if os.path.exists(filename):
-            with open(filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
+        filename = HOTELS_FILE
+        data = resultados_cache.load(filename)
+        if data is not None:
             # Add metadata
             response_data = {
                 'hotels': data,
@@ -129,7 +356,7 @@ def get_hotels_live():
         else:
             return jsonify({'error': 'No se encontraron datos de hoteles'}), 404
             
-    except subprocess.CalledProcessError as e:
+    except ScrapeError as e:
         print(f"❌ Error en scraping: {e.stderr}")
         return jsonify({'error': f'Error en scraping: {e.stderr}'}), 500
     except Exception as e:
@@ -142,44 +369,33 @@ def get_events_live():
     try:
         # Get hotel name from query params or use default
         hotel_name = request.args.get('hotel_name', 'Grand Hotel Tijuana')
-        
-        print(f"🔄 Iniciando scraping de eventos para {hotel_name}...")
-        
-        # Run the geo scraping script
-        result = subprocess.run(
-            ['python', 'python_scripts/scrapeo_geo.py', '32.5149,-117.0382', hotel_name],
-            capture_output=True,
-            text=True,
-            check=True,
-            encoding='utf-8'
-        )
-        
-        print("✅ Scraping de eventos completado, obteniendo datos...")
-        
-        # Read the latest results
-        filename = os.path.join('resultados', 'eventos_cercanos.json')
-        if os.path.exists(filename):
-            with open(filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Add metadata
-            response_data = {
-                'events': data,
-                'metadata': {
-                    'total_events': len(data),
-                    'hotel_reference': hotel_name,
-                    'scraped_at': datetime.now().isoformat(),
-                    'source': 'live_scraping'
-                }
+        force = request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+        # En modo asíncrono solo se encola si la celda del hotel no tiene un scrape vigente
+        if wants_async() and (force or event_cache.lookup(hotel_name) is None):
+            return enqueue_scrape('scrapeo_geo', hotel_name)
+        
+        print(f"🔄 Obteniendo eventos para {hotel_name} (caché por celda geográfica)...")
+        outcome = event_cache.get_or_scrape(hotel_name, force=force)
+        if outcome['status'] != 'success':
+            print(f"❌ Error en scraping: {outcome['error']}")
+            return jsonify({'error': f"Error en scraping: {outcome['error']}"}), 500
+        
+        entry = outcome['entry']
+        print(f"✅ Eventos de la celda {entry['cell_id']} ({outcome['cache']})")
+        response_data = {
+            'events': entry['events'],
+            'metadata': {
+                'total_events': len(entry['events']),
+                'hotel_reference': hotel_name,
+                'scraped_at': datetime.fromtimestamp(entry['scraped_at']).isoformat(),
+                'source': 'live_scraping' if outcome['cache'] == 'miss' else 'event_cache',
+                'cache': outcome['cache'],
+                **entry_metadata(entry)
             }
+        }
+        
+        return jsonify(response_data), 200
             
-            return jsonify(response_data), 200
-        else:
-            return jsonify({'error': 'No se encontraron datos de eventos'}), 404
-            
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error en scraping: {e.stderr}")
-        return jsonify({'error': f'Error en scraping: {e.stderr}'}), 500
     except Exception as e:
         print(f"❌ Error general: {e}")
         return jsonify({'error': str(e)}), 500
@@ -190,26 +406,20 @@ def get_tijuana_eventos():
     try:
         # Get hotel name from query params or use default
         hotel_name = request.args.get('hotel_name', 'Grand Hotel Tijuana')
+        if wants_async():
+            return enqueue_scrape('scrape_tijuana_eventos', hotel_name)
         
         print(f"🔄 Iniciando scraping de tijuanaeventos.com para {hotel_name}...")
         
         # Run the tijuana eventos scraping script
-        result = subprocess.run(
-            ['python', 'python_scripts/scrape_tijuana_eventos.py', hotel_name],
-            capture_output=True,
-            text=True,
-            check=True,
-            encoding='utf-8'
-        )
+        result = run_scraper('scrape_tijuana_eventos.py', hotel_name, output_file=EVENTS_TIJUANA_FILE)
         
         print("✅ Scraping de tijuanaeventos.com completado, obteniendo datos...")
         
         # Read the latest results
-        filename = os.path.join('resultados', 'eventos_tijuana_eventos.json')
-        if os.path.exists(filename):
-            with open(filename, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
+        filename = EVENTS_TIJUANA_FILE
+        data = resultados_cache.load(filename)
+        if data is not None:
             # Add metadata
             response_data = {
                 'events': data,
@@ -225,7 +435,7 @@ def get_tijuana_eventos():
         else:
             return jsonify({'error': 'No se encontraron datos de eventos de tijuanaeventos.com'}), 404
             
-    except subprocess.CalledProcessError as e:
+    except ScrapeError as e:
         print(f"❌ Error en scraping de tijuanaeventos.com: {e.stderr}")
         return jsonify({'error': f'Error en scraping: {e.stderr}'}), 500
     except Exception as e:
@@ -235,115 +445,104 @@ def get_tijuana_eventos():
 @app.route('/api/dashboard/live', methods=['GET'])
 def get_dashboard_live():
     """Get complete dashboard data from live scraping"""
+    hotel_name = request.args.get('hotel_name', 'Grand Hotel Tijuana')
+    if wants_async():
+        jobs = {}
+        for name, script in (('hotels', 'scrape_hotels'), ('events_eventbrite', 'scrapeo_geo'),
+                             ('events_tijuana_eventos', 'scrape_tijuana_eventos')):
+            job, coalesced = scrape_jobs.submit(script, hotel_name)
+            jobs[name] = {'job_id': job['id'], 'status': job['status'], 'coalesced': coalesced,
+                          'status_url': f"/api/jobs/{job['id']}"}
+        return jsonify({'jobs': jobs}), 202
     try:
-        print("🔄 Iniciando scraping completo para dashboard...")
-        
-        # Scrape hotels
-        print("🏨 Scraping hoteles...")
-        hotels_result = subprocess.run(
-            ['python', 'python_scripts/scrape_hotels.py'],
-            capture_output=True,
-            text=True,
-            check=True,
-            encoding='utf-8'
-        )
-        
-        # Scrape events from Eventbrite
-        print("🎫 Scraping eventos de Eventbrite...")
-        events_result = subprocess.run(
-            ['python', 'python_scripts/scrapeo_geo.py', '32.5149,-117.0382', 'Grand Hotel Tijuana'],
-            capture_output=True,
-            text=True,
-            check=True,
-            encoding='utf-8'
-        )
-        
-        # Scrape events from tijuanaeventos.com
-        print("🎫 Scraping eventos de tijuanaeventos.com...")
-        tijuana_eventos_result = subprocess.run(
-            ['python', 'python_scripts/scrape_tijuana_eventos.py', 'Grand Hotel Tijuana'],
-            capture_output=True,
-            text=True,
-            check=True,
-            encoding='utf-8'
-        )
-        
-        # Read results
-        hotels_data = []
-        events_data = []
-        tijuana_eventos_data = []
-        
-        hotels_file = os.path.join('resultados', 'hoteles_tijuana_promedios.json')
-        events_file = os.path.join('resultados', 'eventos_cercanos.json')
-        tijuana_eventos_file = os.path.join('resultados', 'eventos_tijuana_eventos.json')
-        
-        if os.path.exists(hotels_file):
-            with open(hotels_file, 'r', encoding='utf-8') as f:
-                hotels_data = json.load(f)
-        
-        if os.path.exists(events_file):
-            with open(events_file, 'r', encoding='utf-8') as f:
-                events_data = json.load(f)
-        
-        if os.path.exists(tijuana_eventos_file):
-            with open(tijuana_eventos_file, 'r', encoding='utf-8') as f:
-                tijuana_eventos_data = json.load(f)
-        
-        # Combine all events
-        all_events = events_data + tijuana_eventos_data
+        print("🔄 Iniciando scraping completo para dashboard (fuentes en paralelo)...")
+        
+        sources = [
+            scraper_source('hotels', 'scrape_hotels.py', [], HOTELS_FILE),
+            scraper_source('events_tijuana_eventos', 'scrape_tijuana_eventos.py', [hotel_name],
+                           EVENTS_TIJUANA_FILE),
+        ]
+        # Eventbrite sale de la caché por celda del hotel; solo se scrapea si no está vigente
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            events_future = pool.submit(event_cache.get_or_scrape, hotel_name)
+            results = run_sources(sources)
+            events_outcome = events_future.result()
+        
+        # Read results only for the sources that succeeded
+        source_entries = {}
+        source_status = {}
+        for source in sources:
+            result = results[source.name]
+            source_entries[source.name] = None
+            if result['status'] == 'success':
+                analyze = hotel_price_stats if source.name == 'hotels' else None
+                source_entries[source.name] = resultados_cache.get(source.output_file, analyze=analyze)
+            if result['status'] == 'success' and source_entries[source.name] is None:
+                result['status'] = 'failed'
+                result['error'] = 'No se encontró el archivo de resultados'
+            if result['status'] != 'success':
+                print(f"❌ Fuente {source.name}: {result['status']} - {result['error']}")
+            source_status[source.name] = {
+                'status': result['status'],
+                'duration_s': result['duration_s'],
+                'started_at': result['started_at'],
+                'error': result['error'],
+                'mode': result['mode']
+            }
+        source_status['events_eventbrite'] = event_source_status(events_outcome)
+        if events_outcome['status'] != 'success':
+            print(f"❌ Fuente events_eventbrite: {events_outcome['status']} - {events_outcome['error']}")
+        
+        if not any(status['status'] == 'success' for status in source_status.values()):
+            return jsonify({'error': 'Todas las fuentes de scraping fallaron', 'metadata': {'sources': source_status}}), 502
+        
+        hotels_entry = source_entries['hotels']
+        hotels_data = hotels_entry['data'] if hotels_entry else []
+        events_data = events_outcome['entry']['events'] if events_outcome['entry'] else []
+        tijuana_eventos_data = (source_entries['events_tijuana_eventos']['data']
+                                if source_entries['events_tijuana_eventos'] else [])
+        
+        # Analytics precalculadas por la caché (una sola pasada por versión del archivo)
+        hotel_stats = hotels_entry['analytics'] if hotels_entry else hotel_price_stats([])
+        metadata = {
+            'scraped_at': datetime.now().isoformat(),
+            'source': 'live_scraping',
+            'hotel_reference': hotel_name,
+            'sources': source_status,
+            'partial': any(status['status'] != 'success' for status in source_status.values())
+        }
         
-        # Calculate analytics
-        total_hotels = len(hotels_data)
-        total_events = len(all_events)
+        # Eventos de ambas fuentes sin duplicados
+        all_events = merge_dashboard_events(events_data, tijuana_eventos_data)
+        analytics = build_analytics(hotel_stats, len(events_data), len(tijuana_eventos_data), len(all_events))
         
-        if hotels_data:
-            avg_price = sum(hotel.get('precio_promedio', 0) for hotel in hotels_data) / total_hotels
-            min_price = min(hotel.get('precio_promedio', 0) for hotel in hotels_data)
-            max_price = max(hotel.get('precio_promedio', 0) for hotel in hotels_data)
-        else:
-            avg_price = min_price = max_price = 0
+        streamed = dashboard_stream_response(hotels_data, events_data, tijuana_eventos_data, analytics, metadata)
+        if streamed is not None:
+            return streamed
         
         response_data = {
             'hotels': hotels_data,
             'events': all_events,
             'events_eventbrite': events_data,
             'events_tijuana_eventos': tijuana_eventos_data,
-            'analytics': {
-                'total_hotels': total_hotels,
-                'total_events': total_events,
-                'events_eventbrite': len(events_data),
-                'events_tijuana_eventos': len(tijuana_eventos_data),
-                'average_price': round(avg_price, 2),
-                'min_price': min_price,
-                'max_price': max_price
-            },
-            'metadata': {
-                'scraped_at': datetime.now().isoformat(),
-                'source': 'live_scraping'
-            }
+            'analytics': analytics,
+            'metadata': metadata
         }
         
         return jsonify(response_data), 200
         
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error en scraping: {e.stderr}")
-        return jsonify({'error': f'Error en scraping: {e.stderr}'}), 500
     except Exception as e:
         print(f"❌ Error general: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/run-scrape-hotels', methods=['POST'])
 def run_scrape_hotels():
+    if wants_async():
+        return enqueue_scrape('scrape_hotels')
     try:
-        result = subprocess.run(
-            ['python', 'python_scripts/scrape_hotels.py'],
-            capture_output=True,
-            text=True,
-            check=True,
-            encoding='utf-8'
-        )
-        return jsonify({'output': result.stdout}), 200
-    except subprocess.CalledProcessError as e:
+        result = run_scraper('scrape_hotels.py', output_file=HOTELS_FILE)
+        return jsonify({'output': result['stdout']}), 200
+    except ScrapeError as e:
         print("STDOUT:", e.stdout)
         print("STDERR:", e.stderr)
         return jsonify({'error': e.stderr}), 500
@@ -357,74 +556,188 @@ def run_scrapeo_geo():
         from flask import request
         data = request.get_json()
         hotel_name = data.get('hotel_name', 'Grand Hotel Tijuana') if data else 'Grand Hotel Tijuana'
-        
-        result = subprocess.run(
-            ['python', 'python_scripts/scrapeo_geo.py', '32.5149,-117.0382', hotel_name],
-            capture_output=True,
-            text=True,
-            check=True,
-            encoding='utf-8'
-        )
-        return jsonify({'output': result.stdout}), 200
-    except subprocess.CalledProcessError as e:
-        return jsonify({'error': e.stderr}), 500
+        if wants_async():
+            return enqueue_scrape('scrapeo_geo', hotel_name)
+        
+        # Scrape forzado desde el centro de la celda del hotel; actualiza la caché de esa celda
+        outcome = event_cache.get_or_scrape(hotel_name, force=True)
+        if outcome['status'] != 'success':
+            return jsonify({'error': outcome['error']}), 500
+        return jsonify({'output': outcome.get('stdout', '')}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs', methods=['POST'])
+def create_scrape_job():
+    """Encola un scrape: {"script": "scrape_hotels|scrapeo_geo|scrape_tijuana_eventos", "hotel_name": "..."}"""
+    data = request.get_json(silent=True) or {}
+    try:
+        return enqueue_scrape(data.get('script', ''), data.get('hotel_name', 'Grand Hotel Tijuana'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/jobs', methods=['GET'])
+def list_scrape_jobs():
+    return jsonify({'jobs': scrape_jobs.list_jobs()})
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_scrape_job(job_id):
+    """Estado, progreso y resultado de un trabajo de scraping"""
+    job = scrape_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_scrape_job(job_id):
+    job = scrape_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Trabajo no encontrado'}), 404
+    return jsonify(job), 202
+
+@app.route('/api/history/prices', methods=['GET'])
+def get_price_history():
+    """Historial de precios: ?hotel=&from=&to= (fechas de check-in ISO)"""
+    try:
+        hotel = request.args.get('hotel')
+        check_in_from = request.args.get('from')
+        check_in_to = request.args.get('to')
+        records = price_history.query_prices(hotel, check_in_from, check_in_to)
+        trend = price_history.price_trend(hotel, check_in_from, check_in_to)
+        limit = request.args.get('limit', 1000, type=int)
+        return jsonify({
+            'records': price_history.price_records_to_dicts(records[-limit:] if limit > 0 else records[:0]),
+            'total_records': int(len(records)),
+            'trend': [
+                {'check_in_date': from_day(day), 'mean': round(float(mean), 2), 'min': float(low),
+                 'max': float(high), 'count': int(count)}
+                for day, mean, low, high, count in zip(trend['day'], trend['mean'], trend['min'], trend['max'], trend['count'])
+            ]
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/events/by-date', methods=['GET'])
+def get_events_by_date():
+    """
+    Eventos scrapeados indexados por fecha: ?from=&to= (ISO). 'dates' lleva las
+    posiciones en 'events' activas cada día; 'events' tiene la forma de detected_events.
+    """
+    try:
+        date_from = request.args.get('from')
+        date_to = request.args.get('to')
+        for value in (date_from, date_to):
+            if value:
+                date.fromisoformat(value)
+        events, undated, files_etag = scraped_events_with_dates()
+        if date_from or date_to:
+            events = [event for event in events
+                      if (not date_to or event['start_date'] <= date_to) and (not date_from or event['end_date'] >= date_from)]
+        etag = combine_etags(files_etag, date_from, date_to, datetime.now().date().isoformat())
+        
+        def build_body():
+            return app.json.dumps({
+                'dates': build_event_date_table(events, date_from, date_to),
+                'events': events,
+                'undated': undated,
+                'metadata': {'total_events': len(events), 'total_undated': len(undated)}
+            }).encode('utf-8')
+        
+        return cached_json_response(response_cache.get_or_build('events_by_date', etag, build_body), etag)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/events/cells', methods=['GET'])
+def get_event_cells():
+    """Estado de la caché de eventos por celda geográfica"""
+    return jsonify(event_cache.stats())
+
+@app.route('/api/results/versions', methods=['GET'])
+def get_result_versions():
+    """Versiones publicadas de cada archivo de resultados y la actual de cada uno"""
+    return jsonify(result_store.stats([HOTELS_FILE, EVENTS_EVENTBRITE_FILE, EVENTS_TIJUANA_FILE]))
+
+@app.route('/api/scrapers/pool', methods=['GET'])
+def get_scraper_pool_metrics():
+    """Utilización del pool de navegadores del servicio de scraping"""
+    return jsonify(browser_pool.metrics())
 
 # Legacy endpoints for backward compatibility
 @app.route('/hoteles-tijuana-json', methods=['GET'])
 def hoteles_tijuana_json():
-    filename = os.path.join('resultados', 'hoteles_tijuana_promedios.json')
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            data = f.read()
-        return app.response_class(data, mimetype='application/json')
+        entry = resultados_cache.get(HOTELS_FILE)
+        if entry is None:
+            return {'error': f'No existe {HOTELS_FILE}'}, 500
+        return cached_json_response(entry['body'], entry['etag'])
     except Exception as e:
         return {'error': str(e)}, 500
 
 @app.route('/api/events', methods=['GET'])
 def get_events():
-    """Fetch events from Supabase"""
-    if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-        return jsonify({'error': 'Supabase configuration missing'}), 500
-    
-    try:
-        response = requests.get(
-            f'{SUPABASE_URL}/rest/v1/events?select=*&order=created_at.desc',
-            headers={
-                'apikey': SUPABASE_ANON_KEY,
-                'Authorization': f'Bearer {SUPABASE_ANON_KEY}'
-            }
-        )
-        
-        if response.status_code == 200:
-            return jsonify(response.json())
-        else:
-            return jsonify({'error': f'Supabase error: {response.status_code}'}), response.status_code
-            
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    """Fetch events from Supabase (paginado: ?limit=&offset= o ?cursor=)"""
+    return supabase_table_page('events')
 
 @app.route('/api/hotels', methods=['GET'])
 def get_hotels():
-    """Fetch hotels from Supabase"""
-    if not SUPABASE_URL or not SUPABASE_ANON_KEY:
-        return jsonify({'error': 'Supabase configuration missing'}), 500
-    
+    """Fetch hotels from Supabase (paginado: ?limit=&offset= o ?cursor=)"""
+    return supabase_table_page('hotels')
+
+def cache_metrics():
+    """Aciertos y fallos de las cachés del backend (colector de /api/metrics)"""
+    caches = {'resultados': resultados_cache, 'responses': response_cache, 'merged_events': merged_events_cache}
+    if supabase_rest is not None:
+        caches['supabase_rest'] = supabase_rest.cache
+    counts = {name: (cache.hits, cache.misses) for name, cache in caches.items()}
+    info = parse_cache_info()
+    counts['event_dates'] = (info.hits, info.misses)
+    counts['event_cells'] = (event_cache.hits, event_cache.misses)
+    for name, (hits, misses) in counts.items():
+        yield 'cache_requests_total', 'counter', 'Consultas a cachés por resultado', {'cache': name, 'result': 'hit'}, hits
+        yield 'cache_requests_total', 'counter', 'Consultas a cachés por resultado', {'cache': name, 'result': 'miss'}, misses
+
+def browser_pool_metrics():
+    """Estado del pool de navegadores (colector de /api/metrics)"""
+    stats = browser_pool.metrics()
+    for key in ('created', 'recycled', 'crashed', 'leases'):
+        yield f'browser_pool_{key}_total', 'counter', f'Navegadores del pool: {key}', {}, stats[key]
+    for key in ('wait_seconds_total', 'busy_seconds_total'):
+        yield f'browser_pool_{key}', 'counter', f'Segundos acumulados del pool: {key}', {}, stats[key]
+    for key in ('in_use', 'idle', 'size', 'utilization'):
+        yield f'browser_pool_{key}', 'gauge', f'Pool de navegadores: {key}', {}, stats[key]
+
+registry.add_collector(cache_metrics)
+registry.add_collector(browser_pool_metrics)
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Métricas en formato de texto de Prometheus"""
+    return app.response_class(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/metrics/profiler', methods=['GET'])
+def get_profiler():
+    """Estado del perfilador y perfiles de peticiones lentas (?format=collapsed&index=N para flamegraph)"""
+    profiles = profiler.profiles()
+    if request.args.get('format') == 'collapsed':
+        index = request.args.get('index', 0, type=int)
+        if not 0 <= index < len(profiles):
+            return jsonify({'error': 'Perfil no encontrado'}), 404
+        return app.response_class(profiler.collapsed(profiles[index]), mimetype='text/plain')
+    limit = request.args.get('stacks', 20, type=int)
+    return jsonify({
+        **profiler.status(),
+        'recent': [{**profile, 'stacks': profile['stacks'][:limit]} for profile in profiles],
+    })
+
+@app.route('/api/metrics/profiler', methods=['POST'])
+def configure_profiler():
+    """Activa o desactiva el perfilador: {"enabled": true, "threshold_s": 1.0, "interval_s": 0.005}"""
+    data = request.get_json(silent=True) or {}
     try:
-        response = requests.get(
-            f'{SUPABASE_URL}/rest/v1/hotels?select=*&order=created_at.desc',
-            headers={
-                'apikey': SUPABASE_ANON_KEY,
-                'Authorization': f'Bearer {SUPABASE_ANON_KEY}'
-            }
-        )
-        
-        if response.status_code == 200:
-            return jsonify(response.json())
-        else:
-            return jsonify({'error': f'Supabase error: {response.status_code}'}), response.status_code
-            
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        status = profiler.configure(data.get('enabled'), data.get('threshold_s'), data.get('interval_s'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(status)
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -442,18 +755,165 @@ def generate_recommendations():
     hotel_longitude = data["hotel_longitude"]
     own_room_types = data["own_room_types"]  # dict: {nombre: id}
     days_in_advance = data.get("days_in_advance", 60)
+    engine = PRICING_ENGINES.get(data.get("engine", "rules"))
+    if engine is None:
+        return jsonify({"success": False, "error": f"Motor de precios desconocido: {data.get('engine')}"}), 400
+
+    if data.get("incremental"):
+        # Solo las fechas con cambios en competencia o eventos desde la última corrida
+        result = generate_incremental_recommendations(
+            supabase,
+            hotel_id,
+            (hotel_latitude, hotel_longitude),
+            own_room_types,
+            days_in_advance,
+            engine=engine
+        )
+        write_report = result["write_report"]
+        return jsonify({
+            "success": write_report is None or write_report["failed"] == 0,
+            **result
+        })
 
-    recommendations = get_price_recommendations(
+    export = data.get("export")
+    if export not in RECOMMENDATION_EXPORTS:
+        return jsonify({"success": False, "error": f"Formato de exportación desconocido: {export}"}), 400
+
+    recommendation_set = engine(
         supabase,
         hotel_id,
         (hotel_latitude, hotel_longitude),
         own_room_types,
-        days_in_advance
+        days_in_advance,
+        compact=True
     )
-    # Guardar en Supabase
-    for rec in recommendations:
-        supabase.table("price_recommendations").insert(rec).execute()
-    return jsonify({"success": True, "recommendations": recommendations})
+    # Guardar en Supabase en lotes (upsert por hotel, habitación y fecha)
+    recommendations = recommendation_set.to_dicts()
+    write_report = bulk_write_recommendations(supabase, recommendations)
+    if write_report["failed"]:
+        print(f"❌ {write_report['failed']} recomendaciones no se guardaron: {write_report['errors']}")
+    if export in ("csv", "npz"):
+        # Exportación columnar: una fila (o celda de arreglo) por recomendación, sin diccionarios en la respuesta
+        if export == "csv":
+            response = app.response_class(recommendation_set.to_csv(), content_type="text/csv; charset=utf-8")
+        else:
+            response = app.response_class(recommendation_set.to_npz(), mimetype="application/octet-stream")
+        response.headers["Content-Disposition"] = f"attachment; filename=recommendations_{hotel_id}.{export}"
+        response.headers["X-Write-Written"] = str(write_report["written"])
+        response.headers["X-Write-Failed"] = str(write_report["failed"])
+        return response
+    body = {
+        "success": write_report["failed"] == 0,
+        "write_report": write_report
+    }
+    if export == "columns":
+        body["columns"] = recommendation_set.to_columns(reasoning=True)
+    else:
+        body["recommendations"] = recommendations
+    return jsonify(body)
+
+@app.route("/api/ai/generate-recommendations/batch", methods=["POST"])
+def generate_recommendations_batch():
+    """
+    Precios para varios hoteles en una llamada. Competencia y eventos se consultan
+    una sola vez; la respuesta es NDJSON con una línea por hotel conforme termina.
+    """
+    data = request.get_json() or {}
+    hotels = data.get("hotels") or []
+    engine = data.get("engine", "rules")
+    executor = data.get("executor", "thread")
+    write = data.get("write", True)
+    if engine not in MARKET_ENGINES:
+        return jsonify({"success": False, "error": f"Motor de precios desconocido: {engine}"}), 400
+    if executor not in EXECUTORS:
+        return jsonify({"success": False, "error": f"Ejecutor desconocido: {executor}"}), 400
+    try:
+        batch = prepare_batch(supabase, hotels)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    except Exception as e:
+        print(f"❌ Error consultando datos para el lote de precios: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+    def generate():
+        started = datetime.now()
+        yield json.dumps({"type": "metadata", "data": {
+            "hotels": len(batch["hotels"]),
+            "engine": engine,
+            "executor": executor,
+            "start_date": batch["start_date"].isoformat() if batch["start_date"] else None,
+            "end_date": batch["end_date"].isoformat() if batch["end_date"] else None,
+            "competitor_rows": batch["competitor_rows"],
+            "events": batch["events"]
+        }}, ensure_ascii=False) + "\n"
+        summary = {"succeeded": 0, "failed": 0, "recommendations": 0, "write_failed": 0}
+        for result in iter_batch_recommendations(batch, engine, executor):
+            if result["status"] == "success":
+                summary["succeeded"] += 1
+                summary["recommendations"] += result["count"]
+                if write:
+                    result["write_report"] = bulk_write_recommendations(supabase, result["recommendations"])
+                    summary["write_failed"] += result["write_report"]["failed"]
+            else:
+                summary["failed"] += 1
+            yield json.dumps({"type": "hotel", "data": result}, ensure_ascii=False) + "\n"
+        summary["duration_s"] = round((datetime.now() - started).total_seconds(), 3)
+        yield json.dumps({"type": "summary", "data": summary}, ensure_ascii=False) + "\n"
+
+    return app.response_class(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@app.route("/api/ai/backtest", methods=["POST"])
+def run_pricing_backtest():
+    """
+    Evalúa configuraciones de las reglas de precios sobre la competencia y los eventos
+    guardados entre start_date y end_date. search='grid' recibe listas de valores por
+    parámetro y search='random' rangos [mínimo, máximo] y samples.
+    """
+    data = request.get_json() or {}
+    search = data.get("search", "grid")
+    # Hilos por defecto: un pool de procesos por petición paga el arranque de los workers en cada llamada
+    executor = data.get("executor", "thread")
+    objective = data.get("objective", "mae" if data.get("reference_hotel") else "mean_price")
+    try:
+        missing = [key for key in ("hotel_latitude", "hotel_longitude", "own_room_types", "start_date", "end_date")
+                   if data.get(key) is None]
+        if missing:
+            raise ValueError(f"Faltan campos: {', '.join(missing)}")
+        if search not in SEARCHES:
+            raise ValueError(f"Búsqueda desconocida: {search}")
+        if executor not in BACKTEST_EXECUTORS:
+            raise ValueError(f"Ejecutor desconocido: {executor}")
+        space = data.get("space") or {}
+        if search == "grid":
+            configs = grid_configs(space)
+        else:
+            configs = random_configs(space, int(data.get("samples", 1000)), int(data.get("seed", 0)))
+        if objective.lstrip("-") not in BACKTEST_METRICS:
+            raise ValueError(f"Métrica desconocida: {objective}")
+        top = int(data.get("top", 20))
+        market = load_backtest_market(
+            supabase,
+            (float(data["hotel_latitude"]), float(data["hotel_longitude"])),
+            data["own_room_types"],
+            date.fromisoformat(data["start_date"]),
+            date.fromisoformat(data["end_date"]),
+            history=price_history,
+            reference_hotel=data.get("reference_hotel")
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    started = datetime.now()
+    results = run_backtest(market, configs, executor)
+    return jsonify({
+        "success": True,
+        "market": market_summary(market),
+        "configs": len(configs),
+        "objective": objective,
+        "duration_s": round((datetime.now() - started).total_seconds(), 3),
+        "current": {"config": default_config(), "metrics": evaluate_config(market, default_config())},
+        "results": rank_results(results, objective, top)
+    })
 
 @app.route("/api/ai/recommendations/<hotel_id>", methods=["GET"])
 def get_recommendations(hotel_id):
@@ -471,4 +931,6 @@ def get_recommendations(hotel_id):
     return jsonify({"success": True, "recommendations": response.data if hasattr(response, 'data') else response})
 
 if __name__ == '__main__':
+    if os.getenv('REFRESH_SCHEDULER_ENABLED', '1') == '1':
+        refresh_scheduler.start()
     app.run(port=5001) 
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""
+Mide un barrido de configuraciones de reglas sobre un año de mercado sintético con
+backend/ai_engine/backtest.py contra la forma manual: cambiar las constantes de
+price_optimizer y volver a correr el motor de reglas por cada configuración.
+Verifica que ambos den los mismos precios.
+
+Uso:
+    python -m benchmarks.bench_backtest --configs 5000 --days 365 --rooms 4
+"""
+import argparse
+import time
+from datetime import date
+from unittest import mock
+
+import numpy as np
+
+from backend.ai_engine import backtest, price_optimizer
+from backend.ai_engine.price_index import CompetitorPriceIndex, EventCalendar
+from benchmarks.synthetic import make_competitor_prices, make_detected_events, make_room_types
+
+
+def rules_prices(config, own_room_types, days, price_index, events):
+    """Lo que antes había que hacer por configuración: editar las constantes y correr el motor."""
+    undercut_pct, impact_pct, base_prices = backtest.config_rules(config)
+    with mock.patch.object(price_optimizer, "COMPETITOR_UNDERCUT_PCT", undercut_pct), \
+            mock.patch.object(price_optimizer, "EVENT_IMPACT_PCT", impact_pct), \
+            mock.patch.object(price_optimizer, "BASE_PRICES", base_prices):
+        calendar = EventCalendar(events, days)
+        return price_optimizer.recommend_from_market_compact("H1", own_room_types, days, price_index, calendar).prices
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--configs", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--rooms", type=int, default=4)
+    parser.add_argument("--rows-per-day", type=int, default=40)
+    parser.add_argument("--events", type=int, default=300)
+    parser.add_argument("--executor", choices=backtest.EXECUTORS, default="process")
+    parser.add_argument("--workers", type=int, default=backtest.BACKTEST_WORKERS)
+    parser.add_argument("--sample", type=int, default=20, help="configuraciones que se corren con el motor de reglas")
+    args = parser.parse_args()
+
+    start = date.today().replace(year=date.today().year - 1)
+    days = backtest.backtest_days(start, start.replace(year=start.year + 1))[:args.days]
+    competitor_prices = make_competitor_prices(args.days, args.rows_per_day, start=start)
+    # Días sin competencia para ejercitar el precio base
+    competitor_prices = [p for p in competitor_prices if hash(p["check_in_date"]) % 7]
+    events = make_detected_events(args.events, args.days, start=start)
+    own_room_types = make_room_types(args.rooms)
+    price_index = CompetitorPriceIndex(competitor_prices)
+    reference = np.where(np.arange(args.days) % 3, 1500.0 + 300 * np.sin(np.arange(args.days) / 20), np.nan)
+
+    space = {"undercut_pct": (-0.05, 0.15), "impact.High": (0.0, 0.4), "impact.Medium": (0.0, 0.2),
+             "impact.Low": (0.0, 0.1)}
+    space.update({f"base.{room_type_id}": (800.0, 2500.0) for room_type_id in own_room_types.values()})
+    configs = [backtest.default_config()] + backtest.random_configs(space, args.configs - 1, seed=3)
+
+    began = time.perf_counter()
+    sample = configs[:args.sample]
+    expected = [rules_prices(config, own_room_types, days, price_index, events) for config in sample]
+    rules_s = (time.perf_counter() - began) / len(sample)
+
+    began = time.perf_counter()
+    market = backtest.build_backtest_market(price_index, events, days, own_room_types, reference)
+    prepare_s = time.perf_counter() - began
+    began = time.perf_counter()
+    results = backtest.run_backtest(market, configs, executor=args.executor, max_workers=args.workers)
+    sweep_s = time.perf_counter() - began
+
+    same = all(np.array_equal(backtest.config_prices(market, config)[0], prices)
+               for config, prices in zip(sample, expected))
+    best = backtest.rank_results(results, "mae", top=1)[0]
+    print(f"configuraciones: {len(configs)}  días: {len(days)}  habitaciones: {args.rooms}  "
+          f"filas competencia: {len(competitor_prices)}  eventos: {len(events)}")
+    print(f"motor de reglas por configuración: {rules_s * 1000:.1f} ms  "
+          f"(barrido completo estimado {rules_s * len(configs):.1f}s)")
+    print(f"backtest: agregados {prepare_s:.3f}s + barrido {sweep_s:.3f}s ({args.executor}, {args.workers} workers)  "
+          f"({rules_s * len(configs) / (prepare_s + sweep_s):.0f}x)")
+    print(f"mejor mae: {best['metrics']['mae']} (configuración {best['index']}); "
+          f"actual: {results[0]['metrics']['mae']}")
+    print(f"precios idénticos al motor de reglas: {same}")
+
+
+if __name__ == "__main__":
+    main()
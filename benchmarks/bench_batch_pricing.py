@@ -0,0 +1,73 @@
+"""
+Compara calcular precios hotel por hotel (una consulta de competencia y eventos
+por hotel) contra el lote de batch_pricing, que consulta una vez y reparte el
+cálculo en un pool. Verifica que ambas rutas den las mismas recomendaciones.
+
+Uso:
+    python -m benchmarks.bench_batch_pricing --hotels 50 --days 90 --latency 0.02
+"""
+import argparse
+import time
+
+from backend.ai_engine.batch_pricing import generate_batch_recommendations
+from backend.ai_engine.price_optimizer import get_price_recommendations
+from backend.ai_engine.vectorized_optimizer import get_price_recommendations_vectorized
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.synthetic import make_competitor_prices, make_detected_events, make_hotel_specs
+
+SINGLE_ENGINES = {
+    "rules": get_price_recommendations,
+    "vectorized": get_price_recommendations_vectorized,
+}
+
+
+def comparable(recommendations):
+    return sorted(
+        (rec["hotel_id"], rec["room_type_id"], rec["target_date"], rec["recommended_price"],
+         rec["reasoning"], rec["recommendation_strength"])
+        for rec in recommendations
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hotels", type=int, default=50)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--room-types", type=int, default=4)
+    parser.add_argument("--rows-per-day", type=int, default=40)
+    parser.add_argument("--events", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--engine", choices=sorted(SINGLE_ENGINES), default="rules")
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread")
+    args = parser.parse_args()
+
+    tables = {
+        "competitor_prices": make_competitor_prices(args.days + 1, args.rows_per_day),
+        "detected_events": make_detected_events(args.events, args.days + 1),
+    }
+    hotels = make_hotel_specs(args.hotels, args.days, args.room_types)
+
+    client = FakeSupabase(tables, latency=args.latency)
+    start = time.perf_counter()
+    expected = []
+    for hotel in hotels:
+        expected.extend(SINGLE_ENGINES[args.engine](
+            client, hotel["hotel_id"], (hotel["hotel_latitude"], hotel["hotel_longitude"]),
+            hotel["own_room_types"], hotel["days_in_advance"]))
+    per_hotel_s = time.perf_counter() - start
+    per_hotel_trips = client.round_trips
+
+    client = FakeSupabase(tables, latency=args.latency)
+    start = time.perf_counter()
+    results = list(generate_batch_recommendations(client, hotels, engine=args.engine, executor=args.executor))
+    batch_s = time.perf_counter() - start
+    assert all(result["status"] == "success" for result in results)
+    actual = [rec for result in results for rec in result["recommendations"]]
+    assert comparable(actual) == comparable(expected), "el lote no coincide con el cálculo por hotel"
+
+    print(f"hotel por hotel: {per_hotel_s:.3f}s ({per_hotel_trips} consultas, {len(expected)} recomendaciones)")
+    print(f"lote ({args.executor}): {batch_s:.3f}s ({client.round_trips} consultas, {per_hotel_s / batch_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
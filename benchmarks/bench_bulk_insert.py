@@ -0,0 +1,57 @@
+"""
+Compara la escritura fila por fila de price_recommendations contra la escritura
+por lotes concurrentes, usando el cliente falso con latencia simulada.
+
+Uso:
+    python -m benchmarks.bench_bulk_insert --rows 480 --latency 0.02
+"""
+import argparse
+import time
+
+from backend.db.supabase_client import bulk_write_recommendations
+from benchmarks.fake_supabase import FakeSupabase
+
+
+def make_recommendations(rows):
+    return [
+        {"hotel_id": "H1", "room_type_id": f"R{i % 8}", "target_date": f"2030-01-{(i // 8) % 28 + 1:02d}-{i // 224}",
+         "recommended_price": 1000.0 + i}
+        for i in range(rows)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=480)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--chunk-size", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    recommendations = make_recommendations(args.rows)
+
+    client = FakeSupabase(latency=args.latency)
+    start = time.perf_counter()
+    for rec in recommendations:
+        client.table("price_recommendations").insert(rec).execute()
+    sequential_s = time.perf_counter() - start
+
+    client = FakeSupabase(latency=args.latency)
+    start = time.perf_counter()
+    report = bulk_write_recommendations(client, recommendations, chunk_size=args.chunk_size, max_workers=args.workers)
+    bulk_s = time.perf_counter() - start
+    assert report["written"] == args.rows and len(client.tables["price_recommendations"]) == args.rows
+
+    # Reintentar el mismo lote no duplica filas gracias al upsert
+    bulk_write_recommendations(client, recommendations, chunk_size=args.chunk_size, max_workers=args.workers)
+    assert len(client.tables["price_recommendations"]) == args.rows
+
+    failing = FakeSupabase(fail_every=2)
+    partial = bulk_write_recommendations(failing, recommendations, chunk_size=args.chunk_size, max_workers=1)
+
+    print(f"fila por fila: {sequential_s:.3f}s ({args.rows} viajes)")
+    print(f"por lotes:     {bulk_s:.3f}s ({report['chunks']} viajes, {sequential_s / bulk_s:.1f}x)")
+    print(f"fallos parciales: {partial['failed']} filas en lotes {[e['chunk'] for e in partial['errors']]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Mide la deduplicación de eventos: tiempo, comparaciones difusas y precisión /
+exhaustividad contra el identificador real de los eventos sintéticos.
+
+Uso:
+    python -m benchmarks.bench_event_dedup --events 20000 --duplicate-rate 0.3
+"""
+import argparse
+import time
+
+from backend.events.dedup import dedupe_events
+from benchmarks.synthetic import make_scraped_events
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--duplicate-rate", type=float, default=0.3)
+    parser.add_argument("--days", type=int, default=90)
+    args = parser.parse_args()
+    events = make_scraped_events(args.events, args.duplicate_rate, args.days)
+
+    start = time.perf_counter()
+    result = dedupe_events(events)
+    elapsed = time.perf_counter() - start
+
+    true_ids = [{events[i]["true_id"] for i in members} for members in result["clusters"]]
+    expected = len({event["true_id"] for event in events})
+    # Precisión: grupos que solo contienen un evento real; exhaustividad: eventos reales en un solo grupo
+    pure = sum(1 for ids in true_ids if len(ids) == 1)
+    groups_per_event = {}
+    for ids in true_ids:
+        for true_id in ids:
+            groups_per_event[true_id] = groups_per_event.get(true_id, 0) + 1
+    whole = sum(1 for count in groups_per_event.values() if count == 1)
+
+    print(f"{len(events)} eventos -> {len(result['events'])} canónicos (esperados {expected})")
+    print(f"precisión: {pure / len(true_ids):.2%}  exhaustividad: {whole / expected:.2%}")
+    print(f"comparaciones difusas: {result['comparisons']} (todos contra todos: {len(events) * (len(events) - 1) // 2})")
+    print(f"tiempo: {elapsed:.3f}s ({elapsed / len(events) * 1e6:.1f} µs por evento)")
+
+
+if __name__ == "__main__":
+    main()
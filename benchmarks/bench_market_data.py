@@ -0,0 +1,102 @@
+"""
+Compara traer competencia y eventos como antes (dos consultas select("*") una
+después de la otra, con todas las filas en memoria) contra backend/db/market_data.py
+(ambas consultas en paralelo, paginadas por id y agregadas conforme llegan).
+Mide tiempo y pico de memoria (tracemalloc) y verifica que el índice y los
+eventos resultantes sean los mismos.
+
+Uso:
+    python -m benchmarks.bench_market_data --days 365 --rows-per-day 60 --latency 0.02 --row-latency 0.00001
+"""
+import argparse
+import math
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from backend.ai_engine.price_index import CompetitorPriceIndex
+from backend.db.market_data import fetch_market_data
+from backend.db.supabase_client import fetch_competitor_prices_for_range, fetch_detected_events_for_range
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.synthetic import make_competitor_prices, make_detected_events
+
+HOTEL_COORDS = (32.5149, -117.0382)
+
+
+def sequential(client, start, end):
+    competitor_prices = fetch_competitor_prices_for_range(client, start, end)
+    events = fetch_detected_events_for_range(client, HOTEL_COORDS, start, end, radius_km=20)
+    return CompetitorPriceIndex(competitor_prices), events
+
+
+def concurrent(client, start, end):
+    return fetch_market_data(client, HOTEL_COORDS, start, end, radius_km=20)
+
+
+def measure(fn, client, start, end):
+    """Tiempo sin tracemalloc (lo distorsiona) y pico de memoria en una segunda corrida."""
+    began = time.perf_counter()
+    result = fn(client, start, end)
+    elapsed = time.perf_counter() - began
+    tracemalloc.start()
+    fn(client, start, end)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def snapshot(price_index, events, days):
+    stats = {}
+    for day in days:
+        for room_class in [None] + price_index.room_classes():
+            stats[(day, room_class)] = price_index.lookup(day, room_class)
+    return stats, sorted(event["id"] for event in events)
+
+
+def same_results(before, after) -> bool:
+    # Las sumas dependen del orden en que llegan las filas: se comparan con tolerancia
+    (before_stats, before_events), (after_stats, after_events) = before, after
+    if before_events != after_events or before_stats.keys() != after_stats.keys():
+        return False
+    for key, found in before_stats.items():
+        other = after_stats[key]
+        if (found is None) != (other is None):
+            return False
+        if found and not all(math.isclose(a, b, rel_tol=1e-9) for a, b in zip(found, other)):
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--rows-per-day", type=int, default=60)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--row-latency", type=float, default=0.00001)
+    args = parser.parse_args()
+
+    start = date.today()
+    end = start + timedelta(days=args.days)
+    days = [(start + timedelta(days=offset)).isoformat() for offset in range(args.days)]
+    tables = {
+        "competitor_prices": make_competitor_prices(args.days, args.rows_per_day),
+        "detected_events": make_detected_events(args.events, args.days),
+    }
+    client = FakeSupabase(tables, latency=args.latency, row_latency=args.row_latency)
+
+    before, before_s, before_peak = measure(sequential, client, start, end)
+    client.round_trips = 0
+    after, after_s, after_peak = measure(concurrent, client, start, end)
+    pages = client.round_trips // 2
+
+    print(f"filas competencia: {len(tables['competitor_prices'])}  eventos: {args.events}  "
+          f"consultas paginadas: {pages}")
+    print(f"secuencial:           {before_s:.3f}s  pico {before_peak / 1e6:.1f} MB")
+    print(f"paralelo paginado:    {after_s:.3f}s  pico {after_peak / 1e6:.1f} MB  "
+          f"({before_s / after_s:.1f}x, memoria {before_peak / max(after_peak, 1):.1f}x menos)")
+    print(f"resultados idénticos: {same_results(snapshot(*before, days), snapshot(*after, days))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compara el optimizador indexado por fecha contra los bucles anidados originales.
+
+Uso:
+    python -m benchmarks.bench_price_index --days 365 --rows-per-day 20 --events 300
+"""
+import argparse
+import time
+from datetime import date, timedelta
+from unittest import mock
+
+from backend.ai_engine import price_optimizer
+from backend.ai_engine.price_index import CompetitorPriceIndex
+from backend.ai_engine.price_optimizer import BASE_PRICES, COMPETITOR_UNDERCUT_PCT, EVENT_IMPACT_PCT
+from backend.ai_engine.room_types import classify_room_type
+from benchmarks.synthetic import make_competitor_prices, make_detected_events, make_room_types
+
+
+def legacy_recommendations(competitor_prices, detected_events, own_room_types, days_in_advance):
+    """Reglas originales: recorre todas las filas por cada (habitación × día)."""
+    today = date.today()
+    results = []
+    for room_name, room_type_id in own_room_types.items():
+        room_class = classify_room_type(room_name)
+        for day_offset in range(days_in_advance):
+            target_date = today + timedelta(days=day_offset)
+            comp_prices = [p for p in competitor_prices if p["check_in_date"] == target_date.isoformat()]
+            # Misma clase de habitación si hay tarifas de esa clase (ver room_types.py)
+            same_class = [p for p in comp_prices if room_class and classify_room_type(p["room_type_raw"]) == room_class]
+            if any(p["price_per_night"] for p in same_class):
+                comp_prices = same_class
+            if comp_prices:
+                avg_price = sum(p["price_per_night"] for p in comp_prices if p["price_per_night"]) / len(comp_prices)
+                min_price = min(p["price_per_night"] for p in comp_prices if p["price_per_night"])
+                recommended_price = max(min_price, avg_price * (1 - COMPETITOR_UNDERCUT_PCT))
+            else:
+                recommended_price = BASE_PRICES.get(room_type_id, 1000.0)
+            events_today = [
+                e for e in detected_events
+                if e["start_date"] <= target_date.isoformat() <= e["end_date"]
+            ]
+            if events_today:
+                max_impact = max(EVENT_IMPACT_PCT.get(e["estimated_impact"], 0) for e in events_today)
+                if max_impact > 0:
+                    recommended_price = recommended_price * (1 + max_impact)
+            results.append((room_type_id, target_date.isoformat(), round(recommended_price, 2)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--rows-per-day", type=int, default=20)
+    parser.add_argument("--events", type=int, default=300)
+    parser.add_argument("--rooms", type=int, default=4)
+    args = parser.parse_args()
+
+    competitor_prices = make_competitor_prices(args.days, args.rows_per_day)
+    detected_events = make_detected_events(args.events, args.days)
+    own_room_types = make_room_types(args.rooms)
+
+    start = time.perf_counter()
+    legacy = legacy_recommendations(competitor_prices, detected_events, own_room_types, args.days)
+    legacy_s = time.perf_counter() - start
+
+    # El índice se construye dentro de la medición, igual que al leer las filas de la base
+    market = lambda *args, **kwargs: (CompetitorPriceIndex(competitor_prices), detected_events)
+    with mock.patch.object(price_optimizer, "fetch_market_data", side_effect=market):
+        start = time.perf_counter()
+        indexed = price_optimizer.get_price_recommendations(None, "H1", (32.5149, -117.0382), own_room_types, args.days)
+        indexed_s = time.perf_counter() - start
+
+    same = legacy == [(r["room_type_id"], r["target_date"], r["recommended_price"]) for r in indexed]
+    print(f"celdas: {len(indexed)}  filas competencia: {len(competitor_prices)}  eventos: {len(detected_events)}")
+    print(f"bucles anidados: {legacy_s:.3f}s")
+    print(f"indexado:        {indexed_s:.3f}s  ({legacy_s / indexed_s:.1f}x)")
+    print(f"resultados idénticos: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compara la memoria de guardar las recomendaciones de un portafolio como lista de
+diccionarios (formato de price_recommendations) contra RecommendationSet
+(columnas por habitación y día, regla + parámetros, un solo generated_at).
+Mide memoria retenida (tracemalloc), tamaño al enviarlas entre procesos (pickle)
+y de las exportaciones CSV/NPZ, y verifica que las columnas coincidan con los diccionarios.
+
+Uso:
+    python -m benchmarks.bench_recommendation_memory --hotels 20 --rooms 4 --days 365
+"""
+import argparse
+import gc
+import pickle
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from backend.ai_engine.price_index import CompetitorPriceIndex, EventCalendar
+from backend.ai_engine.price_optimizer import recommend_from_market_compact
+from benchmarks.synthetic import make_competitor_prices, make_detected_events, make_room_types
+
+
+def retained(build):
+    """(resultado, bytes que siguen vivos después de construirlo, segundos)."""
+    gc.collect()
+    tracemalloc.start()
+    before, _peak = tracemalloc.get_traced_memory()
+    began = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - began
+    after, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, after - before, elapsed
+
+
+def columns_match(recommendation_set, dicts):
+    columns = recommendation_set.to_columns(reasoning=True)
+    return (columns["room_type_id"] == [rec["room_type_id"] for rec in dicts]
+            and columns["target_date"] == [rec["target_date"] for rec in dicts]
+            and columns["recommended_price"] == [rec["recommended_price"] for rec in dicts]
+            and columns["recommendation_strength"] == [rec["recommendation_strength"] for rec in dicts]
+            and columns["reasoning"] == [rec["reasoning"] for rec in dicts])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hotels", type=int, default=20)
+    parser.add_argument("--rooms", type=int, default=4)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--rows-per-day", type=int, default=20)
+    parser.add_argument("--events", type=int, default=300)
+    args = parser.parse_args()
+
+    today = date.today()
+    days = [(today + timedelta(days=offset)).isoformat() for offset in range(args.days)]
+    price_index = CompetitorPriceIndex(make_competitor_prices(args.days, args.rows_per_day))
+    own_room_types = make_room_types(args.rooms)
+    calendars = [EventCalendar(make_detected_events(args.events, args.days, seed=h), days) for h in range(args.hotels)]
+
+    def compact():
+        return [recommend_from_market_compact(f"H{h}", own_room_types, days, price_index, calendars[h])
+                for h in range(args.hotels)]
+
+    sets, sets_bytes, sets_s = retained(compact)
+    dicts, dicts_bytes, dicts_s = retained(lambda: [recommendation_set.to_dicts() for recommendation_set in sets])
+
+    cells = sum(len(hotel) for hotel in dicts)
+    same = all(recommendation_set.to_dicts() == hotel and columns_match(recommendation_set, hotel)
+               for recommendation_set, hotel in zip(sets, dicts))
+    dict_pickle = sum(len(pickle.dumps(hotel)) for hotel in dicts)
+    set_pickle = sum(len(pickle.dumps(recommendation_set)) for recommendation_set in sets)
+    csv_bytes = sum(len(recommendation_set.to_csv().encode("utf-8")) for recommendation_set in sets)
+    npz_bytes = sum(len(recommendation_set.to_npz()) for recommendation_set in sets)
+
+    print(f"recomendaciones: {cells}  ({args.hotels} hoteles × {args.rooms} habitaciones × {args.days} días)")
+    print(f"diccionarios:      {dicts_bytes / 1e6:7.1f} MB retenidos  {dicts_bytes / cells:6.0f} B/celda  "
+          f"pickle {dict_pickle / 1e6:.1f} MB  (serializar {dicts_s:.3f}s)")
+    print(f"RecommendationSet: {sets_bytes / 1e6:7.1f} MB retenidos  {sets_bytes / cells:6.0f} B/celda  "
+          f"pickle {set_pickle / 1e6:.1f} MB  (calcular {sets_s:.3f}s)  "
+          f"({dicts_bytes / max(sets_bytes, 1):.0f}x menos memoria)")
+    print(f"exportación:       csv {csv_bytes / 1e6:.1f} MB  npz {npz_bytes / 1e6:.2f} MB")
+    print(f"resultados idénticos: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import threading
+import time
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple
+
+# Cliente de Supabase en memoria con la misma cadena de llamadas que usa el backend
+# (table().select().gte().lte().eq().order().limit().execute(), insert, upsert).
+# Permite simular latencia por viaje y fallos para medir y probar sin red.
+
+
+class FakeResponse:
+    def __init__(self, data=None, error=None, count=None):
+        self.data = data if data is not None else []
+        self.error = error
+        self.count = count
+
+
+class FakeQuery:
+    def __init__(self, client: "FakeSupabase", table: str):
+        self._client = client
+        self._table = table
+        self._filters = []
+        self._order = None
+        self._limit = None
+        self._columns = None
+        self._write = None
+        self._after_id = None
+        self._count = None
+        self._range = None
+
+    # --- lectura ---
+    def select(self, columns: str = "*", count: Optional[str] = None):
+        self._columns = None if columns.strip() == "*" else [c.strip() for c in columns.split(",")]
+        self._count = count
+        return self
+
+    def _filter(self, column, op, value):
+        self._filters.append((column, op, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, lambda a, b: a == b, value)
+
+    def gt(self, column, value):
+        if column == "id":
+            self._after_id = value
+        return self._filter(column, lambda a, b: a is not None and a > b, value)
+
+    def gte(self, column, value):
+        self._bound(column, 0, value)
+        return self._filter(column, lambda a, b: a is not None and a >= b, value)
+
+    def lt(self, column, value):
+        return self._filter(column, lambda a, b: a is not None and a < b, value)
+
+    def lte(self, column, value):
+        self._bound(column, 1, value)
+        return self._filter(column, lambda a, b: a is not None and a <= b, value)
+
+    def _bound(self, column, side, value):
+        # Primer rango inclusivo sobre una columna distinta de id: se resuelve con índice
+        if column == "id" or (self._range and self._range[0] != column):
+            return
+        bounds = list(self._range[1:]) if self._range else [None, None]
+        bounds[side] = value
+        self._range = (column, *bounds)
+
+    def order(self, column, desc: bool = False):
+        self._order = (column, desc)
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    # --- escritura ---
+    def insert(self, rows):
+        self._write = ("insert", rows if isinstance(rows, list) else [rows], None)
+        return self
+
+    def upsert(self, rows, on_conflict: Optional[str] = None):
+        keys = [k.strip() for k in on_conflict.split(",")] if on_conflict else None
+        self._write = ("upsert", rows if isinstance(rows, list) else [rows], keys)
+        return self
+
+    def execute(self) -> FakeResponse:
+        self._client.round_trip(self._table)
+        if self._write:
+            return self._client.write(self._table, *self._write)
+        if self._order == ("id", False):
+            # Recorrido por índice de id, como hace Postgres con la paginación por llave
+            ids, rows = self._client.rows_by_id(self._table, self._range)
+            start = bisect_right(ids, self._after_id) if self._after_id is not None else 0
+            matched = []
+            for r in rows[start:]:
+                if all(op(r.get(col), val) for col, op, val in self._filters):
+                    matched.append(r)
+                    if self._limit is not None and len(matched) >= self._limit:
+                        break
+            rows = matched
+        else:
+            rows = [r for r in self._client.rows(self._table) if all(op(r.get(col), val) for col, op, val in self._filters)]
+        # count="exact" cuenta todas las filas que cumplen los filtros, sin el límite
+        count = len(rows) if self._count else None
+        if self._order and self._order != ("id", False):
+            column, desc = self._order
+            rows.sort(key=lambda r: r.get(column), reverse=desc)
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        if self._columns:
+            rows = [{c: r.get(c) for c in self._columns} for r in rows]
+        self._client.transfer(len(rows))
+        return FakeResponse([dict(r) for r in rows], count=count)
+
+
+class FakeSupabase:
+    """
+    latency: segundos de espera por cada execute() (simula el viaje HTTP).
+    row_latency: segundos adicionales por fila devuelta (simula el tamaño de la respuesta).
+    fail_every: si es N > 0, cada N-ésima escritura devuelve error.
+    """
+
+    def __init__(self, tables: Optional[Dict[str, List[Dict]]] = None, latency: float = 0.0, fail_every: int = 0,
+                 row_latency: float = 0.0):
+        self.tables = {name: list(rows) for name, rows in (tables or {}).items()}
+        self.latency = latency
+        self.row_latency = row_latency
+        self.fail_every = fail_every
+        self.round_trips = 0
+        self._writes = 0
+        self._by_id: Dict[str, List[Dict]] = {}
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def rows(self, table: str) -> List[Dict]:
+        with self._lock:
+            return list(self.tables.get(table, []))
+
+    def rows_by_id(self, table: str, bounds: Optional[Tuple] = None) -> Tuple[List, List[Dict]]:
+        """
+        Ids y filas ordenadas por id, como un índice (columna, id) de Postgres: con
+        bounds=(columna, mínimo, máximo) solo las filas de ese rango.
+        """
+        with self._lock:
+            key = (table, bounds)
+            cached = self._by_id.get(key)
+            if cached is None:
+                rows = self.tables.get(table, [])
+                if bounds:
+                    column, low, high = bounds
+                    rows = [r for r in rows if r.get(column) is not None
+                            and (low is None or r[column] >= low) and (high is None or r[column] <= high)]
+                rows = sorted(rows, key=lambda r: r["id"])
+                cached = self._by_id[key] = ([r["id"] for r in rows], rows)
+            return cached
+
+    def round_trip(self, table: str):
+        with self._lock:
+            self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def transfer(self, rows: int):
+        if self.row_latency and rows:
+            time.sleep(self.row_latency * rows)
+
+    def write(self, table: str, mode: str, rows: List[Dict], keys: Optional[List[str]]) -> FakeResponse:
+        with self._lock:
+            self._writes += 1
+            for key in [key for key in self._by_id if key[0] == table]:
+                del self._by_id[key]
+            if self.fail_every and self._writes % self.fail_every == 0:
+                return FakeResponse(error=f"simulated failure on write {self._writes}")
+            stored = self.tables.setdefault(table, [])
+            if mode == "upsert" and keys:
+                positions = {tuple(r.get(k) for k in keys): i for i, r in enumerate(stored)}
+                for row in rows:
+                    key = tuple(row.get(k) for k in keys)
+                    if key in positions:
+                        stored[positions[key]] = dict(row)
+                    else:
+                        positions[key] = len(stored)
+                        stored.append(dict(row))
+            else:
+                stored.extend(dict(row) for row in rows)
+            return FakeResponse([dict(row) for row in rows])
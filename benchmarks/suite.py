@@ -0,0 +1,369 @@
+"""
+Suite reproducible de benchmarks del motor de precios, las consultas a Supabase
+(con el cliente falso en memoria) y los endpoints de Flask (con el test client).
+Escribe un JSON con la mediana, mínimo y p95 de cada caso para compararlo entre
+commits y detectar regresiones.
+
+Uso:
+    python -m benchmarks.suite --scale medium
+    python -m benchmarks.suite --scale medium --only pricing,fetch --repeat 10
+    python -m benchmarks.suite --scale medium --compare benchmarks/results/<commit>-medium.json
+    python -m benchmarks.suite --diff antes.json despues.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from backend.ai_engine.backtest import load_backtest_market, random_configs, run_backtest
+from backend.ai_engine.batch_pricing import generate_batch_recommendations
+from backend.ai_engine.price_optimizer import get_price_recommendations
+from backend.ai_engine.vectorized_optimizer import get_price_recommendations_vectorized
+from backend.db.market_data import fetch_market_data
+from backend.db.supabase_client import fetch_competitor_prices_for_range, fetch_detected_events_for_range
+from benchmarks.fake_supabase import FakeSupabase
+from benchmarks.synthetic import (
+    make_competitor_prices,
+    make_detected_events,
+    make_hotel_specs,
+    make_room_types,
+    make_scraped_events,
+    make_scraped_hotels,
+)
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+DEFAULT_THRESHOLD = 0.25  # una mediana 25% más lenta que la base cuenta como regresión
+
+SCALES = {
+    "small": {"days": 30, "rows_per_day": 10, "rooms": 2, "events": 50, "hotels": 5,
+              "scraped_hotels": 50, "scraped_events": 100},
+    "medium": {"days": 90, "rows_per_day": 40, "rooms": 4, "events": 300, "hotels": 20,
+               "scraped_hotels": 500, "scraped_events": 1000},
+    "large": {"days": 365, "rows_per_day": 100, "rooms": 8, "events": 2000, "hotels": 100,
+              "scraped_hotels": 5000, "scraped_events": 10000},
+}
+
+HOTEL_COORDS = (32.5149, -117.0382)
+
+# Casos registrados: nombre -> función(contexto) que devuelve (llamada a medir, elementos por llamada)
+CASES: Dict[str, Callable] = {}
+
+
+def case(name: str):
+    def register(function):
+        CASES[name] = function
+        return function
+    return register
+
+
+class BenchContext:
+    """Datos sintéticos compartidos por todos los casos, generados una sola vez por corrida."""
+
+    def __init__(self, scale: Dict):
+        self.scale = scale
+        self.today = date.today()
+        self.tables = {
+            "competitor_prices": make_competitor_prices(scale["days"] + 1, scale["rows_per_day"], start=self.today),
+            "detected_events": make_detected_events(scale["events"], scale["days"] + 1, start=self.today),
+        }
+        self.room_types = make_room_types(scale["rooms"])
+        self.hotels = make_hotel_specs(scale["hotels"], scale["days"], scale["rooms"])
+        self._server = None
+        self._workdir = None
+
+    def client(self) -> FakeSupabase:
+        return FakeSupabase(self.tables)
+
+    def server(self):
+        """backend_server importado dentro de un directorio temporal con resultados/ sintéticos."""
+        if self._server is None:
+            self._workdir = tempfile.TemporaryDirectory(prefix="bench-")
+            resultados = os.path.join(self._workdir.name, "resultados")
+            os.makedirs(resultados)
+            scraped = make_scraped_events(self.scale["scraped_events"], start=self.today)
+            files = {
+                "hoteles_tijuana_promedios.json": make_scraped_hotels(self.scale["scraped_hotels"]),
+                "eventos_cercanos.json": [_as_eventbrite(event) for event in scraped if event["fuente"] == "eventbrite.com"],
+                "eventos_tijuana_eventos.json": [event for event in scraped if event["fuente"] != "eventbrite.com"],
+            }
+            for filename, data in files.items():
+                with open(os.path.join(resultados, filename), "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False)
+            os.chdir(self._workdir.name)
+            import backend_server
+            backend_server.supabase = self.client()
+            self._server = backend_server
+        return self._server
+
+    def close(self, cwd: str) -> None:
+        os.chdir(cwd)
+        if self._workdir is not None:
+            self._workdir.cleanup()
+
+
+def _as_eventbrite(event: Dict) -> Dict:
+    """Evento sintético con la fecha en el texto que publica Eventbrite."""
+    start = date.fromisoformat(event["start_date"])
+    return {**{k: v for k, v in event.items() if k not in ("start_date", "true_id")},
+            "fecha": f'{start.strftime("%a, %b")} {start.day} • 8:00 PM'}
+
+
+# --- motor de precios ---
+
+@case("pricing.rules")
+def _pricing_rules(ctx: BenchContext):
+    client = ctx.client()
+    return lambda: get_price_recommendations(client, "H1", HOTEL_COORDS, ctx.room_types, ctx.scale["days"]), \
+        ctx.scale["rooms"] * ctx.scale["days"]
+
+
+@case("pricing.vectorized")
+def _pricing_vectorized(ctx: BenchContext):
+    client = ctx.client()
+    return lambda: get_price_recommendations_vectorized(client, "H1", HOTEL_COORDS, ctx.room_types, ctx.scale["days"]), \
+        ctx.scale["rooms"] * ctx.scale["days"]
+
+
+@case("pricing.batch")
+def _pricing_batch(ctx: BenchContext):
+    client = ctx.client()
+    return lambda: list(generate_batch_recommendations(client, ctx.hotels)), \
+        ctx.scale["hotels"] * ctx.scale["rooms"] * ctx.scale["days"]
+
+
+@case("pricing.backtest")
+def _pricing_backtest(ctx: BenchContext):
+    client = ctx.client()
+    end = ctx.today + timedelta(days=ctx.scale["days"])
+    configs = random_configs({"undercut_pct": (0.0, 0.15), "impact.High": (0.0, 0.3)}, 1000)
+
+    def call():
+        market = load_backtest_market(client, HOTEL_COORDS, ctx.room_types, ctx.today, end)
+        return run_backtest(market, configs, executor="thread")
+    return call, len(configs)
+
+
+# --- consultas (cliente falso: mide la cadena de consulta y el posprocesamiento) ---
+
+@case("fetch.competitor_prices")
+def _fetch_competitor_prices(ctx: BenchContext):
+    client = ctx.client()
+    end = date.fromordinal(ctx.today.toordinal() + ctx.scale["days"])
+    return lambda: fetch_competitor_prices_for_range(client, ctx.today, end), len(ctx.tables["competitor_prices"])
+
+
+@case("fetch.detected_events")
+def _fetch_detected_events(ctx: BenchContext):
+    client = ctx.client()
+    end = date.fromordinal(ctx.today.toordinal() + ctx.scale["days"])
+    return lambda: fetch_detected_events_for_range(client, HOTEL_COORDS, ctx.today, end), len(ctx.tables["detected_events"])
+
+
+@case("fetch.market_data")
+def _fetch_market_data(ctx: BenchContext):
+    client = ctx.client()
+    end = date.fromordinal(ctx.today.toordinal() + ctx.scale["days"])
+    rows = len(ctx.tables["competitor_prices"]) + len(ctx.tables["detected_events"])
+    return lambda: fetch_market_data(client, HOTEL_COORDS, ctx.today, end), rows
+
+
+# --- endpoints de Flask ---
+
+def _get(server, path: str, expected: int = 200):
+    def call():
+        response = server.app.test_client().get(path)
+        body = response.get_data()
+        assert response.status_code == expected, f"{path}: {response.status_code}"
+        return body
+    return call
+
+
+@case("api.data_existing")
+def _api_data_existing(ctx: BenchContext):
+    server = ctx.server()
+    return _get(server, "/api/data/existing"), ctx.scale["scraped_hotels"] + ctx.scale["scraped_events"]
+
+
+@case("api.data_existing_cold")
+def _api_data_existing_cold(ctx: BenchContext):
+    """Sin cachés: lectura de archivos, deduplicación y serialización en cada llamada."""
+    server = ctx.server()
+    fetch = _get(server, "/api/data/existing")
+
+    def call():
+        server.resultados_cache.invalidate()
+        server.response_cache = server.ResponseCache()
+        server.merged_events_cache = server.ResponseCache()
+        return fetch()
+    return call, ctx.scale["scraped_hotels"] + ctx.scale["scraped_events"]
+
+
+@case("api.dashboard_ndjson")
+def _api_dashboard_ndjson(ctx: BenchContext):
+    server = ctx.server()
+    return _get(server, "/api/dashboard?format=ndjson"), ctx.scale["scraped_hotels"] + ctx.scale["scraped_events"]
+
+
+@case("api.events_by_date")
+def _api_events_by_date(ctx: BenchContext):
+    server = ctx.server()
+    return _get(server, "/api/events/by-date"), ctx.scale["scraped_events"]
+
+
+@case("api.generate_recommendations")
+def _api_generate_recommendations(ctx: BenchContext):
+    server = ctx.server()
+    payload = {"hotel_id": "H1", "hotel_latitude": HOTEL_COORDS[0], "hotel_longitude": HOTEL_COORDS[1],
+               "own_room_types": ctx.room_types, "days_in_advance": ctx.scale["days"]}
+
+    def call():
+        response = server.app.test_client().post("/api/ai/generate-recommendations", json=payload)
+        assert response.status_code == 200, response.status_code
+        return response.get_data()
+    return call, ctx.scale["rooms"] * ctx.scale["days"]
+
+
+@case("api.generate_recommendations_batch")
+def _api_generate_recommendations_batch(ctx: BenchContext):
+    server = ctx.server()
+
+    def call():
+        response = server.app.test_client().post("/api/ai/generate-recommendations/batch", json={"hotels": ctx.hotels})
+        body = response.get_data()
+        assert response.status_code == 200, response.status_code
+        return body
+    return call, ctx.scale["hotels"] * ctx.scale["rooms"] * ctx.scale["days"]
+
+
+# --- medición y comparación ---
+
+def time_call(call: Callable, repeat: int, warmup: int = 1) -> List[float]:
+    for _ in range(warmup):
+        call()
+    samples = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples: List[float], items: int) -> Dict:
+    ordered = sorted(samples)
+    median = statistics.median(ordered)
+    return {
+        "median_s": round(median, 6),
+        "min_s": round(ordered[0], 6),
+        "p95_s": round(ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))], 6),
+        "stdev_s": round(statistics.stdev(ordered), 6) if len(ordered) > 1 else 0.0,
+        "repeat": len(ordered),
+        "items": items,
+        "us_per_item": round(median / items * 1e6, 3) if items else None,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(scale_name: str, repeat: int, only: Optional[List[str]] = None) -> Dict:
+    scale = SCALES[scale_name]
+    selected = [name for name in CASES if not only or any(name.startswith(prefix) for prefix in only)]
+    cwd = os.getcwd()
+    commit = git_commit()
+    ctx = BenchContext(scale)
+    results = {}
+    try:
+        for name in selected:
+            call, items = CASES[name](ctx)
+            results[name] = summarize(time_call(call, repeat), items)
+            print(f'{name:<36} mediana {results[name]["median_s"] * 1000:9.2f} ms'
+                  f'  p95 {results[name]["p95_s"] * 1000:9.2f} ms  ({items} elementos)')
+    finally:
+        ctx.close(cwd)
+    return {
+        "meta": {
+            "commit": commit,
+            "created_at": datetime.now().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "scale_name": scale_name,
+            "scale": scale,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """Casos cuya mediana cambió; "regression" es True si empeoró más que threshold."""
+    if baseline["meta"].get("scale") != current["meta"].get("scale"):
+        print("⚠️ Las corridas usan escalas distintas; la comparación no es directa")
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None or not base["median_s"]:
+            continue
+        ratio = result["median_s"] / base["median_s"]
+        rows.append({"case": name, "baseline_s": base["median_s"], "current_s": result["median_s"],
+                     "ratio": round(ratio, 3), "regression": ratio > 1 + threshold})
+    return rows
+
+
+def print_comparison(rows: List[Dict], baseline: Dict, current: Dict) -> None:
+    print(f'\nbase {baseline["meta"].get("commit")} -> actual {current["meta"].get("commit")}')
+    for row in rows:
+        mark = "❌" if row["regression"] else ("✅" if row["ratio"] < 1 else "  ")
+        print(f'{mark} {row["case"]:<36} {row["baseline_s"] * 1000:9.2f} ms -> {row["current_s"] * 1000:9.2f} ms'
+              f'  ({row["ratio"]:.2f}x)')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="prefijos de casos separados por coma (p. ej. pricing,api)")
+    parser.add_argument("--output", help="archivo JSON de resultados (por defecto benchmarks/results/<commit>-<escala>.json)")
+    parser.add_argument("--compare", help="JSON de una corrida anterior contra la cual comparar")
+    parser.add_argument("--diff", nargs=2, metavar=("BASE", "ACTUAL"), help="solo compara dos JSON existentes")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    if args.diff:
+        with open(args.diff[0], "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.diff[1], "r", encoding="utf-8") as f:
+            current = json.load(f)
+    else:
+        only = [prefix.strip() for prefix in args.only.split(",")] if args.only else None
+        current = run_suite(args.scale, args.repeat, only)
+        output = args.output or os.path.join(RESULTS_DIR, f'{current["meta"]["commit"] or "local"}-{args.scale}.json')
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados en {output}")
+        if not args.compare:
+            return
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    print_comparison(rows, baseline, current)
+    if any(row["regression"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import random
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+# Generadores de datos sintéticos con la forma de las tablas de Supabase,
+# para medir el motor de precios sin depender de una base real.
+
+IMPACT_LEVELS = ["High", "Medium", "Low"]
+# Textos de room_type_raw como aparecen en los scrapes (algunos sin clase reconocible)
+COMPETITOR_ROOM_TYPES = ["Standard King", "Deluxe Suite", "Habitación Doble", "Deluxe King", "Family Room",
+                         "Habitación Estándar", "Two Queen Beds", "Junior Suite", "Habitación 2"]
+# Incluye una habitación sin clase reconocible, que se compara contra toda la competencia
+OWN_ROOM_NAMES = ["Standard King", "Deluxe Suite", "Habitación Doble", "Suite Presidencial", "Cabaña"]
+
+
+def make_competitor_prices(days: int, rows_per_day: int, start: Optional[date] = None, seed: int = 7) -> List[Dict]:
+    """Filas de competitor_prices: rows_per_day precios por cada check_in_date."""
+    rng = random.Random(seed)
+    start = start or date.today()
+    rows = []
+    for offset in range(days):
+        check_in = (start + timedelta(days=offset)).isoformat()
+        for i in range(rows_per_day):
+            rows.append({
+                "id": len(rows) + 1,
+                "hotel_name": f"Competidor {i}",
+                "room_type_raw": rng.choice(COMPETITOR_ROOM_TYPES),
+                "check_in_date": check_in,
+                "price_per_night": round(rng.uniform(700, 3500), 2),
+            })
+    rng.shuffle(rows)
+    return rows
+
+
+def make_detected_events(count: int, days: int, start: Optional[date] = None, seed: int = 11) -> List[Dict]:
+    """Filas de detected_events con duración de 1 a 4 días dentro de la ventana."""
+    rng = random.Random(seed)
+    start = start or date.today()
+    events = []
+    for i in range(count):
+        first = start + timedelta(days=rng.randrange(days))
+        events.append({
+            "id": i + 1,
+            "name": f"Evento {i}",
+            "start_date": first.isoformat(),
+            "end_date": (first + timedelta(days=rng.randrange(4))).isoformat(),
+            "estimated_impact": rng.choice(IMPACT_LEVELS),
+            "latitude": round(32.5149 + rng.uniform(-0.15, 0.15), 5),
+            "longitude": round(-117.0382 + rng.uniform(-0.15, 0.15), 5),
+        })
+    return events
+
+
+def make_room_types(count: int) -> Dict[str, str]:
+    """own_room_types con el formato {nombre: id} que recibe el optimizador (clases variadas)."""
+    names = {}
+    for i in range(count):
+        name = OWN_ROOM_NAMES[i % len(OWN_ROOM_NAMES)]
+        names[name if i < len(OWN_ROOM_NAMES) else f"{name} {i // len(OWN_ROOM_NAMES) + 1}"] = f"R{i + 1}"
+    return names
+
+
+EVENT_WORDS = ["Festival", "Noche", "Concierto", "Tour", "Feria", "Cena", "Expo", "Rock", "Vino", "Cerveza",
+               "Jazz", "Taco", "Arte", "Baja", "Mariachi", "Comedia", "Teatro", "Danza", "Mercado", "Gala"]
+
+
+def _noisy_name(name: str, rng: random.Random) -> str:
+    """Variante del nombre como la publicaría otra fuente."""
+    variant = rng.choice(["upper", "prefix", "accent", "typo", "suffix"])
+    if variant == "upper":
+        return name.upper()
+    if variant == "prefix":
+        return f"Entradas {name}"
+    if variant == "accent":
+        return name.replace("a", "á", 1)
+    if variant == "typo" and len(name) > 6:
+        i = rng.randrange(1, len(name) - 1)
+        return name[:i] + name[i + 1:]
+    return f"{name} 2025"
+
+
+def make_scraped_events(count: int, duplicate_rate: float = 0.3, days: int = 90, start: Optional[date] = None,
+                        seed: int = 13) -> List[Dict]:
+    """
+    Eventos scrapeados de Eventbrite y tijuanaeventos; una fracción son el mismo evento
+    publicado otra vez (otra fuente, nombre con ruido, ubicación aproximada).
+    Cada fila trae 'true_id' para medir la deduplicación.
+    """
+    rng = random.Random(seed)
+    start = start or date.today()
+    originals = []
+    for i in range(count):
+        if originals and rng.random() < duplicate_rate:
+            original = rng.choice(originals)
+            duplicate = dict(original)
+            duplicate["nombre"] = _noisy_name(original["nombre"], rng)
+            if rng.random() < 0.5:
+                duplicate.update(fuente="tijuanaeventos.com", latitude=32.5149, longitude=-117.0382, lugar="Tijuana")
+            else:
+                duplicate["latitude"] = round(original["latitude"] + rng.uniform(-0.002, 0.002), 6)
+            originals.append(duplicate)
+            continue
+        words = rng.sample(EVENT_WORDS, 3)
+        originals.append({
+            "true_id": i,
+            "nombre": f"{' '.join(words)} {i}",
+            "start_date": (start + timedelta(days=rng.randrange(days))).isoformat(),
+            "lugar": f"Foro {rng.randrange(200)}",
+            "fuente": "eventbrite.com",
+            "latitude": round(32.5149 + rng.uniform(-0.15, 0.15), 6),
+            "longitude": round(-117.0382 + rng.uniform(-0.15, 0.15), 6),
+        })
+    return originals
+
+
+def make_hotel_specs(count: int, days: int, room_types: int, seed: int = 3) -> List[Dict]:
+    """Hoteles con coordenadas y habitaciones en el formato de /api/ai/generate-recommendations."""
+    rng = random.Random(seed)
+    return [
+        {
+            "hotel_id": f"H{i}",
+            "hotel_latitude": round(32.5149 + rng.uniform(-0.1, 0.1), 5),
+            "hotel_longitude": round(-117.0382 + rng.uniform(-0.1, 0.1), 5),
+            "own_room_types": make_room_types(room_types),
+            "days_in_advance": days,
+        }
+        for i in range(count)
+    ]
+
+
+def make_scraped_hotels(count: int, seed: int = 5) -> List[Dict]:
+    """Hoteles como los escribe scrape_hotels.py en hoteles_tijuana_promedios.json."""
+    rng = random.Random(seed)
+    return [
+        {
+            "nombre": f"Hotel {i}",
+            "estrellas": float(rng.randint(2, 5)),
+            "precio_promedio": rng.randint(450, 3800),
+            "noches_contadas": rng.randint(1, 3),
+        }
+        for i in range(count)
+    ]
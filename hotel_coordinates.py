@@ -1,6 +1,8 @@
 # Configuración de coordenadas de hoteles en Tijuana
 # Puedes agregar, modificar o eliminar hoteles según tus necesidades
 
+from backend.geo.spatial_index import GeoGridIndex
+
 HOTEL_COORDINATES = {
     "Grand Hotel Tijuana": (32.5149, -117.0382),
     "Hotel Real del Río": (32.5283, -117.0187),
@@ -16,6 +18,11 @@ HOTEL_COORDINATES = {
     # "Nombre del Hotel": (latitud, longitud),
 }
 
+# Índice espacial de los hoteles; se mantiene al día con add_hotel/remove_hotel
+HOTEL_INDEX = GeoGridIndex()
+for _name, (_lat, _lon) in HOTEL_COORDINATES.items():
+    HOTEL_INDEX.add(_name, _lat, _lon)
+
 def get_hotel_coordinates(hotel_name):
     """Obtiene las coordenadas de un hotel específico"""
     return HOTEL_COORDINATES.get(hotel_name, (32.5149, -117.0382))  # Default a Tijuana
@@ -27,11 +34,21 @@ def get_all_hotels():
 def add_hotel(name, latitude, longitude):
     """Agrega un nuevo hotel a la configuración"""
     HOTEL_COORDINATES[name] = (latitude, longitude)
+    HOTEL_INDEX.add(name, latitude, longitude)
 
 def remove_hotel(name):
     """Elimina un hotel de la configuración"""
     if name in HOTEL_COORDINATES:
         del HOTEL_COORDINATES[name]
+    HOTEL_INDEX.remove(name)
+
+def nearest_hotels(latitude, longitude, k=1):
+    """Los k hoteles más cercanos a un punto: [(nombre, distancia_km)]"""
+    return HOTEL_INDEX.nearest(latitude, longitude, k)
+
+def hotels_within_radius(latitude, longitude, radius_km):
+    """Hoteles a radius_km o menos de un punto, del más cercano al más lejano"""
+    return HOTEL_INDEX.within_radius(latitude, longitude, radius_km)
 
 # Ejemplo de uso:
 if __name__ == "__main__":
@@ -40,5 +57,9 @@ if __name__ == "__main__":
         coords = get_hotel_coordinates(hotel)
         print(f"  {hotel}: {coords}")
     
+    print("Hoteles a menos de 1 km del Grand Hotel Tijuana:")
+    for hotel, distance in hotels_within_radius(32.5149, -117.0382, 1.0):
+        print(f"  {hotel}: {distance:.2f} km")
+    
     # Ejemplo de agregar un nuevo hotel
     # add_hotel("Nuevo Hotel", 32.5200, -117.0300) 
\ No newline at end of file